@@ -6,7 +6,8 @@ from app.api.v1.endpoints import (
     reminders, 
     maps, 
     chat,       
-    medicines   
+    medicines,
+    export
 )
 
 api_router = APIRouter()
@@ -17,4 +18,5 @@ api_router.include_router(reports.router, prefix="/reports", tags=["reports"])
 api_router.include_router(reminders.router, prefix="/reminders", tags=["reminders"])
 api_router.include_router(maps.router, prefix="/maps", tags=["maps"])
 api_router.include_router(chat.router, prefix="/chat", tags=["chat"])
-api_router.include_router(medicines.router, prefix="/medicines", tags=["medicines"])
\ No newline at end of file
+api_router.include_router(medicines.router, prefix="/medicines", tags=["medicines"])
+api_router.include_router(export.router, prefix="/export", tags=["export"])
@@ -12,6 +12,7 @@ from app.crud import crud_user
 from app.models.user import UserCreate, UserInDB, Token, TokenData
 from app.core import security
 from app.core.config import settings
+from app.core.serialization import model_response
 
 router = APIRouter()
 
@@ -79,7 +80,7 @@ async def register_new_user(
         )
     
     new_user = await crud_user.create_user(db, user_in=user_in)
-    return new_user
+    return model_response(new_user, status_code=201)
 
 
 @router.post("/login", response_model=Token)
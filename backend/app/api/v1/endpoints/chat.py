@@ -1,85 +1,134 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-import os
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from bson import ObjectId
 import logging
 
-# --- IMPORT BOTH GOOGLE SDKs ---
-import vertexai
-from vertexai.generative_models import GenerativeModel as VertexModel
-from google.oauth2 import service_account
-
-import google.generativeai as genai
-from google.generativeai import GenerativeModel as StudioModel
-
-from app.core.config import settings
+from app.db.mongodb import get_database
+from app.crud import crud_chat, crud_report
+from app.models.user import UserInDB
+from app.models.chat import ChatRequest, ChatMessage, ChatSessionInDB
+from app.services import chat_service
+from app.services.answer_cache import answer_cache, is_personal
+from app.api.v1.endpoints.auth import get_current_active_user
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-class ChatRequest(BaseModel):
-    message: str
+SESSION_TITLE_CHARS = 60
 
-def get_chat_model():
-    """
-    Helper to initialize the model. 
-    Tries GCP Vertex AI first. If the JSON file is missing, falls back to AI Studio API Key.
-    """
-    # --- ATTEMPT 1: Enterprise Vertex AI (GCP) ---
-    json_path = getattr(settings, 'GOOGLE_APPLICATION_CREDENTIALS', None)
-    
-    if json_path and os.path.exists(json_path):
-        logger.info("Initializing Gemini via GCP Vertex AI...")
-        my_credentials = service_account.Credentials.from_service_account_file(json_path)
-        vertexai.init(
-            project=settings.GCP_PROJECT_ID, 
-            location=settings.GCP_LOCATION, 
-            credentials=my_credentials
-        )
-        return VertexModel("gemini-2.5-flash")
 
-    # --- ATTEMPT 2: Fallback to Google AI Studio (API Key) ---
-    api_key = getattr(settings, 'GEMINI_FREE_API_KEY', None)
-    
-    if api_key:
-        logger.info("GCP JSON missing. Falling back to Gemini via AI Studio API Key...")
-        genai.configure(api_key=api_key)
-        return StudioModel("gemini-2.5-flash")
+async def compact_if_needed(db: AsyncIOMotorDatabase, user_id: str, session_id: str):
+    """Runs after the response is sent, so summarizing never adds to a turn's latency."""
+    session = await crud_chat.get_session(db, user_id, session_id)
+    if not session or not chat_service.needs_compaction(session):
+        return
+    try:
+        summary, dropped = await run_in_threadpool(chat_service.summarize_history, session)
+        if not await crud_chat.compact_session(db, session_id, summary, dropped, session.compacted_messages):
+            logger.info(f"Chat session {session_id} was compacted concurrently; dropping this summary.")
+            return
+        logger.info(f"Compacted chat session {session_id}: {dropped} messages folded into the summary.")
+    except Exception as e:
+        logger.error(f"Chat compaction failed for session {session_id}: {e}")
+
+
+async def get_owned_session(db: AsyncIOMotorDatabase, user: UserInDB, session_id: str) -> ChatSessionInDB:
+    session = await crud_chat.get_session(db, str(user.id), session_id) if ObjectId.is_valid(str(session_id)) else None
+    if session is None:
+        raise HTTPException(status_code=404, detail="Chat session not found.")
+    return session
 
-    # --- FAILURE: Neither is configured ---
-    raise ValueError("Server Configuration Error: Missing both GCP Credentials and GEMINI_API_KEY.")
 
 @router.post("/", response_model=dict)
-async def chat_with_medical_assistant(request: ChatRequest):
+async def chat_with_medical_assistant(
+    request: ChatRequest,
+    background_tasks: BackgroundTasks,
+    current_user: UserInDB = Depends(get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+):
     """
     Feature #4: AI Chatbot for medical queries.
+    Pass the returned `session_id` back to continue the same conversation.
+    The opening question of a new conversation, when it isn't about the user
+    themselves, is answered generically and shared through the answer cache.
     """
-    try:
-        # Initialize model using the fallback logic
-        model = get_chat_model()
-        
-        system_instruction = (
-            "You are Vitalyze AI, a helpful and empathetic medical assistant. "
-            "Answer the user's health questions in simple, easy-to-understand language. "
-            "If the question is serious, advise them to see a doctor. "
-            "Do not advise on taking any medication. If asked direct them to reach out to their doctor. "
-            "If the question is regarding information about any medicine, follow the below format. "
-            "Provide a structured summary for the medicine. Format the response in these 3 clear sections: "
-            "1. **What it is used for:** (Simple explanation) "
-            "2. **Common Side Effects:** (List format) "
-            "3. **Warning/Precautions:** (When to be careful) "
-            "Keep it concise and easy to read. Do not answer non-medical questions."
+    user_id = str(current_user.id)
+    cacheable = not request.session_id and not is_personal(request.message)
+    reply = answer_cache.get(request.message) if cacheable else None
+
+    if request.session_id:
+        session = await get_owned_session(db, current_user, request.session_id)
+    else:
+        session = await crud_chat.create_session(
+            db, ChatSessionInDB(user_id=user_id, title=request.message[:SESSION_TITLE_CHARS])
         )
-        
-        full_prompt = f"{system_instruction}\n\nUser: {request.message}\nAssistant:"
-        
-        response = model.generate_content(full_prompt)
-        return {"response": response.text}
-        
+
+    usage = {"prompt_tokens": 0, "cached_tokens": 0, "output_tokens": 0}
+    cached = reply is not None
+    try:
+        if cacheable and not cached:
+            # Generic answer: no report context, so it is safe to serve to anyone.
+            reply, usage = await run_in_threadpool(chat_service.generate_reply, session, request.message)
+            answer_cache.put(request.message, reply)
+        elif not cached:
+            latest_report = await crud_report.get_latest_report(db, user_id)
+            reply, usage = await run_in_threadpool(chat_service.generate_reply, session, request.message, latest_report)
+
     except ValueError as ve:
         # Catches the specific error if both auth methods fail
         logger.error(f"Configuration Error: {ve}")
         raise HTTPException(status_code=503, detail=str(ve))
-        
+
     except Exception as e:
         logger.error(f"Chat Error: {e}")
-        raise HTTPException(status_code=500, detail="AI Service is currently unavailable. Please try again later.")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="AI Service is currently unavailable. Please try again later.")
+
+    await crud_chat.append_messages(db, session.id, [
+        ChatMessage(role="user", text=request.message),
+        ChatMessage(role="model", text=reply),
+    ])
+    background_tasks.add_task(compact_if_needed, db, user_id, str(session.id))
+
+    return {"response": reply, "session_id": str(session.id), "usage": usage, "cached": cached}
+
+
+@router.get("/cache/stats")
+async def chat_cache_stats(current_user: UserInDB = Depends(get_current_active_user)):
+    """
+    Hit rate of this API process's answer cache; every hit is a Gemini call saved.
+    """
+    return answer_cache.stats()
+
+
+@router.get("/sessions")
+async def list_chat_sessions(
+    current_user: UserInDB = Depends(get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+):
+    """
+    Lists the logged-in user's conversations, most recent first.
+    """
+    return await crud_chat.list_sessions(db, str(current_user.id))
+
+
+@router.get("/sessions/{session_id}", response_model=ChatSessionInDB)
+async def get_chat_session(
+    session_id: str,
+    current_user: UserInDB = Depends(get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+):
+    """
+    Returns one conversation: its rolling summary and the recent messages.
+    """
+    return await get_owned_session(db, current_user, session_id)
+
+
+@router.delete("/sessions/{session_id}", status_code=204)
+async def delete_chat_session(
+    session_id: str,
+    current_user: UserInDB = Depends(get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+):
+    await get_owned_session(db, current_user, session_id)
+    await crud_chat.delete_session(db, str(current_user.id), session_id)
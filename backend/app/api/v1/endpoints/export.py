@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from datetime import datetime
+
+from app.db.mongodb import get_database
+from app.models.user import UserInDB
+from app.services.export import EXPORT_FORMATS, EXPORTERS, gzip_stream
+from app.api.v1.endpoints.auth import get_current_active_user
+
+router = APIRouter()
+
+
+@router.get("/")
+async def export_health_record(
+    format: str = "ndjson",
+    gzip: bool = False,
+    current_user: UserInDB = Depends(get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+):
+    """
+    Downloads all of the user's reports, vitals and reminders.
+    `format`: ndjson (default), csv or fhir (a FHIR-style Bundle).
+    `gzip=true` returns a .gz file. The body is streamed straight from the
+    database cursors, so large histories don't build up in server memory.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format '{format}'. Use one of: {', '.join(EXPORT_FORMATS)}.")
+
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f"vitalyze_{current_user.id}_{datetime.now():%Y%m%d}.{extension}"
+    body = EXPORTERS[format](db, current_user)
+    if gzip:
+        body, media_type, filename = gzip_stream(body), "application/gzip", f"{filename}.gz"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"},
+    )
@@ -17,9 +17,10 @@ class Pharmacy(BaseModel):
     user_ratings_total: Optional[int] = None
     geometry: Geometry
     place_id: str
+    distance_meters: Optional[int] = None
 
 @router.get("/pharmacies", response_model=List[Pharmacy])
-def get_nearby_pharmacies(
+async def get_nearby_pharmacies(
     lat: float = Query(..., description="Latitude of the user"),
     lng: float = Query(..., description="Longitude of the user"),
     radius: int = Query(5000, description="Search radius in meters (default 5km)")
@@ -27,9 +28,10 @@ def get_nearby_pharmacies(
     """
     Get list of pharmacies near the provided coordinates.
     """
-    results = maps_service.get_nearby_pharmacies(lat, lng, radius)
+    results = await maps_service.get_nearby_pharmacies(lat, lng, radius)
     
-    if not results and maps_service.gmaps is None:
+    if not results and maps_service.google_api_key is None:
          raise HTTPException(status_code=503, detail="Maps service unavailable (API Key missing)")
          
-    return results
\ No newline at end of file
+    return results
+
@@ -1,18 +1,44 @@
-from fastapi import APIRouter, HTTPException
-import vertexai
-from vertexai.generative_models import GenerativeModel
+import hashlib
+from functools import lru_cache
+from fastapi import APIRouter, HTTPException, Request
 from app.core.config import settings
+from app.core.metrics import timer, GEMINI_CALL_SECONDS
+from app.core.serialization import FastJSONResponse
+from app.core.http_cache import etag, not_modified, with_validators
 
 router = APIRouter()
 
-vertexai.init(project=settings.GCP_PROJECT_ID, location=settings.GCP_LOCATION)
-model = GenerativeModel("gemini-2.5-flash")
+# Bump when the prompt or model changes, so clients drop their cached details.
+MEDICINE_DETAILS_VERSION = 1
+
+
+@lru_cache(maxsize=1)
+def get_medicine_model():
+    """
+    Initializes Vertex AI on first use instead of at import time,
+    so the SDK is only loaded once a medicine lookup actually happens.
+    """
+    import vertexai
+    from vertexai.generative_models import GenerativeModel
+
+    vertexai.init(project=settings.GCP_PROJECT_ID, location=settings.GCP_LOCATION)
+    return GenerativeModel("gemini-2.5-flash")
+
 
 @router.get("/{name}")
-async def get_medicine_details(name: str):
+async def get_medicine_details(request: Request, name: str):
     """
     Feature #5: Get details (side effects, usage) for a specific medicine.
+    The details only change with the prompt, so clients may cache them and a
+    revalidation is answered with a 304 without calling the model.
     """
+    key = hashlib.sha1(name.strip().lower().encode("utf-8")).hexdigest()[:16]
+    tag = etag("medicine", key, MEDICINE_DETAILS_VERSION)
+    cache_control = f"public, max-age={settings.MEDICINE_CACHE_SECONDS}"
+    cached = not_modified(request, tag, cache_control=cache_control)
+    if cached:
+        return cached
+
     try:
         prompt = f"""
         Provide a structured summary for the medicine: {name}.
@@ -24,8 +50,11 @@ async def get_medicine_details(name: str):
         Keep it concise and easy to read.
         """
         
-        response = model.generate_content(prompt)
-        return {"name": name, "details": response.text}
+        with timer(GEMINI_CALL_SECONDS, purpose="medicine"):
+            response = get_medicine_model().generate_content(prompt)
+        return with_validators(
+            FastJSONResponse({"name": name, "details": response.text}), tag, cache_control=cache_control
+        )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
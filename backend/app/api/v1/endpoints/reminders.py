@@ -1,105 +1,208 @@
 from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel, Field
-from typing import List, Literal
+from typing import List, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from celery.schedules import crontab
 from datetime import datetime, timedelta
 
 from app.db.mongodb import get_database
-from app.crud import crud_reminder  # we don't need crud_user anymore!
-from app.models.user import DailyReminder, RefillReminder, UserInDB
-from app.tasks.reminder_tasks import send_daily_reminder_task, send_refill_reminder_task
-from app.tasks.celery_app import celery
-
-# --- NEW IMPORT: Get the user from the token ---
-# (Make sure this path is correct for your project)
+from app.crud import crud_reminder
+from app.models.user import UserInDB
+from app.models.reminder import (
+    DailyReminderCreate,
+    RefillReminderCreate,
+    ReminderBulkCreate,
+    ReminderBulkUpdate,
+    ReminderIds,
+    ReminderInDB,
+)
 from app.api.v1.endpoints.auth import get_current_user
 
 router = APIRouter()
 
-class DailyReminderCreate(BaseModel):
-    medicine_name: str
-    timings: List[Literal["morning", "afternoon", "evening"]]
+# Reminders need no per-reminder Celery state. Beat runs one dispatcher per
+# daily timing and a refill sweeper that picks up due `refill_date`s, both
+# reading the 'reminders' collection, so a bulk_write here is also the
+# scheduler update: rescheduling is a new refill_date, cancelling is is_active=False.
+
+
+def compute_refill_date(initial_quantity: int, frequency_per_day: int, start: Optional[datetime] = None) -> datetime:
+    """Remind 3 days before the supply runs out."""
+    days_of_supply = initial_quantity / frequency_per_day
+    reminder_delay_days = max(0, days_of_supply - 3)
+    return (start or datetime.utcnow()) + timedelta(days=reminder_delay_days)
+
+
+def build_daily_reminder(user: UserInDB, reminder_in: DailyReminderCreate) -> ReminderInDB:
+    return ReminderInDB(
+        user_id=str(user.id),
+        user_name=user.name,
+        phone_number=user.phone_number,
+        type="daily",
+        **reminder_in.model_dump(),
+    )
+
 
-class RefillReminderCreate(BaseModel):
-    medicine_name: str
-    initial_quantity: int = Field(..., gt=0)
-    frequency_per_day: int = Field(..., gt=0)
+def build_refill_reminder(user: UserInDB, reminder_in: RefillReminderCreate) -> ReminderInDB:
+    start_date = datetime.utcnow()
+    refill_date = compute_refill_date(reminder_in.initial_quantity, reminder_in.frequency_per_day, start_date)
+    return ReminderInDB(
+        user_id=str(user.id),
+        user_name=user.name,
+        phone_number=user.phone_number,
+        type="refill",
+        start_date=start_date,
+        refill_date=refill_date,
+        **reminder_in.model_dump(),
+    )
+
+
+@router.get("/", response_model=List[ReminderInDB])
+async def list_reminders(
+    active_only: bool = False,
+    current_user: UserInDB = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+):
+    """
+    Lists the logged-in user's reminders.
+    """
+    return await crud_reminder.get_reminders_for_user(db, str(current_user.id), active_only=active_only)
 
-TIMING_TO_CRONTAB = {
-    "morning": crontab(hour=8, minute=0),
-    "afternoon": crontab(hour=13, minute=0),
-    "evening": crontab(hour=20, minute=0),
-}
 
-# --- 1. REMOVED {user_id} FROM URL ---
 @router.post("/daily", status_code=201)
 async def schedule_daily_reminder(
     reminder_in: DailyReminderCreate,
-    # --- 2. ADDED CURRENT_USER DEPENDENCY ---
     current_user: UserInDB = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_database),
 ):
     """
     Sets up a recurring daily reminder for the logged-in user.
     """
-    # We no longer need to look up the user manually. 
-    # 'current_user' is already loaded from the token!
+    reminder = build_daily_reminder(current_user, reminder_in)
+    await crud_reminder.create_reminders(db, [reminder])
+
+    return {"message": "Daily reminders scheduled successfully.", "id": str(reminder.id)}
 
-    # Get the ID from the logged-in user
-    user_id = str(current_user.id)
 
-    for timing in reminder_in.timings:
-        task_name = f"daily-reminder-{user_id}-{reminder_in.medicine_name}-{timing}"
-        
-        # We use current_user.name and current_user.phone_number directly
-        celery.add_periodic_task(
-            TIMING_TO_CRONTAB[timing],
-            send_daily_reminder_task.s(current_user.name, current_user.phone_number, reminder_in.medicine_name),
-            name=task_name
-        )
-    
-    reminder_db = DailyReminder(**reminder_in.model_dump())
-    
-    # Save using the ID we got from the token
-    await crud_reminder.add_daily_reminder_to_user(db, user_id=user_id, reminder=reminder_db)
-    
-    return {"message": "Daily reminders scheduled successfully."}
-
-
-# --- 1. REMOVED {user_id} FROM URL ---
 @router.post("/refill", status_code=201)
 async def schedule_refill_reminder(
     reminder_in: RefillReminderCreate,
-    # --- 2. ADDED CURRENT_USER DEPENDENCY ---
     current_user: UserInDB = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_database),
 ):
     """
     Schedules a one-time refill reminder for the logged-in user.
+    Re-submitting the same medicine reschedules the existing reminder.
+    """
+    reminder = build_refill_reminder(current_user, reminder_in)
+    await crud_reminder.create_reminders(db, [reminder])
+
+    return {
+        "message": "Refill reminder scheduled successfully",
+        "id": str(reminder.id),
+        "refill_date": reminder.refill_date.isoformat(),
+    }
+
+
+@router.post("/bulk", status_code=201)
+async def bulk_create_reminders(
+    bulk_in: ReminderBulkCreate,
+    current_user: UserInDB = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+):
+    """
+    Creates many daily and refill reminders in one bulk_write.
+    """
+    reminders = [build_daily_reminder(current_user, r) for r in bulk_in.daily]
+    reminders += [build_refill_reminder(current_user, r) for r in bulk_in.refill]
+
+    if not reminders:
+        raise HTTPException(status_code=400, detail="No reminders provided.")
+
+    created = await crud_reminder.create_reminders(db, reminders)
+    return {"created": created, "ids": [str(r.id) for r in reminders]}
+
+
+@router.patch("/bulk")
+async def bulk_update_reminders(
+    bulk_in: ReminderBulkUpdate,
+    current_user: UserInDB = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+):
+    """
+    Updates many reminders in one bulk_write.
+    Refill reminders whose quantity or frequency changes, or which are
+    re-activated, get a new refill date and are armed for the sweeper again.
+    Renaming a refill to a medicine the user already has a refill for is a 409.
     """
-    # Get the ID from the logged-in user
     user_id = str(current_user.id)
+    existing = {str(r.id): r for r in await crud_reminder.get_reminders_by_ids(db, user_id, [u.id for u in bulk_in.updates])}
 
-    days_of_supply = reminder_in.initial_quantity / reminder_in.frequency_per_day
-    reminder_delay_days = max(0, days_of_supply - 3)
-    refill_date = datetime.utcnow() + timedelta(days=reminder_delay_days)
+    missing = [str(u.id) for u in bulk_in.updates if str(u.id) not in existing]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Reminders not found: {', '.join(missing)}")
 
-    task = send_refill_reminder_task.apply_async(
-        args=[current_user.name, current_user.phone_number, reminder_in.medicine_name],
-        eta=refill_date
-    )
+    changes = {}
+    for update in bulk_in.updates:
+        reminder = existing[str(update.id)]
+        fields = update.model_dump(exclude={"id"}, exclude_none=True)
 
-    reminder_db = RefillReminder(
-        **reminder_in.model_dump(),
-        refill_date=refill_date,
-        celery_task_id=task.id
-    )
-    
-    await crud_reminder.add_refill_reminder_to_user(db, user_id=user_id, reminder=reminder_db)
+        if reminder.type == "daily":
+            fields.pop("initial_quantity", None)
+            fields.pop("frequency_per_day", None)
+        else:
+            fields.pop("timings", None)
+            merged = reminder.model_copy(update=fields)
 
-    return {
-        "message": "Refill reminder scheduled successfully",
-        "refill_date": refill_date.isoformat(),
-        "celery_task_id": task.id
-    }
\ No newline at end of file
+            reschedule = merged.is_active and (
+                "initial_quantity" in fields or "frequency_per_day" in fields or not reminder.is_active
+            )
+            if reschedule:
+                fields["start_date"] = datetime.utcnow()
+                fields["refill_date"] = compute_refill_date(merged.initial_quantity, merged.frequency_per_day, fields["start_date"])
+                fields["refill_sent_at"] = None
+
+        if fields:
+            changes[str(update.id)] = fields
+
+    renames = {
+        reminder_id: fields["medicine_name"] for reminder_id, fields in changes.items()
+        if existing[reminder_id].type == "refill" and "medicine_name" in fields
+    }
+    try:
+        await crud_reminder.check_refill_names(db, user_id, renames)
+        modified = await crud_reminder.update_reminders(db, user_id, changes)
+    except crud_reminder.DuplicateRefillError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"modified": modified}
+
+
+@router.post("/bulk/deactivate")
+async def bulk_deactivate_reminders(
+    ids_in: ReminderIds,
+    current_user: UserInDB = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+):
+    """
+    Deactivates many reminders in one bulk_write. The schedulers skip inactive
+    reminders, so this also cancels any pending refill reminder.
+    """
+    user_id = str(current_user.id)
+    reminders = await crud_reminder.get_reminders_by_ids(db, user_id, ids_in.ids)
+
+    modified = await crud_reminder.update_reminders(db, user_id, {str(r.id): {"is_active": False} for r in reminders})
+    return {"deactivated": modified}
+
+
+@router.post("/bulk/delete")
+async def bulk_delete_reminders(
+    ids_in: ReminderIds,
+    current_user: UserInDB = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+):
+    """
+    Deletes many reminders in one bulk_write.
+    """
+    user_id = str(current_user.id)
+    reminders = await crud_reminder.get_reminders_by_ids(db, user_id, ids_in.ids)
+
+    deleted = await crud_reminder.delete_reminders(db, user_id, [r.id for r in reminders])
+    return {"deleted": deleted}
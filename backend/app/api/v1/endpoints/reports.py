@@ -1,17 +1,23 @@
+import uuid
 import shutil
 import logging
-from fastapi import APIRouter, UploadFile, File, HTTPException, status, Depends
+from fastapi import APIRouter, UploadFile, File, HTTPException, status, Depends, Request
+from fastapi.concurrency import run_in_threadpool
 from typing import List, Optional
 from pathlib import Path
-from celery.result import AsyncResult
 from celery import chain
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from bson import ObjectId
 
-from app.tasks.celery_app import celery
-from app.tasks.report_processing import task_extract_data_from_pdf, task_run_ai_analysis
+from app.tasks.signatures import task_signature, EXTRACT_DATA_FROM_PDF, RUN_AI_ANALYSIS
 from app.models.user import UserInDB
-from app.models.report import ReportInDB
+from app.models.report import ReportInDB, ReportJobInDB
+from app.crud import crud_report, crud_report_job
 from app.api.v1.endpoints.auth import get_current_active_user
+from app.core.serialization import model_response
+from app.core.http_cache import etag, not_modified, with_validators
+from app.services.indicators import compare_entities, indicator_index
+from app.services.units import parse_value, convert_series
 from app.db.mongodb import get_database
 
 try:
@@ -25,50 +31,86 @@ logger = logging.getLogger(__name__)
 UPLOAD_DIR = Path("temp_uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
 
+# Photos go straight to the OCR stage instead of being wrapped in a PDF on the client.
+UPLOAD_CONTENT_TYPES = {"application/pdf", "image/jpeg", "image/png", "image/heic", "image/heif"}
+
+# Job status -> the Celery state names the frontends poll for.
+JOB_TASK_STATES = {
+    "queued": "PENDING",
+    "running": "STARTED",
+    "retrying": "RETRY",
+    "completed": "SUCCESS",
+    "failed": "FAILURE",
+}
+
+
+def save_upload(file: UploadFile, file_path: Path, gcs_destination: str) -> Optional[str]:
+    """Blocking file work for the upload: local temp copy, then the optional GCS copy."""
+    with file_path.open("wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+
+    if storage_service:
+        try:
+            file.file.seek(0)
+            gcs_path = storage_service.upload_file(file.file, gcs_destination)
+            logger.info(f"File uploaded to GCS: {gcs_path}")
+            return gcs_path
+        except Exception as e:
+            # Log the warning but continue since we can fallback to the local file_path
+            logger.warning(f"GCS Upload skipped/failed: {e}. Falling back to local file processing.")
+    return None
+
+
+def dispatch_pipeline(job_id: str, task_id: str):
+    """
+    Extract -> Analyze -> Save. Both tasks take only the job ID and resume from its checkpoints.
+    `task_id` is stored on the job before dispatch, so the first status poll already finds it.
+    """
+    workflow = chain(
+        task_signature(EXTRACT_DATA_FROM_PDF, job_id),
+        task_signature(RUN_AI_ANALYSIS)
+    )
+    return workflow.apply_async(task_id=task_id)
+
 
 @router.post("/upload", status_code=status.HTTP_202_ACCEPTED)
-def upload_report(
+async def upload_report(
     file: UploadFile = File(...),
-    current_user: UserInDB = Depends(get_current_active_user)
+    current_user: UserInDB = Depends(get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """
-    1. Uploads PDF to Temp Storage.
+    1. Uploads the PDF or photo (JPEG/PNG/HEIC) to Temp Storage.
     2. (Optional) Uploads to Google Cloud Storage.
-    3. Triggers Celery Chain: Extract -> Analyze -> Save to DB.
+    3. Creates a 'report_jobs' record for the pipeline's checkpoints.
+    4. Triggers Celery Chain: Extract -> Analyze -> Save to DB.
     """
-    if file.content_type != "application/pdf":
-        raise HTTPException(status_code=400, detail="Invalid file type. Only PDFs allowed.")
+    if file.content_type not in UPLOAD_CONTENT_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid file type. Only PDFs and JPEG, PNG or HEIC photos allowed.")
 
     safe_filename = f"{current_user.id}_{file.filename}"
     file_path = UPLOAD_DIR / safe_filename
 
     try:
-        with file_path.open("wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        gcs_path = None
-        
-        if storage_service:
-            try:
-                file.file.seek(0)
-                gcs_destination = f"users/{current_user.id}/{safe_filename}"
-                gcs_path = storage_service.upload_file(file.file, gcs_destination)
-                logger.info(f"File uploaded to GCS: {gcs_path}")
-            except Exception as e:
-                # Log the warning but continue since we can fallback to the local file_path
-                logger.warning(f"GCS Upload skipped/failed: {e}. Falling back to local file processing.")
-        
-        # FIX: Send arguments positionally to ensure clean chain injection
-        workflow = chain(
-            task_extract_data_from_pdf.s(str(file_path)),
-            task_run_ai_analysis.s(str(current_user.id), file.filename, gcs_path)
-        )
-        
-        task = workflow.apply_async()
-        logger.info(f"Successfully dispatched Celery task chain with ID: {task.id}")
+        gcs_path = await run_in_threadpool(save_upload, file, file_path, f"users/{current_user.id}/{safe_filename}")
+
+        task_id = str(uuid.uuid4())
+        job = await crud_report_job.create_job(db, ReportJobInDB(
+            user_id=str(current_user.id),
+            filename=file.filename,
+            file_path=str(file_path),
+            content_type=file.content_type,
+            gcs_path=gcs_path,
+            task_id=task_id,
+        ))
+
+        # apply_async talks to the broker synchronously; keep it off the event loop.
+        await run_in_threadpool(dispatch_pipeline, str(job.id), task_id)
+        logger.info(f"Successfully dispatched Celery task chain with ID: {task_id} for job {job.id}")
         
         return {
-            "task_id": task.id, 
+            "task_id": task_id, 
+            "job_id": str(job.id),
             "message": "Report uploaded successfully. Analysis started."
         }
         
@@ -79,37 +121,174 @@ def upload_report(
         file.file.close()
 
 
+@router.post("/jobs/{job_id}/retry", status_code=status.HTTP_202_ACCEPTED)
+async def retry_report_job(
+    job_id: str,
+    current_user: UserInDB = Depends(get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Re-runs a failed report job. Stages that already completed are skipped,
+    so only the failed stage and the ones after it run again.
+    """
+    job = await crud_report_job.get_job(db, job_id) if ObjectId.is_valid(job_id) else None
+    if job is None or job.user_id != str(current_user.id):
+        raise HTTPException(status_code=404, detail="Report job not found.")
+    if job.status != "failed":
+        raise HTTPException(status_code=409, detail=f"Report job is {job.status}; only failed jobs can be retried.")
+
+    task_id = str(uuid.uuid4())
+    await crud_report_job.set_status(db, job_id, "queued", error=job.error)
+    await crud_report_job.set_task_id(db, job_id, task_id)
+    await run_in_threadpool(dispatch_pipeline, job_id, task_id)
+    return {"task_id": task_id, "job_id": job_id, "resumes_after": job.completed_stages}
+
+
 @router.get("/status/{task_id}")
-def get_task_status(task_id: str):
+async def get_task_status(
+    task_id: str,
+    current_user: UserInDB = Depends(get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
     """
     Check the status of the background analysis chain.
+    Read from the job record, not from Celery's result backend.
+    Accepts the task ID returned by /upload or the job ID.
     """
-    task_result = AsyncResult(task_id, app=celery)
-    
-    response = {"status": task_result.state}
-    
-    if task_result.state == 'SUCCESS':
-        response["result"] = task_result.result
-    elif task_result.state == 'FAILURE':
-        response["error"] = str(task_result.info)
-        
+    user_id = str(current_user.id)
+    job = await crud_report_job.get_job_by_task_id(db, user_id, task_id)
+    if job is None and ObjectId.is_valid(task_id):
+        job = await crud_report_job.get_job(db, task_id)
+        job = job if job and job.user_id == user_id else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report job not found.")
+
+    response = {"status": JOB_TASK_STATES[job.status], "job_id": str(job.id)}
+
+    if job.status == "completed":
+        response["result"] = {
+            "status": "COMPLETED",
+            "report_id": str(job.id),
+            # Both keys carry the same list, for frontend compatibility
+            "structured_entities": job.vitals or [],
+            "vital_indicators": job.vitals or [],
+            "simple_summary": job.summary,
+        }
+    elif job.status == "failed":
+        response["error"] = job.error
+
     return response
 
 
 @router.get("/history", response_model=List[ReportInDB])
 async def get_user_report_history(
+    request: Request,
     current_user: UserInDB = Depends(get_current_active_user),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """
     Fetches all past analyzed reports for the logged-in user.
     This data is used to generate the History Charts on the frontend.
+    The full extracted text is not included; see /{report_id}/raw-text.
+    Revalidated with the user's `reports_version`, so an unchanged history is a 304 without a reports query.
     """
-    reports = []
-    
-    cursor = db["reports"].find({"user_id": str(current_user.id)}).sort("upload_date", -1)
-    
-    async for doc in cursor:
-        reports.append(ReportInDB(**doc))
-        
-    return reports
\ No newline at end of file
+    tag = etag("reports", current_user.id, current_user.reports_version)
+    cached = not_modified(request, tag, current_user.reports_updated_at)
+    if cached:
+        return cached
+    reports = await crud_report.get_reports_for_user(db, str(current_user.id))
+    return with_validators(model_response(reports), tag, current_user.reports_updated_at)
+
+
+@router.get("/compare")
+async def compare_reports(
+    base: Optional[str] = None,
+    target: Optional[str] = None,
+    current_user: UserInDB = Depends(get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Diffs two reports indicator by indicator, matched on their canonical codes.
+    Without `base`/`target`, compares the latest report against the previous one.
+    """
+    if bool(base) != bool(target):
+        raise HTTPException(status_code=400, detail="Pass both base and target, or neither.")
+    if base and not (ObjectId.is_valid(base) and ObjectId.is_valid(target)):
+        raise HTTPException(status_code=404, detail="Report not found.")
+
+    reports = await crud_report.get_reports_for_comparison(
+        db, str(current_user.id), [base, target] if base else None
+    )
+    if len(reports) < 2:
+        detail = "Report not found." if base else "At least two reports are needed for a comparison."
+        raise HTTPException(status_code=404, detail=detail)
+
+    previous, current = reports
+
+    def describe(report: dict) -> dict:
+        return {"report_id": str(report["_id"]), "filename": report.get("filename"), "upload_date": report.get("upload_date")}
+
+    return {
+        "base": describe(previous),
+        "target": describe(current),
+        "indicators": compare_entities(previous.get("structured_entities"), current.get("structured_entities")),
+    }
+
+
+@router.get("/trend/{code}")
+async def get_indicator_trend(
+    code: str,
+    unit: Optional[str] = None,
+    current_user: UserInDB = Depends(get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    One indicator (by canonical code, e.g. HGB) across all of the user's
+    reports, converted to a single unit: `unit` if given, otherwise the
+    indicator's canonical unit. Points that can't be converted have number null.
+    """
+    code = code.upper()
+    docs = await crud_report.get_indicator_series(db, str(current_user.id), code)
+    entities = [doc["structured_entities"][0] for doc in docs]
+
+    # Reports analysed before ingest-time parsing have no Number/Unit yet.
+    parsed = [
+        (entity["Number"], entity.get("Unit")) if "Number" in entity else parse_value(entity.get("Value"))
+        for entity in entities
+    ]
+    numbers, target_unit = convert_series(code, [n for n, _ in parsed], [u for _, u in parsed], unit)
+
+    return {
+        "code": code,
+        "indicator": indicator_index.names.get(code, code),
+        "unit": target_unit,
+        "points": [
+            {
+                "report_id": str(doc["_id"]),
+                "upload_date": doc.get("upload_date"),
+                "value": entity.get("Value"),
+                "number": None if number != number else round(float(number), 4),  # NaN: not convertible
+            }
+            for doc, entity, number in zip(docs, entities, numbers)
+        ],
+    }
+
+
+@router.get("/{report_id}/raw-text")
+async def get_report_raw_text(
+    report_id: str,
+    current_user: UserInDB = Depends(get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Returns the full extracted text of one report, decompressed on demand.
+    """
+    report = None
+    if ObjectId.is_valid(report_id):
+        report = await db["reports"].find_one(
+            {"_id": ObjectId(report_id), "user_id": str(current_user.id)}, {"raw_text_ref": 1, "raw_text": 1}
+        )
+    raw_text = await crud_report.get_raw_text(db, report) if report else None
+    if raw_text is None:
+        raise HTTPException(status_code=404, detail="Report text not found.")
+    return {"report_id": report_id, "raw_text": raw_text}
@@ -1,22 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from typing import Optional
 
 from app.db.mongodb import get_database
 from app.crud import crud_user
 from app.models.user import UserInDB
+from app.core.serialization import model_response
+from app.core.http_cache import etag, not_modified, with_validators
 
 router = APIRouter()
 
 @router.get("/{user_id}", response_model=UserInDB)
 async def read_user_by_id(
+    request: Request,
     user_id: str,
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """
     Retrieve a user by their ID.
     """
+    # Profiles don't change after registration, so the ID is the whole version
+    # stamp. An endpoint that edits profiles would have to add one here.
+    tag = etag("user", user_id)
+    cached = not_modified(request, tag)
+    if cached:
+        return cached
     user = await crud_user.get_user_by_id(db, user_id=user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return with_validators(model_response(user), tag, user.created_at)
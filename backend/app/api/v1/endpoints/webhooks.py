@@ -3,7 +3,7 @@
 from fastapi import APIRouter, Request, Query, HTTPException, status
 import logging
 from app.core.config import settings
-from app.tasks.reminder_tasks import send_daily_reminder_task # <-- Add this import
+from app.tasks.signatures import task_signature, SEND_DAILY_REMINDER
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -34,9 +34,10 @@ def test_whatsapp_message(phone_number: str):
     A temporary endpoint to test sending a WhatsApp message.
     """
     logger.info(f"Triggering test WhatsApp message to {phone_number}")
-    send_daily_reminder_task.delay(
+    task_signature(
+        SEND_DAILY_REMINDER,
         user_name="Test User",
         phone_number=phone_number,
         medicine_name="Vitamin C"
-    )
+    ).delay()
     return {"message": "Test message task has been queued."}
\ No newline at end of file
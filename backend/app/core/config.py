@@ -24,4 +24,23 @@ class Settings(BaseSettings):
     GOOGLE_APPLICATION_CREDENTIALS: str
     OSM_API_URL:str
 
+    OCR_ADAPTIVE: bool = False  # Off until benchmarks/ocr_dpi.py shows a CPU win on real scans
+    OCR_PAGE_CACHE: bool = False  # Share OCR text of repeated boilerplate pages across documents (Redis)
+    OCR_PAGE_CACHE_MIN_SIGHTINGS: int = 3  # Documents a page must appear in before its text is cached
+    OCR_PAGE_CACHE_TTL_SECONDS: int = 30 * 86400
+
+    RESULT_TTL_SECONDS: int = 3600  # Celery result backend expiry
+
+    BACKFILL_MODEL_CALLS_PER_MINUTE: int = 60  # Shared by every worker running a backfill
+
+    CHAT_CACHE_THRESHOLD: float = 0.8
+    CHAT_CACHE_TTL_SECONDS: int = 86400
+    CHAT_CACHE_MAX_ENTRIES: int = 5000
+
+    COMPRESSION_MIN_BYTES: int = 1024  # Smaller responses go out uncompressed
+    MEDICINE_CACHE_SECONDS: int = 7 * 86400  # Client cache lifetime for /medicines/{name}
+
+    METRICS_ENABLED: bool = False
+    METRICS_WORKER_PORT: int = 9100
+
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+# --- Conditional GET ---
+# Endpoints derive a weak ETag (and, where they have one, a Last-Modified
+# time) from a cheap version stamp they already hold, check it against the
+# request first, and answer 304 Not Modified before querying or serializing
+# the body. Weak tags stay valid whichever Content-Encoding the body went out in.
+
+PRIVATE = "private, no-cache"  # Per-user data: clients may keep it but must revalidate
+
+
+def etag(*parts: Any) -> str:
+    return 'W/"' + "-".join(str(p) for p in parts) + '"'
+
+
+def _http_date(value: datetime) -> str:
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _unchanged_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have whole seconds.
+    return last_modified.astimezone(timezone.utc).replace(microsecond=0) <= since
+
+
+def validators(tag: str, last_modified: Optional[datetime] = None, cache_control: str = PRIVATE) -> dict:
+    headers = {"ETag": tag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = _http_date(last_modified)
+    return headers
+
+
+def not_modified(
+    request: Request, tag: str, last_modified: Optional[datetime] = None, cache_control: str = PRIVATE
+) -> Optional[Response]:
+    """A 304 response when the client's copy is current, otherwise None. If-None-Match wins over If-Modified-Since."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        fresh = "*" in tags or tag.removeprefix("W/") in tags
+    elif last_modified is not None and "if-modified-since" in request.headers:
+        fresh = _unchanged_since(request.headers["if-modified-since"], last_modified)
+    else:
+        fresh = False
+    return Response(status_code=304, headers=validators(tag, last_modified, cache_control)) if fresh else None
+
+
+def with_validators(
+    response: Response, tag: str, last_modified: Optional[datetime] = None, cache_control: str = PRIVATE
+) -> Response:
+    response.headers.update(validators(tag, last_modified, cache_control))
+    return response
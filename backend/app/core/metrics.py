@@ -0,0 +1,181 @@
+import os
+import time
+import logging
+from contextlib import contextmanager, nullcontext
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# --- Prometheus Metrics ---
+# Enabled with METRICS_ENABLED=true (and `prometheus_client` installed).
+# When disabled every metric below is a shared no-op object and `timer()`
+# returns a null context, so instrumented code pays only a function call.
+
+try:
+    import prometheus_client
+    from prometheus_client.core import GaugeMetricFamily
+    from pymongo import monitoring
+except ImportError:  # pragma: no cover - optional dependency
+    prometheus_client = None
+
+ENABLED = bool(settings.METRICS_ENABLED and prometheus_client is not None)
+
+if settings.METRICS_ENABLED and prometheus_client is None:
+    logger.warning("METRICS_ENABLED is set but prometheus_client is not installed. Metrics are disabled.")
+
+
+class _NoopMetric:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, *args, **kwargs):
+        pass
+
+    def inc(self, *args, **kwargs):
+        pass
+
+    def set(self, *args, **kwargs):
+        pass
+
+_NOOP = _NoopMetric()
+_NULL_CONTEXT = nullcontext()
+
+
+def _histogram(name, documentation, labelnames, buckets=None):
+    if not ENABLED:
+        return _NOOP
+    kwargs = {"buckets": buckets} if buckets else {}
+    return prometheus_client.Histogram(name, documentation, labelnames, **kwargs)
+
+
+def _counter(name, documentation, labelnames):
+    return prometheus_client.Counter(name, documentation, labelnames) if ENABLED else _NOOP
+
+
+SLOW_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+
+HTTP_REQUEST_SECONDS = _histogram(
+    "vitalyze_http_request_seconds", "API request latency per route.", ["method", "route", "status"]
+)
+MONGO_COMMAND_SECONDS = _histogram(
+    "vitalyze_mongo_command_seconds", "MongoDB command latency.", ["command", "status"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+OCR_STAGE_SECONDS = _histogram(
+    "vitalyze_ocr_stage_seconds", "Time spent in each OCR pipeline stage.", ["stage"], buckets=SLOW_BUCKETS
+)
+OCR_PAGE_SECONDS = _histogram(
+    "vitalyze_ocr_page_seconds", "Total OCR time per page (preprocess + Tesseract).", [], buckets=SLOW_BUCKETS
+)
+OCR_PAGES = _counter(
+    "vitalyze_ocr_pages_total", "Scanned pages by how their text was obtained.", ["source"]
+)
+GEMINI_CALL_SECONDS = _histogram(
+    "vitalyze_gemini_call_seconds", "Gemini generate_content latency.", ["purpose"], buckets=SLOW_BUCKETS
+)
+GEMINI_TOKENS = _counter(
+    "vitalyze_gemini_tokens_total", "Gemini tokens consumed.", ["purpose", "kind"]
+)
+CHAT_CACHE_LOOKUPS = _counter(
+    "vitalyze_chat_cache_lookups_total", "Chat answer cache lookups (each hit is a Gemini call saved).", ["result"]
+)
+WHATSAPP_SEND_SECONDS = _histogram(
+    "vitalyze_whatsapp_send_seconds", "WhatsApp Cloud API send latency.", ["template", "status"]
+)
+MAPS_PROVIDER_SECONDS = _histogram(
+    "vitalyze_maps_provider_seconds", "Pharmacy lookup latency per provider.", ["provider", "outcome"]
+)
+MAPS_PROVIDER_WINS = _counter(
+    "vitalyze_maps_provider_wins_total", "Hedged pharmacy lookups answered by each provider.", ["provider"]
+)
+
+
+@contextmanager
+def _timed(metric, labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        (metric.labels(**labels) if labels else metric).observe(time.perf_counter() - start)
+
+
+def timer(metric, **labels):
+    """`with timer(OCR_STAGE_SECONDS, stage="preprocessor"): ...`"""
+    if not ENABLED:
+        return _NULL_CONTEXT
+    return _timed(metric, labels)
+
+
+# --- MongoDB command timings (pymongo command monitoring) ---
+
+if ENABLED:
+    class _MongoCommandListener(monitoring.CommandListener):
+        def started(self, event):
+            pass
+
+        def succeeded(self, event):
+            MONGO_COMMAND_SECONDS.labels(command=event.command_name, status="ok").observe(event.duration_micros / 1e6)
+
+        def failed(self, event):
+            MONGO_COMMAND_SECONDS.labels(command=event.command_name, status="error").observe(event.duration_micros / 1e6)
+
+
+def mongo_client_kwargs() -> dict:
+    """Extra AsyncIOMotorClient/MongoClient kwargs; adds the timing listener when metrics are on."""
+    return {"event_listeners": [_MongoCommandListener()]} if ENABLED else {}
+
+
+# --- Celery queue depth (read from the Redis broker at scrape time) ---
+
+if ENABLED:
+    class _CeleryQueueDepthCollector:
+        def __init__(self, queues):
+            self.queues = queues
+            self._redis = None
+
+        def collect(self):
+            gauge = GaugeMetricFamily(
+                "vitalyze_celery_queue_depth", "Messages waiting in each Celery queue.", labels=["queue"]
+            )
+            try:
+                if self._redis is None:
+                    import redis
+                    options = {"ssl_cert_reqs": None} if settings.REDIS_URL.startswith("rediss://") else {}
+                    self._redis = redis.from_url(settings.REDIS_URL, socket_timeout=1, **options)
+                for queue in self.queues:
+                    gauge.add_metric([queue], self._redis.llen(queue))
+            except Exception as e:
+                logger.warning(f"Could not read Celery queue depth: {e}")
+            yield gauge
+
+    _queue_depth_collector = _CeleryQueueDepthCollector(["celery"])
+    prometheus_client.REGISTRY.register(_queue_depth_collector)
+
+
+def _registry():
+    """
+    The default registry, or an aggregating one when running with several
+    processes (uvicorn workers / Celery prefork) and PROMETHEUS_MULTIPROC_DIR set.
+    """
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return prometheus_client.REGISTRY
+
+    from prometheus_client import multiprocess
+    registry = prometheus_client.CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(_queue_depth_collector)
+    return registry
+
+
+def render_latest():
+    """Returns (body, content_type) for the /metrics endpoint."""
+    return prometheus_client.generate_latest(_registry()), prometheus_client.CONTENT_TYPE_LATEST
+
+
+def start_worker_exporter():
+    """Serves /metrics from the Celery worker on METRICS_WORKER_PORT."""
+    if not ENABLED:
+        return
+    prometheus_client.start_http_server(settings.METRICS_WORKER_PORT, registry=_registry())
+    logger.info(f"Worker metrics exporter listening on :{settings.METRICS_WORKER_PORT}")
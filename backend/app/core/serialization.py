@@ -0,0 +1,65 @@
+import json
+import logging
+from datetime import date, datetime
+from typing import Any
+
+from bson import ObjectId
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency, the stdlib encoder is used instead
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# --- Fast Response Serialization ---
+# Documents read back from Mongo were written by our own models, so they are
+# trusted: CRUD builds models from them with model_construct() (no
+# validation), and endpoints that return them wrap the dump in FastJSONResponse.
+# Returning a Response skips FastAPI's second pass over `response_model`
+# (validate + jsonable_encoder); the model stays on the route for the OpenAPI
+# schema only.
+
+if orjson is None:
+    logger.warning("orjson is not installed. FastJSONResponse falls back to the stdlib json encoder.")
+
+
+def _default(obj: Any):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(by_alias=True)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson; understands ObjectId and pydantic models."""
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def trusted(model_cls, doc: dict):
+    """Builds a model from a document this app wrote, without re-validating it."""
+    return model_cls.model_construct(**doc)
+
+
+def model_response(models: Any, status_code: int = 200) -> FastJSONResponse:
+    """
+    One model or a list of them as a response, keyed by alias ("_id") exactly
+    like FastAPI's own `response_model` output.
+    """
+    if isinstance(models, BaseModel):
+        content = models.model_dump(by_alias=True)
+    else:
+        content = [model.model_dump(by_alias=True) for model in models]
+    return FastJSONResponse(content=content, status_code=status_code)
@@ -0,0 +1,104 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from bson import ObjectId
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.models.report import BackfillFilters, BackfillRunInDB
+from app.models.user import to_document
+from app.crud.crud_report import get_raw_text
+from app.crud.crud_user import bump_reports_version
+
+COLLECTION = "backfill_runs"
+
+FAILED_IDS_KEPT = 500
+SAMPLES_KEPT = 20
+
+
+def reports_query(filters: BackfillFilters) -> dict:
+    query: Dict[str, Any] = {}
+    if filters.user_id:
+        query["user_id"] = filters.user_id
+    if filters.report_ids:
+        query["_id"] = {"$in": [ObjectId(i) for i in filters.report_ids]}
+    if filters.uploaded_after or filters.uploaded_before:
+        query["upload_date"] = {}
+        if filters.uploaded_after:
+            query["upload_date"]["$gte"] = filters.uploaded_after
+        if filters.uploaded_before:
+            query["upload_date"]["$lt"] = filters.uploaded_before
+    if filters.missing_codes:
+        query["structured_entities.Code"] = {"$exists": False}
+    return query
+
+
+def _after_checkpoint(run: BackfillRunInDB) -> dict:
+    query = reports_query(run.filters)
+    if run.last_id is not None:
+        query = {"$and": [query, {"_id": {"$gt": ObjectId(str(run.last_id))}}]}
+    return query
+
+
+async def create_run(db: AsyncIOMotorDatabase, run: BackfillRunInDB) -> BackfillRunInDB:
+    await db[COLLECTION].insert_one(to_document(run))
+    return run
+
+
+async def get_run(db: AsyncIOMotorDatabase, run_id: str) -> Optional[BackfillRunInDB]:
+    doc = await db[COLLECTION].find_one({"_id": ObjectId(run_id)})
+    return BackfillRunInDB(**doc) if doc else None
+
+
+async def set_status(db: AsyncIOMotorDatabase, run_id: str, status: str, error: Optional[str] = None):
+    await db[COLLECTION].update_one(
+        {"_id": ObjectId(run_id)}, {"$set": {"status": status, "error": error, "updated_at": datetime.now()}}
+    )
+
+
+async def count_remaining(db: AsyncIOMotorDatabase, run: BackfillRunInDB) -> int:
+    return await db["reports"].count_documents(_after_checkpoint(run))
+
+
+async def next_batch(db: AsyncIOMotorDatabase, run: BackfillRunInDB) -> List[dict]:
+    """The next `batch_size` reports after the checkpoint, with their stored text loaded as `raw_text`."""
+    cursor = db["reports"].find(
+        _after_checkpoint(run),
+        {"user_id": 1, "structured_entities": 1, "simple_summary": 1, "raw_text_ref": 1, "raw_text": 1},
+    ).sort("_id", 1).limit(run.batch_size)
+    reports = [doc async for doc in cursor]
+    for report in reports:
+        report["raw_text"] = await get_raw_text(db, report)
+    return reports
+
+
+async def save_batch(
+    db: AsyncIOMotorDatabase,
+    run: BackfillRunInDB,
+    last_id: ObjectId,
+    report_updates: List[UpdateOne],
+    user_ids: List[str],
+    counts: Dict[str, int],
+    failed_ids: List[str],
+    samples: List[Dict[str, Any]],
+    token_usage: Dict[str, int],
+):
+    """
+    Writes the batch's report updates, then advances the checkpoint. A crash in
+    between only means the batch is re-analysed on resume.
+    """
+    if report_updates:
+        await db["reports"].bulk_write(report_updates, ordered=False)
+        await bump_reports_version(db, user_ids)
+
+    update: Dict[str, Any] = {
+        "$set": {"last_id": last_id, "updated_at": datetime.now()},
+        "$inc": {**counts, **{f"token_usage.{key}": value for key, value in token_usage.items()}},
+    }
+    push = {}
+    if failed_ids:
+        push["failed_ids"] = {"$each": failed_ids, "$slice": -FAILED_IDS_KEPT}
+    if samples and len(run.samples) < SAMPLES_KEPT:
+        push["samples"] = {"$each": samples[:SAMPLES_KEPT - len(run.samples)]}
+    if push:
+        update["$push"] = push
+    await db[COLLECTION].update_one({"_id": ObjectId(str(run.id))}, update)
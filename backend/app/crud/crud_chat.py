@@ -0,0 +1,67 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING
+from bson import ObjectId
+from datetime import datetime
+from typing import List, Optional
+
+from app.models.chat import ChatSessionInDB, ChatMessage
+from app.models.user import to_document
+
+COLLECTION = "chat_sessions"
+SESSION_LIST_PROJECTION = {"title": 1, "user_id": 1, "created_at": 1, "updated_at": 1}
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase):
+    await db[COLLECTION].create_index([("user_id", ASCENDING), ("updated_at", DESCENDING)])
+
+
+async def create_session(db: AsyncIOMotorDatabase, session: ChatSessionInDB) -> ChatSessionInDB:
+    await db[COLLECTION].insert_one(to_document(session))
+    return session
+
+
+async def get_session(db: AsyncIOMotorDatabase, user_id: str, session_id: str) -> Optional[ChatSessionInDB]:
+    doc = await db[COLLECTION].find_one({"_id": ObjectId(str(session_id)), "user_id": user_id})
+    return ChatSessionInDB(**doc) if doc else None
+
+
+async def list_sessions(db: AsyncIOMotorDatabase, user_id: str, limit: int = 50) -> List[dict]:
+    cursor = db[COLLECTION].find({"user_id": user_id}, SESSION_LIST_PROJECTION).sort("updated_at", DESCENDING).limit(limit)
+    return [{**doc, "_id": str(doc["_id"])} async for doc in cursor]
+
+
+async def append_messages(db: AsyncIOMotorDatabase, session_id: str, messages: List[ChatMessage]):
+    await db[COLLECTION].update_one(
+        {"_id": ObjectId(str(session_id))},
+        {
+            "$push": {"messages": {"$each": [m.model_dump() for m in messages]}},
+            "$set": {"updated_at": datetime.now()},
+        },
+    )
+
+
+async def compact_session(
+    db: AsyncIOMotorDatabase, session_id: str, summary: str, dropped: int, compacted_messages: int
+) -> bool:
+    """
+    Replaces the `dropped` oldest messages with the new rolling summary.
+    A pipeline update slices from the front at write time, so turns appended
+    while the summary was being written are kept. `compacted_messages` is the
+    count the summary was built from: if another compaction landed first the
+    update matches nothing and returns False, instead of slicing off turns
+    that were never summarized.
+    """
+    result = await db[COLLECTION].update_one(
+        {"_id": ObjectId(str(session_id)), "compacted_messages": compacted_messages},
+        [{"$set": {
+            "summary": summary,
+            "compacted_messages": {"$add": ["$compacted_messages", dropped]},
+            "messages": {"$slice": ["$messages", dropped, {"$max": [{"$size": "$messages"}, 1]}]},
+        }}],
+    )
+    return result.modified_count == 1
+
+
+async def delete_session(db: AsyncIOMotorDatabase, user_id: str, session_id: str) -> int:
+    result = await db[COLLECTION].delete_one({"_id": ObjectId(str(session_id)), "user_id": user_id})
+    return result.deleted_count
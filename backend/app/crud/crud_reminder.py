@@ -1,22 +1,163 @@
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import InsertOne, UpdateOne, DeleteOne, ASCENDING
+from pymongo.errors import BulkWriteError
 from bson import ObjectId
+from datetime import datetime
+from typing import AsyncIterator, Dict, List
 
-from app.models.user import DailyReminder, RefillReminder
+from app.models.reminder import ReminderInDB
+from app.models.user import to_document
 
-async def add_daily_reminder_to_user(db: AsyncIOMotorDatabase, user_id: str, reminder: DailyReminder):
+COLLECTION = "reminders"
+DUPLICATE_KEY = 11000  # MongoDB error code for a unique index violation
+
+
+class DuplicateRefillError(ValueError):
+    """Another refill reminder of the user already has this medicine name."""
+    def __init__(self, medicine_name: str, reminder_id):
+        super().__init__(f"A refill reminder for '{medicine_name}' already exists (id {reminder_id}).")
+        self.medicine_name = medicine_name
+        self.reminder_id = str(reminder_id)
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase):
     """
-    Adds a daily reminder object to a user's document.
+    Indexes for the per-user listing, the daily fan-out query and the refill
+    sweeper's due-time scan. create_index is a no-op when the index already exists.
+    The unique refill index backs create_reminders' upsert: without it two
+    concurrent submissions of the same medicine could both insert.
     """
-    await db["users"].update_one(
-        {"_id": ObjectId(user_id)},
-        {"$push": {"daily_reminders": reminder.model_dump(by_alias=True)}}
+    await db[COLLECTION].create_index([("user_id", ASCENDING), ("type", ASCENDING), ("is_active", ASCENDING)])
+    await db[COLLECTION].create_index(
+        [("user_id", ASCENDING), ("type", ASCENDING), ("medicine_name", ASCENDING)],
+        unique=True, partialFilterExpression={"type": "refill"},
     )
+    await db[COLLECTION].create_index([("type", ASCENDING), ("is_active", ASCENDING), ("timings", ASCENDING)])
+    await db[COLLECTION].create_index(
+        [("type", ASCENDING), ("is_active", ASCENDING), ("refill_sent_at", ASCENDING), ("refill_date", ASCENDING)]
+    )
+
+
+async def get_reminders_for_user(db: AsyncIOMotorDatabase, user_id: str, active_only: bool = False) -> List[ReminderInDB]:
+    query = {"user_id": user_id}
+    if active_only:
+        query["is_active"] = True
+    cursor = db[COLLECTION].find(query).sort("created_at", ASCENDING)
+    return [ReminderInDB(**doc) async for doc in cursor]
+
+
+async def iter_reminders_for_user(db: AsyncIOMotorDatabase, user_id: str) -> AsyncIterator[dict]:
+    """Raw reminder documents for exports, streamed from the cursor."""
+    async for doc in db[COLLECTION].find({"user_id": user_id}).sort("created_at", ASCENDING):
+        yield doc
+
+
+async def get_reminders_by_ids(db: AsyncIOMotorDatabase, user_id: str, ids: List[ObjectId]) -> List[ReminderInDB]:
+    """Only returns reminders owned by `user_id`; foreign IDs are silently dropped."""
+    cursor = db[COLLECTION].find({"_id": {"$in": [ObjectId(str(i)) for i in ids]}, "user_id": user_id})
+    return [ReminderInDB(**doc) async for doc in cursor]
+
+
+async def create_reminders(db: AsyncIOMotorDatabase, reminders: List[ReminderInDB]) -> int:
+    """
+    Writes all reminders in a single bulk_write.
+    Refill reminders are upserted on (user_id, medicine_name), so re-submitting
+    a refill reschedules the existing one instead of adding a duplicate. Their
+    `id` is updated in place to the stored document's _id.
+    """
+    if not reminders:
+        return 0
 
-async def add_refill_reminder_to_user(db: AsyncIOMotorDatabase, user_id: str, reminder: RefillReminder):
+    daily = [r for r in reminders if r.type == "daily"]
+    # Last submission wins when the same medicine appears twice in one batch.
+    refills = {(r.user_id, r.medicine_name): r for r in reminders if r.type == "refill"}
+
+    operations = [InsertOne(to_document(reminder)) for reminder in daily]
+    for (user_id, medicine_name), reminder in refills.items():
+        doc = to_document(reminder)
+        on_insert = {"_id": doc.pop("_id"), "created_at": doc.pop("created_at")}
+        operations.append(UpdateOne(
+            {"user_id": user_id, "type": "refill", "medicine_name": medicine_name},
+            {"$set": doc, "$setOnInsert": on_insert},
+            upsert=True,
+        ))
+
+    result = await db[COLLECTION].bulk_write(operations, ordered=False)
+
+    if refills:
+        cursor = db[COLLECTION].find(
+            {
+                "user_id": {"$in": list({user_id for user_id, _ in refills})},
+                "type": "refill",
+                "medicine_name": {"$in": list({name for _, name in refills})},
+            },
+            {"user_id": 1, "medicine_name": 1},
+        )
+        stored_ids = {(doc["user_id"], doc["medicine_name"]): doc["_id"] async for doc in cursor}
+        for reminder in reminders:
+            if reminder.type == "refill":
+                reminder.id = stored_ids.get((reminder.user_id, reminder.medicine_name), reminder.id)
+
+    return result.inserted_count + result.upserted_count + result.modified_count
+
+
+async def update_reminders(db: AsyncIOMotorDatabase, user_id: str, changes: dict) -> int:
     """
-    Adds a refill reminder object to a user's document.
+    Applies {reminder_id: {field: value}} in a single bulk_write.
+    Every filter is scoped to `user_id` so users can only touch their own reminders.
     """
-    await db["users"].update_one(
-        {"_id": ObjectId(user_id)},
-        {"$push": {"refill_reminders": reminder.model_dump(by_alias=True)}}
-    )
\ No newline at end of file
+    if not changes:
+        return 0
+    now = datetime.now()
+    operations = [
+        UpdateOne({"_id": ObjectId(str(reminder_id)), "user_id": user_id}, {"$set": {**fields, "updated_at": now}})
+        for reminder_id, fields in changes.items()
+    ]
+    try:
+        result = await db[COLLECTION].bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        # A concurrent rename took the medicine name after check_refill_names.
+        duplicate = next((error for error in e.details.get("writeErrors", []) if error.get("code") == DUPLICATE_KEY), None)
+        if duplicate is None:
+            raise
+        medicine_name = (duplicate.get("keyValue") or {}).get("medicine_name")
+        existing = await db[COLLECTION].find_one(
+            {"user_id": user_id, "type": "refill", "medicine_name": medicine_name}, {"_id": 1}
+        )
+        raise DuplicateRefillError(medicine_name, existing["_id"] if existing else None) from e
+    return result.modified_count
+
+
+async def check_refill_names(db: AsyncIOMotorDatabase, user_id: str, renames: Dict[str, str]):
+    """
+    Raises DuplicateRefillError when renaming refill reminders ({reminder_id: medicine_name})
+    would give two of the user's refills the same medicine, before anything is written.
+    """
+    claimed = {}
+    for reminder_id, medicine_name in renames.items():
+        if medicine_name in claimed:
+            raise DuplicateRefillError(medicine_name, claimed[medicine_name])
+        claimed[medicine_name] = reminder_id
+    if not renames:
+        return
+
+    existing = await db[COLLECTION].find_one(
+        {
+            "user_id": user_id,
+            "type": "refill",
+            "medicine_name": {"$in": list(claimed)},
+            "_id": {"$nin": [ObjectId(str(i)) for i in renames]},
+        },
+        {"medicine_name": 1},
+    )
+    if existing:
+        raise DuplicateRefillError(existing["medicine_name"], existing["_id"])
+
+
+async def delete_reminders(db: AsyncIOMotorDatabase, user_id: str, ids: List[ObjectId]) -> int:
+    if not ids:
+        return 0
+    result = await db[COLLECTION].bulk_write(
+        [DeleteOne({"_id": ObjectId(str(i)), "user_id": user_id}) for i in ids], ordered=False
+    )
+    return result.deleted_count
@@ -1,13 +1,125 @@
+import zlib
+import zstandard
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from bson import ObjectId, Binary
+from pymongo import ASCENDING, DESCENDING
+from typing import AsyncIterator, List, Optional
 from app.models.report import ReportCreate, ReportInDB
+from app.core.serialization import trusted
+from app.crud.crud_user import bump_reports_version
 
-async def create_report(db: AsyncIOMotorDatabase, report_in: ReportCreate) -> ReportInDB:
+# --- Raw Report Text Storage ---
+# The full extracted text is large and almost never displayed, so it is kept
+# out of the hot 'reports' collection: compressed into 'report_texts' under
+# the report's _id and loaded only by the views that need it. New texts are
+# zstd; blobs written as zlib by earlier deployments are still read.
+
+TEXT_COLLECTION = "report_texts"
+ZSTD_LEVEL = 10
+
+# Reports saved before the split still carry raw_text inline.
+REPORT_LIST_PROJECTION = {"raw_text": 0}
+COMPARE_PROJECTION = {"filename": 1, "upload_date": 1, "structured_entities": 1}
+EXPORT_BATCH_SIZE = 100
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase):
+    """History listing by date, and per-indicator trend lookups by canonical code."""
+    await db["reports"].create_index([("user_id", ASCENDING), ("upload_date", DESCENDING)])
+    await db["reports"].create_index([("user_id", ASCENDING), ("structured_entities.Code", ASCENDING)])
+
+
+def compress_text(text: str) -> dict:
+    data = text.encode("utf-8")
+    return {"encoding": "zstd", "data": Binary(zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data))}
+
+
+def decompress_text(doc: dict) -> str:
+    if doc["encoding"] == "zstd":
+        return zstandard.ZstdDecompressor().decompress(doc["data"]).decode("utf-8")
+    return zlib.decompress(doc["data"]).decode("utf-8")
+
+
+async def save_raw_text(db: AsyncIOMotorDatabase, report_id: ObjectId, text: str) -> ObjectId:
+    """Stores the compressed text under the report's _id. Safe to repeat (upsert)."""
+    await db[TEXT_COLLECTION].update_one(
+        {"_id": report_id},
+        {"$set": {**compress_text(text), "chars": len(text)}},
+        upsert=True,
+    )
+    return report_id
+
+
+async def get_raw_text(db: AsyncIOMotorDatabase, report: dict) -> Optional[str]:
+    """Lazy loader for a report's full text; falls back to the legacy inline field."""
+    if report.get("raw_text_ref"):
+        doc = await db[TEXT_COLLECTION].find_one({"_id": ObjectId(str(report["raw_text_ref"]))})
+        return decompress_text(doc) if doc else None
+    return report.get("raw_text")
+
+
+async def create_report(db: AsyncIOMotorDatabase, report_in: ReportCreate, raw_text: Optional[str] = None) -> ReportInDB:
     """
     Saves a processed report to the 'reports' collection.
     """
     report_data = report_in.model_dump(by_alias=True, exclude=["id"])
+    report_data["_id"] = ObjectId()
+    if raw_text is not None:
+        report_data["raw_text_ref"] = await save_raw_text(db, report_data["_id"], raw_text)
     
     result = await db["reports"].insert_one(report_data)
+    await bump_reports_version(db, [report_data["user_id"]])
     
-    created_report = await db["reports"].find_one({"_id": result.inserted_id})
-    return ReportInDB(**created_report)
\ No newline at end of file
+    created_report = await db["reports"].find_one({"_id": result.inserted_id}, REPORT_LIST_PROJECTION)
+    return trusted(ReportInDB, created_report)
+
+
+async def get_reports_for_user(db: AsyncIOMotorDatabase, user_id: str) -> List[ReportInDB]:
+    cursor = db["reports"].find({"user_id": user_id}, REPORT_LIST_PROJECTION).sort("upload_date", -1)
+    return [trusted(ReportInDB, doc) async for doc in cursor]
+
+
+async def get_latest_report(db: AsyncIOMotorDatabase, user_id: str) -> Optional[dict]:
+    """Newest report's results only (for chat context); no summary or text."""
+    return await db["reports"].find_one(
+        {"user_id": user_id},
+        {"filename": 1, "upload_date": 1, "structured_entities": 1},
+        sort=[("upload_date", -1)],
+    )
+
+
+async def get_reports_for_comparison(
+    db: AsyncIOMotorDatabase, user_id: str, report_ids: Optional[List[str]] = None
+) -> List[dict]:
+    """
+    The given reports (in the given order), or the user's two newest, oldest
+    first. Only the fields a comparison needs are loaded.
+    """
+    if report_ids:
+        cursor = db["reports"].find(
+            {"_id": {"$in": [ObjectId(i) for i in report_ids]}, "user_id": user_id}, COMPARE_PROJECTION
+        )
+        found = {str(doc["_id"]): doc async for doc in cursor}
+        return [found[i] for i in report_ids if i in found]
+
+    cursor = db["reports"].find({"user_id": user_id}, COMPARE_PROJECTION).sort("upload_date", -1).limit(2)
+    return list(reversed([doc async for doc in cursor]))
+
+
+async def get_indicator_series(db: AsyncIOMotorDatabase, user_id: str, code: str) -> List[dict]:
+    """
+    One indicator across the user's reports, oldest first; only the matching
+    entity is loaded. Reports saved without codes need migrate_indicator_codes.py.
+    """
+    cursor = db["reports"].find(
+        {"user_id": user_id, "structured_entities.Code": code},
+        {"upload_date": 1, "filename": 1, "structured_entities.$": 1},
+    ).sort("upload_date", ASCENDING)
+    return [doc async for doc in cursor]
+
+
+async def iter_reports_for_user(db: AsyncIOMotorDatabase, user_id: str) -> AsyncIterator[dict]:
+    """Streams the user's reports oldest first, one cursor batch in memory at a time."""
+    cursor = db["reports"].find({"user_id": user_id}, REPORT_LIST_PROJECTION).sort("upload_date", ASCENDING)
+    async for doc in cursor.batch_size(EXPORT_BATCH_SIZE):
+        yield doc
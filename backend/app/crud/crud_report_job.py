@@ -0,0 +1,80 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING
+from bson import ObjectId
+from datetime import datetime
+from typing import Optional
+
+from app.models.report import ReportJobInDB, ReportCreate
+from app.models.user import to_document
+from app.crud.crud_report import save_raw_text
+from app.crud.crud_user import bump_reports_version
+
+COLLECTION = "report_jobs"
+
+# Pipeline stages, in order. A stage is done once its name is in `completed_stages`.
+STAGE_EXTRACT = "extract"
+STAGE_VITALS = "vitals"
+STAGE_SUMMARY = "summary"
+STAGE_PERSIST = "persist"
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase):
+    """Status polling looks jobs up by their Celery task ID."""
+    await db[COLLECTION].create_index([("task_id", ASCENDING)], sparse=True)
+
+
+async def create_job(db: AsyncIOMotorDatabase, job: ReportJobInDB) -> ReportJobInDB:
+    await db[COLLECTION].insert_one(to_document(job))
+    return job
+
+
+async def get_job(db: AsyncIOMotorDatabase, job_id: str) -> Optional[ReportJobInDB]:
+    doc = await db[COLLECTION].find_one({"_id": ObjectId(job_id)})
+    return ReportJobInDB(**doc) if doc else None
+
+
+async def get_job_by_task_id(db: AsyncIOMotorDatabase, user_id: str, task_id: str) -> Optional[ReportJobInDB]:
+    doc = await db[COLLECTION].find_one({"task_id": task_id, "user_id": user_id}, {"extraction": 0})
+    return ReportJobInDB(**doc) if doc else None
+
+
+async def set_task_id(db: AsyncIOMotorDatabase, job_id: str, task_id: str):
+    await db[COLLECTION].update_one({"_id": ObjectId(job_id)}, {"$set": {"task_id": task_id}})
+
+
+async def save_stage(
+    db: AsyncIOMotorDatabase, job_id: str, stage: str, outputs: dict, status: str = "running", drop: tuple = ()
+):
+    """Stores a stage's outputs and marks it complete in one update. `drop` unsets checkpoints no longer needed."""
+    update = {
+        "$set": {**outputs, "status": status, "error": None, "updated_at": datetime.now()},
+        "$addToSet": {"completed_stages": stage},
+    }
+    if drop:
+        update["$unset"] = {field: "" for field in drop}
+    await db[COLLECTION].update_one({"_id": ObjectId(job_id)}, update)
+
+
+async def set_status(db: AsyncIOMotorDatabase, job_id: str, status: str, error: Optional[str] = None, count_attempt: bool = False):
+    update = {"$set": {"status": status, "error": error, "updated_at": datetime.now()}}
+    if count_attempt:
+        update["$inc"] = {"attempts": 1}
+    await db[COLLECTION].update_one({"_id": ObjectId(job_id)}, update)
+
+
+async def persist_report(db: AsyncIOMotorDatabase, job_id: str, report_in: ReportCreate, raw_text: str) -> str:
+    """
+    Saves the finished report under the job's _id, with its text compressed
+    into 'report_texts'. Both writes are upserts, so a retried persist stage
+    is a no-op instead of a duplicate report.
+    """
+    report_id = ObjectId(job_id)
+    report_in.raw_text_ref = await save_raw_text(db, report_id, raw_text)
+    result = await db["reports"].update_one(
+        {"_id": report_id},
+        {"$setOnInsert": report_in.model_dump(by_alias=True, exclude=["id"])},
+        upsert=True,
+    )
+    if result.upserted_id is not None:
+        await bump_reports_version(db, [str(report_in.user_id)])
+    return job_id
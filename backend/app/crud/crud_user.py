@@ -1,15 +1,21 @@
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
-from typing import Optional
+from datetime import datetime
+from typing import Iterable, Optional
 
 from app.models.user import UserCreate, UserInDB
 from app.core.security import get_password_hash # <-- Import the hasher function
+from app.core.serialization import trusted
+
+# Reminders now live in their own collection; older user documents may still
+# carry the embedded arrays, so keep them off the wire on every user load.
+USER_PROJECTION = {"daily_reminders": 0, "refill_reminders": 0}
 
 async def get_user_by_phone_number(db: AsyncIOMotorDatabase, phone_number: str) -> Optional[UserInDB]:
     """Get a user by their phone number."""
-    user = await db["users"].find_one({"phone_number": phone_number})
+    user = await db["users"].find_one({"phone_number": phone_number}, USER_PROJECTION)
     if user:
-        return UserInDB(**user)
+        return trusted(UserInDB, user)
     return None
 
 async def create_user(db: AsyncIOMotorDatabase, *, user_in: UserCreate) -> UserInDB:
@@ -22,14 +28,22 @@ async def create_user(db: AsyncIOMotorDatabase, *, user_in: UserCreate) -> UserI
     del user_data["password"]
     
     result = await db["users"].insert_one(user_data)
-    created_user = await db["users"].find_one({"_id": result.inserted_id})
-    return UserInDB(**created_user)
+    created_user = await db["users"].find_one({"_id": result.inserted_id}, USER_PROJECTION)
+    return trusted(UserInDB, created_user)
 
 async def get_user_by_id(db: AsyncIOMotorDatabase, user_id: str) -> Optional[UserInDB]:
     """Get a single user by their ID."""
     if not ObjectId.is_valid(user_id):
         return None
-    user = await db["users"].find_one({"_id": ObjectId(user_id)})
+    user = await db["users"].find_one({"_id": ObjectId(user_id)}, USER_PROJECTION)
     if user:
-        return UserInDB(**user)
-    return None
\ No newline at end of file
+        return trusted(UserInDB, user)
+    return None
+
+async def bump_reports_version(db: AsyncIOMotorDatabase, user_ids: Iterable[str]):
+    """Marks these users' report history as changed, so its ETag no longer matches."""
+    ids = [ObjectId(str(i)) for i in set(user_ids) if ObjectId.is_valid(str(i))]
+    if ids:
+        await db["users"].update_many(
+            {"_id": {"$in": ids}}, {"$inc": {"reports_version": 1}, "$set": {"reports_updated_at": datetime.now()}}
+        )
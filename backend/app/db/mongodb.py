@@ -1,5 +1,6 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.core.config import settings
+from app.core.metrics import mongo_client_kwargs
 import logging
 
 class MongoDB:
@@ -10,7 +11,7 @@ db = MongoDB()
 async def connect_to_mongo():
     """Connects to MongoDB on application startup."""
     logging.info("Connecting to MongoDB...")
-    db.client = AsyncIOMotorClient(settings.MONGO_URI)
+    db.client = AsyncIOMotorClient(settings.MONGO_URI, **mongo_client_kwargs())
     logging.info("Successfully connected to MongoDB.")
 
 async def close_mongo_connection():
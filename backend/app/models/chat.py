@@ -0,0 +1,34 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from datetime import datetime
+from .user import PyObjectId
+
+class ChatRequest(BaseModel):
+    message: str = Field(..., min_length=1)
+    session_id: Optional[PyObjectId] = None  # Omit to start a new conversation
+
+class ChatMessage(BaseModel):
+    role: Literal["user", "model"]
+    text: str
+    created_at: datetime = Field(default_factory=datetime.now)
+
+# --- DB Model ('chat_sessions' collection) ---
+
+class ChatSessionInDB(BaseModel):
+    """
+    One conversation. `messages` holds only the recent turns; older turns are
+    folded into `summary` by compaction, so the document and the prompt stay bounded.
+    """
+    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    user_id: str
+    title: str
+    summary: str = ""
+    messages: List[ChatMessage] = []
+    compacted_messages: int = 0
+    created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+    class Config:
+        json_encoders = {PyObjectId: str}
+        arbitrary_types_allowed = True
+        populate_by_name = True
@@ -0,0 +1,75 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional
+from datetime import datetime
+from .user import PyObjectId
+
+Timing = Literal["morning", "afternoon", "evening"]
+
+# --- Create Models (request bodies) ---
+
+class DailyReminderCreate(BaseModel):
+    medicine_name: str
+    timings: List[Timing]
+
+class RefillReminderCreate(BaseModel):
+    medicine_name: str
+    initial_quantity: int = Field(..., gt=0)
+    frequency_per_day: int = Field(..., gt=0)
+
+class ReminderBulkCreate(BaseModel):
+    daily: List[DailyReminderCreate] = []
+    refill: List[RefillReminderCreate] = []
+
+class ReminderUpdate(BaseModel):
+    id: PyObjectId
+    medicine_name: Optional[str] = None
+    timings: Optional[List[Timing]] = None
+    initial_quantity: Optional[int] = Field(None, gt=0)
+    frequency_per_day: Optional[int] = Field(None, gt=0)
+    is_active: Optional[bool] = None
+
+class ReminderBulkUpdate(BaseModel):
+    updates: List[ReminderUpdate] = Field(..., min_length=1)
+
+    @model_validator(mode="after")
+    def unique_ids(self):
+        ids = [str(update.id) for update in self.updates]
+        if len(ids) != len(set(ids)):
+            raise ValueError("Each reminder may only appear once per bulk update.")
+        return self
+
+class ReminderIds(BaseModel):
+    ids: List[PyObjectId] = Field(..., min_length=1)
+
+# --- DB Model ('reminders' collection) ---
+
+class ReminderInDB(BaseModel):
+    """
+    One document per reminder in the 'reminders' collection.
+    The user's name and phone number are copied in so the scheduler can fan
+    out without loading every user document.
+    """
+    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    user_id: str
+    user_name: str
+    phone_number: str
+    type: Literal["daily", "refill"]
+    medicine_name: str
+    is_active: bool = True
+    created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+    # Daily reminders
+    timings: List[Timing] = []
+
+    # Refill reminders
+    initial_quantity: Optional[int] = None
+    frequency_per_day: Optional[int] = None
+    start_date: Optional[datetime] = None
+    refill_date: Optional[datetime] = None
+    refill_sent_at: Optional[datetime] = None
+
+    class Config:
+        json_encoders = {PyObjectId: str}
+        arbitrary_types_allowed = True
+        populate_by_name = True
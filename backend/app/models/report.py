@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Any
+from typing import List, Optional, Any, Dict, Literal
 from datetime import datetime
 from .user import PyObjectId
 
@@ -9,14 +9,89 @@ class ReportBase(BaseModel):
 
 class ReportCreate(ReportBase):
     user_id: PyObjectId
-    raw_text: str 
     simple_summary: str 
     structured_entities: List[Any] 
     file_storage_path: Optional[str] = None
+    # The extracted text lives compressed in 'report_texts' (see crud_report), keyed by this ID.
+    raw_text_ref: Optional[PyObjectId] = None
 
 class ReportInDB(ReportCreate):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
 
     class Config:
         json_encoders = {PyObjectId: str}
-        arbitrary_types_allowed = True
\ No newline at end of file
+        arbitrary_types_allowed = True
+
+
+# --- Pipeline Job Model ('report_jobs' collection) ---
+
+class ReportJobInDB(BaseModel):
+    """
+    Checkpoints for one upload's trip through the pipeline. Each stage writes
+    its output here before the next one starts, so a retry resumes from the
+    last completed stage. The saved report reuses this document's _id.
+    """
+    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    user_id: str
+    filename: str
+    file_path: str
+    content_type: str = "application/pdf"  # PDFs and photos take different extraction paths
+    gcs_path: Optional[str] = None
+    status: Literal["queued", "running", "retrying", "completed", "failed"] = "queued"
+    task_id: Optional[str] = None  # Celery ID of the latest dispatch; /reports/status/{task_id} looks jobs up by it
+    completed_stages: List[str] = []
+    attempts: int = 0
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+    # Stage outputs
+    extraction: Optional[Dict[str, Any]] = None
+    vitals: Optional[List[Dict[str, Any]]] = None
+    summary: Optional[str] = None
+    token_usage: Dict[str, int] = {}
+
+    class Config:
+        json_encoders = {PyObjectId: str}
+        arbitrary_types_allowed = True
+        populate_by_name = True
+
+
+# --- Re-analysis Backfill Model ('backfill_runs' collection) ---
+
+class BackfillFilters(BaseModel):
+    """Which stored reports a backfill re-analyses. Empty filters select every report."""
+    user_id: Optional[str] = None
+    report_ids: List[str] = []
+    uploaded_after: Optional[datetime] = None
+    uploaded_before: Optional[datetime] = None
+    missing_codes: bool = False  # Only reports saved before indicator codes existed
+
+
+class BackfillRunInDB(BaseModel):
+    """
+    One re-analysis run. Reports are processed in _id order and `last_id` is
+    the checkpoint: a resumed run continues after it.
+    """
+    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    filters: BackfillFilters = BackfillFilters()
+    dry_run: bool = True
+    skip_summary: bool = False
+    batch_size: int = 20
+    concurrency: int = 4
+    status: Literal["queued", "running", "paused", "completed", "failed"] = "queued"
+    last_id: Optional[PyObjectId] = None
+    processed: int = 0
+    changed: int = 0
+    failed: int = 0
+    failed_ids: List[str] = []
+    samples: List[Dict[str, Any]] = []  # A few diffs, to review a dry run before doing it for real
+    token_usage: Dict[str, int] = {}
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+    class Config:
+        json_encoders = {PyObjectId: str}
+        arbitrary_types_allowed = True
+        populate_by_name = True
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, GetCoreSchemaHandler
 from pydantic_core import core_schema
-from typing import Optional, List, Literal, Any
+from typing import Optional, Any
 from datetime import datetime
 from bson import ObjectId
 
@@ -25,6 +25,14 @@ class PyObjectId(ObjectId):
             serialization=core_schema.plain_serializer_function_ser_schema(str),
         )
 
+def to_document(model: BaseModel) -> dict:
+    """
+    model_dump for inserting a model as a new document. PyObjectId fields dump
+    as strings (user_id is stored and queried as one), but `_id` has to stay an
+    ObjectId for the `{"_id": ObjectId(...)}` lookups to match it.
+    """
+    return {**model.model_dump(by_alias=True), "_id": model.id}
+
 # --- Token Models ---
 class Token(BaseModel):
     access_token: str
@@ -33,22 +41,6 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     phone_number: Optional[str] = None
 
-class DailyReminder(BaseModel):
-    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
-    medicine_name: str
-    timings: List[Literal["morning", "afternoon", "evening"]]
-    is_active: bool = True
-
-class RefillReminder(BaseModel):
-    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
-    medicine_name: str
-    initial_quantity: int
-    frequency_per_day: int
-    start_date: datetime = Field(default_factory=datetime.now)
-    refill_date: datetime
-    celery_task_id: str
-    is_active: bool = True
-
 class UserBase(BaseModel):
     name: str
     phone_number: str = Field(..., pattern=r"^\+[1-9]\d{1,14}$")
@@ -62,8 +54,10 @@ class UserInDB(UserBase):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
     hashed_password: str
     created_at: datetime = Field(default_factory=datetime.now)
-    daily_reminders: List[DailyReminder] = []
-    refill_reminders: List[RefillReminder] = []
+    # Bumped whenever one of the user's reports is written; the ETag stamp for
+    # their report history. Not part of any response body.
+    reports_version: int = Field(0, exclude=True)
+    reports_updated_at: Optional[datetime] = Field(None, exclude=True)
 
     class Config:
         json_encoders = {ObjectId: str}
@@ -0,0 +1,198 @@
+import re
+import time
+import zlib
+import random
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.metrics import CHAT_CACHE_LOOKUPS
+
+# --- Near-Duplicate Answer Cache for Chat ---
+# "what is hba1c" and "What does HbA1c mean?" should cost one Gemini call,
+# not two. Messages are normalized (case, punctuation, question filler words),
+# shingled into character 4-grams and MinHashed. LSH banding finds candidate
+# questions in O(bands) dict lookups, and a candidate is a hit when its exact
+# Jaccard similarity reaches CHAT_CACHE_THRESHOLD and it asks about the same
+# things: short medical questions a few characters apart are often different
+# questions ("range of TSH" / "range of T3", "with" / "without metformin"), so
+# the content words must agree, allowing only spelling variants, and words
+# with digits or negations must match exactly.
+# In-process and pure Python: no external service and no numpy in the API.
+
+NUM_PERM = 64
+BANDS = 16  # 16 bands x 4 rows: ~99% recall at Jaccard 0.7, ~5% at 0.3
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 4
+MERSENNE_PRIME = (1 << 61) - 1
+
+_rng = random.Random(1729)
+PERMUTATIONS = [(_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+WORD = re.compile(r"[a-z0-9]+")
+
+# Question phrasing that does not change what is being asked.
+FILLER_WORDS = {
+    "what", "whats", "is", "are", "was", "does", "do", "did", "mean", "means", "meaning", "the", "a", "an",
+    "of", "about", "tell", "explain", "please", "can", "could", "you", "pls", "plz", "define", "definition",
+    "to", "in", "for", "and", "or", "it", "this", "that", "u", "hi", "hello", "hey",
+}
+
+# Flip the meaning of a question without changing much of its text.
+NEGATION_WORDS = {
+    "no", "not", "non", "never", "without", "dont", "doesnt", "didnt", "cant", "cannot", "shouldnt",
+    "wont", "isnt", "arent", "avoid", "stop", "except",
+}
+SPELLING_VARIANT_MIN_CHARS = 5  # Shorter words (ldl / hdl, tsh) one letter apart are different words
+
+# Answers to questions about the user's own situation are personal and never shared.
+PERSONAL_WORDS = {"i", "im", "i'm", "me", "my", "mine", "myself", "we", "our", "us"}
+
+
+def normalize(message: str) -> str:
+    words = WORD.findall(message.lower().replace("'", ""))
+    kept = [w for w in words if w not in FILLER_WORDS]
+    return " ".join(kept or words)
+
+
+def is_personal(message: str) -> bool:
+    return any(word in PERSONAL_WORDS for word in re.findall(r"[a-z']+", message.lower()))
+
+
+def shingles(normalized: str) -> FrozenSet[int]:
+    text = f" {normalized} "
+    if len(text) <= SHINGLE_SIZE:
+        return frozenset({zlib.crc32(text.encode("utf-8"))})
+    return frozenset(zlib.crc32(text[i:i + SHINGLE_SIZE].encode("utf-8")) for i in range(len(text) - SHINGLE_SIZE + 1))
+
+
+def minhash_bands(shingle_set: FrozenSet[int]) -> List[Tuple[int, ...]]:
+    signature = [min((a * s + b) % MERSENNE_PRIME for s in shingle_set) for a, b in PERMUTATIONS]
+    return [tuple(signature[i * ROWS:(i + 1) * ROWS]) for i in range(BANDS)]
+
+
+def jaccard(a: FrozenSet[int], b: FrozenSet[int]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def _must_match_exactly(word: str) -> bool:
+    return word in NEGATION_WORDS or any(ch.isdigit() for ch in word)
+
+
+def _spelling_variant(a: str, b: str) -> bool:
+    """One insertion, deletion or substitution apart ("hemoglobin" / "haemoglobin")."""
+    if min(len(a), len(b)) < SPELLING_VARIANT_MIN_CHARS or abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i + (len(a) == len(b)):] == b[i + 1:]
+
+
+def same_question(a: str, b: str) -> bool:
+    """Whether two normalized questions have the same content words, up to spelling."""
+    a_words, b_words = set(a.split()), set(b.split())
+    if {w for w in a_words if _must_match_exactly(w)} != {w for w in b_words if _must_match_exactly(w)}:
+        return False
+    a_only, b_only = a_words - b_words, b_words - a_words
+    return len(a_only) == len(b_only) and all(any(_spelling_variant(w, v) for v in b_only) for w in a_only)
+
+
+class AnswerCache:
+    """
+    Bounded LRU of generic chat answers with a MinHash/LSH index over the
+    normalized questions. Entries expire after `ttl_seconds`.
+    """
+    def __init__(self, threshold: float, ttl_seconds: int, max_entries: int):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # normalized question -> {"shingles", "bands", "answer", "expires_at"}
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        for band_no, band in enumerate(entry["bands"]):
+            bucket = self._buckets.get((band_no, band))
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[(band_no, band)]
+
+    def _lookup(self, key: str, shingle_set: FrozenSet[int], bands: List[Tuple[int, ...]]) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        if key in self._entries:
+            candidates = {key}
+        else:
+            candidates = set()
+            for band_no, band in enumerate(bands):
+                candidates |= self._buckets.get((band_no, band), set())
+
+        best, best_score = None, self.threshold
+        for candidate in candidates:
+            entry = self._entries[candidate]
+            if entry["expires_at"] <= now:
+                self._remove(candidate)
+                continue
+            if candidate != key and not same_question(key, candidate):
+                continue
+            score = jaccard(shingle_set, entry["shingles"])
+            if score >= best_score:
+                best, best_score = candidate, score
+
+        if best is None:
+            return None
+        self._entries.move_to_end(best)
+        return self._entries[best]
+
+    def get(self, message: str) -> Optional[str]:
+        key = normalize(message)
+        shingle_set = shingles(key)
+        entry = self._lookup(key, shingle_set, minhash_bands(shingle_set))
+        if entry is None:
+            self.misses += 1
+            CHAT_CACHE_LOOKUPS.labels(result="miss").inc()
+            return None
+        self.hits += 1
+        CHAT_CACHE_LOOKUPS.labels(result="hit").inc()
+        return entry["answer"]
+
+    def put(self, message: str, answer: str):
+        key = normalize(message)
+        if key in self._entries:
+            self._remove(key)
+        shingle_set = shingles(key)
+        entry = {
+            "shingles": shingle_set,
+            "bands": minhash_bands(shingle_set),
+            "answer": answer,
+            "expires_at": time.monotonic() + self.ttl_seconds,
+        }
+        self._entries[key] = entry
+        for band_no, band in enumerate(entry["bands"]):
+            self._buckets.setdefault((band_no, band), set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "lookups": lookups,
+            "hits": self.hits,
+            "llm_calls_saved": self.hits,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "threshold": self.threshold,
+        }
+
+
+answer_cache = AnswerCache(
+    threshold=settings.CHAT_CACHE_THRESHOLD,
+    ttl_seconds=settings.CHAT_CACHE_TTL_SECONDS,
+    max_entries=settings.CHAT_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,170 @@
+import os
+import logging
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import timer, GEMINI_CALL_SECONDS, GEMINI_TOKENS
+from app.models.chat import ChatSessionInDB
+
+logger = logging.getLogger(__name__)
+
+# --- Conversation-Aware Chat ---
+# Each turn sends: the static system instruction (plus the user's latest
+# report results) as the model's system instruction, then a rolling summary
+# of older turns, then the last few turns verbatim. Compaction folds old
+# turns into the summary, so per-turn prompt size stays bounded however long
+# the conversation gets. The instruction is far below the minimum size of an
+# explicit Gemini context cache; the static part leads every prompt, so the
+# API's implicit prefix caching still applies (reported as cached_tokens).
+
+CHAT_MODEL_NAME = "gemini-2.5-flash"
+
+SYSTEM_INSTRUCTION = (
+    "You are Vitalyze AI, a helpful and empathetic medical assistant. "
+    "Answer the user's health questions in simple, easy-to-understand language. "
+    "If the question is serious, advise them to see a doctor. "
+    "Do not advise on taking any medication. If asked direct them to reach out to their doctor. "
+    "If the question is regarding information about any medicine, follow the below format. "
+    "Provide a structured summary for the medicine. Format the response in these 3 clear sections: "
+    "1. **What it is used for:** (Simple explanation) "
+    "2. **Common Side Effects:** (List format) "
+    "3. **Warning/Precautions:** (When to be careful) "
+    "Keep it concise and easy to read. Do not answer non-medical questions."
+)
+
+HISTORY_MAX_MESSAGES = 12  # Compact once a session holds more turns than this...
+HISTORY_MAX_CHARS = 8000  # ...or more text than this
+HISTORY_KEEP_MESSAGES = 6  # Turns kept verbatim after compaction
+SUMMARY_MAX_WORDS = 150
+CONTEXT_MAX_INDICATORS = 40
+
+
+@lru_cache(maxsize=1)
+def get_chat_backend() -> str:
+    """
+    Initializes the SDK once, on the first chat request.
+    Tries GCP Vertex AI first. If the JSON file is missing, falls back to AI Studio API Key.
+    The Google SDKs are imported here so the API process doesn't pay for them at startup.
+    """
+    # --- ATTEMPT 1: Enterprise Vertex AI (GCP) ---
+    json_path = getattr(settings, 'GOOGLE_APPLICATION_CREDENTIALS', None)
+
+    if json_path and os.path.exists(json_path):
+        import vertexai
+        from google.oauth2 import service_account
+
+        logger.info("Initializing Gemini via GCP Vertex AI...")
+        my_credentials = service_account.Credentials.from_service_account_file(json_path)
+        vertexai.init(
+            project=settings.GCP_PROJECT_ID,
+            location=settings.GCP_LOCATION,
+            credentials=my_credentials
+        )
+        return "vertex"
+
+    # --- ATTEMPT 2: Fallback to Google AI Studio (API Key) ---
+    api_key = getattr(settings, 'GEMINI_FREE_API_KEY', None)
+
+    if api_key:
+        import google.generativeai as genai
+
+        logger.info("GCP JSON missing. Falling back to Gemini via AI Studio API Key...")
+        genai.configure(api_key=api_key)
+        return "studio"
+
+    # --- FAILURE: Neither is configured ---
+    raise ValueError("Server Configuration Error: Missing both GCP Credentials and GEMINI_API_KEY.")
+
+
+def _build_model(system_instruction: Optional[str] = None):
+    if get_chat_backend() == "vertex":
+        from vertexai.generative_models import GenerativeModel as VertexModel
+        return VertexModel(CHAT_MODEL_NAME, system_instruction=system_instruction)
+    from google.generativeai import GenerativeModel as StudioModel
+    return StudioModel(CHAT_MODEL_NAME, system_instruction=system_instruction)
+
+
+# --- Prompt Assembly ---
+
+def vitals_context(report: Optional[dict]) -> str:
+    """The user's latest report results, as extra system context."""
+    if not report or not report.get("structured_entities"):
+        return ""
+    entries = [
+        f"{entry.get('Indicator')}: {entry.get('Value')}"
+        for entry in report["structured_entities"][:CONTEXT_MAX_INDICATORS]
+        if isinstance(entry, dict)
+    ]
+    if not entries:
+        return ""
+    uploaded = report.get("upload_date")
+    when = f" from {uploaded:%d %b %Y}" if isinstance(uploaded, datetime) else ""
+    return (
+        f"\n\nThe user's most recent lab report{when} ({report.get('filename', 'report')}) shows: "
+        + "; ".join(entries)
+        + ". Use it when relevant, but do not diagnose."
+    )
+
+
+def _content(role: str, text: str) -> dict:
+    return {"role": role, "parts": [{"text": text}]}
+
+
+def build_contents(session: ChatSessionInDB, message: str) -> List[dict]:
+    contents = []
+    if session.summary:
+        contents.append(_content("user", f"Summary of our conversation so far: {session.summary}"))
+        contents.append(_content("model", "Understood, I'll keep that in mind."))
+    contents += [_content(m.role, m.text) for m in session.messages]
+    contents.append(_content("user", message))
+    return contents
+
+
+def _usage(response) -> Dict[str, int]:
+    usage = getattr(response, "usage_metadata", None)
+    counts = {
+        "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+        "cached_tokens": getattr(usage, "cached_content_token_count", 0) or 0,
+        "output_tokens": getattr(usage, "candidates_token_count", 0) or 0,
+    }
+    for kind, count in (("prompt", counts["prompt_tokens"]), ("output", counts["output_tokens"])):
+        GEMINI_TOKENS.labels(purpose="chat", kind=kind).inc(count)
+    return counts
+
+
+def generate_reply(session: ChatSessionInDB, message: str, latest_report: Optional[dict] = None) -> Tuple[str, Dict[str, int]]:
+    """Blocking Gemini call for one turn. Returns (reply text, token usage)."""
+    model = _build_model(SYSTEM_INSTRUCTION + vitals_context(latest_report))
+    with timer(GEMINI_CALL_SECONDS, purpose="chat"):
+        response = model.generate_content(build_contents(session, message))
+    return response.text, _usage(response)
+
+
+# --- Compaction ---
+
+def needs_compaction(session: ChatSessionInDB) -> bool:
+    return (
+        len(session.messages) > HISTORY_MAX_MESSAGES
+        or sum(len(m.text) for m in session.messages) > HISTORY_MAX_CHARS
+    )
+
+
+def summarize_history(session: ChatSessionInDB) -> Tuple[str, int]:
+    """
+    Blocking. Folds every turn except the last HISTORY_KEEP_MESSAGES into the
+    rolling summary. Returns (new summary, number of messages it replaces).
+    """
+    dropped = session.messages[:-HISTORY_KEEP_MESSAGES]
+    transcript = "\n".join(f"{m.role.upper()}: {m.text}" for m in dropped)
+    prompt = (
+        f"Update the running summary of a conversation between a user and a medical assistant. "
+        f"Keep symptoms, conditions, medicines, test results and open questions the user mentioned. "
+        f"At most {SUMMARY_MAX_WORDS} words, third person, no advice.\n\n"
+        f"CURRENT SUMMARY:\n{session.summary or '(none)'}\n\n"
+        f"NEW TURNS:\n{transcript}"
+    )
+    with timer(GEMINI_CALL_SECONDS, purpose="chat_summary"):
+        response = _build_model().generate_content(prompt)
+    return response.text.strip(), len(dropped)
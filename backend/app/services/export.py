@@ -0,0 +1,216 @@
+import io
+import csv
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.serialization import dumps
+from app.crud import crud_report, crud_reminder
+from app.models.user import UserInDB
+
+# --- Health Record Export ---
+# Every format is an async generator over the Mongo cursors, so an export
+# holds one cursor batch in memory however long the history is. Each one
+# yields a header chunk before touching the database, so the first bytes go
+# out immediately.
+
+# format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+    "fhir": ("application/fhir+json", "json"),
+}
+
+CSV_COLUMNS = ["record_type", "id", "date", "source", "name", "code", "value", "number", "unit", "details"]
+INDICATOR_SYSTEM = "urn:vitalyze:indicator"  # Codes from services/indicators.py
+
+# Spreadsheets run text cells starting with these as formulas; such cells get a leading "'".
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+GZIP_LEVEL = 6
+GZIP_FLUSH_BYTES = 64 * 1024  # Push compressed bytes out at least this often
+
+
+def _entities(report: dict) -> List[Dict[str, Any]]:
+    return [e for e in report.get("structured_entities") or [] if isinstance(e, dict)]
+
+
+def _day(value: Any) -> str:
+    return f"{value:%Y-%m-%d}" if isinstance(value, datetime) else str(value)
+
+
+def _reminder_record(doc: dict) -> dict:
+    return {
+        "id": str(doc["_id"]),
+        "reminder_type": doc.get("type"),
+        "medicine_name": doc.get("medicine_name"),
+        "is_active": doc.get("is_active", True),
+        "timings": doc.get("timings", []),
+        "initial_quantity": doc.get("initial_quantity"),
+        "frequency_per_day": doc.get("frequency_per_day"),
+        "refill_date": doc.get("refill_date"),
+        "created_at": doc.get("created_at"),
+    }
+
+
+# --- NDJSON ---
+
+async def ndjson_export(db: AsyncIOMotorDatabase, user: UserInDB) -> AsyncIterator[bytes]:
+    """One JSON object per line: an export header, then each report (with its vitals), then each reminder."""
+    user_id = str(user.id)
+    yield dumps({"type": "export", "user_id": user_id, "name": user.name, "generated_at": datetime.now()}) + b"\n"
+    async for report in crud_report.iter_reports_for_user(db, user_id):
+        yield dumps({
+            "type": "report",
+            "id": str(report["_id"]),
+            "filename": report.get("filename"),
+            "upload_date": report.get("upload_date"),
+            "summary": report.get("simple_summary"),
+            "vitals": _entities(report),
+        }) + b"\n"
+    async for reminder in crud_reminder.iter_reminders_for_user(db, user_id):
+        yield dumps({"type": "reminder", **_reminder_record(reminder)}) + b"\n"
+
+
+# --- CSV ---
+
+def _csv_cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class _CsvRows:
+    """csv.writer into a reused buffer, one encoded row at a time."""
+    def __init__(self):
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+
+    def row(self, values: list) -> bytes:
+        self.writer.writerow([_csv_cell(v) for v in values])
+        data = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate(0)
+        return data.encode("utf-8")
+
+
+async def csv_export(db: AsyncIOMotorDatabase, user: UserInDB) -> AsyncIterator[bytes]:
+    """One row per report, per vital and per reminder, under a shared header (`record_type` tells them apart)."""
+    user_id = str(user.id)
+    rows = _CsvRows()
+    yield rows.row(CSV_COLUMNS)
+    async for report in crud_report.iter_reports_for_user(db, user_id):
+        report_id, date = str(report["_id"]), report.get("upload_date")
+        chunk = rows.row(["report", report_id, date, report.get("filename"), report.get("filename"),
+                          None, None, None, None, report.get("simple_summary")])
+        for entity in _entities(report):
+            chunk += rows.row(["vital", report_id, date, report.get("filename"), entity.get("Indicator"),
+                               entity.get("Code"), entity.get("Value"), entity.get("Number"), entity.get("Unit"), None])
+        yield chunk
+    async for doc in crud_reminder.iter_reminders_for_user(db, user_id):
+        reminder = _reminder_record(doc)
+        details = ", ".join(reminder["timings"]) if reminder["reminder_type"] == "daily" else (
+            f"{reminder['initial_quantity']} units, {reminder['frequency_per_day']}/day, refill {_day(reminder['refill_date'])}"
+        )
+        yield rows.row(["reminder", reminder["id"], reminder["created_at"], reminder["reminder_type"], reminder["medicine_name"],
+                        None, None, None, None, details])
+
+
+# --- FHIR-style Bundle ---
+
+def _observation(report_id: str, index: int, date: Optional[datetime], entity: dict) -> dict:
+    code = {"text": entity.get("Indicator")}
+    if entity.get("Code"):
+        code["coding"] = [{"system": INDICATOR_SYSTEM, "code": entity["Code"]}]
+    resource = {
+        "resourceType": "Observation",
+        "id": f"{report_id}-{index}",
+        "status": "final",
+        "code": code,
+        "effectiveDateTime": date,
+    }
+    if entity.get("Number") is not None:
+        resource["valueQuantity"] = {"value": entity["Number"], "unit": entity.get("Unit") or ""}
+    else:
+        resource["valueString"] = str(entity.get("Value"))
+    return resource
+
+
+def _medication_request(doc: dict) -> dict:
+    reminder = _reminder_record(doc)
+    if reminder["reminder_type"] == "daily":
+        dosage = {"text": f"Daily: {', '.join(reminder['timings'])}"}
+    else:
+        dosage = {"text": f"{reminder['frequency_per_day']} per day, refill due {_day(reminder['refill_date'])}"}
+    return {
+        "resourceType": "MedicationRequest",
+        "id": reminder["id"],
+        "status": "active" if reminder["is_active"] else "stopped",
+        "intent": "plan",
+        "medicationCodeableConcept": {"text": reminder["medicine_name"]},
+        "authoredOn": reminder["created_at"],
+        "dosageInstruction": [dosage],
+    }
+
+
+async def fhir_export(db: AsyncIOMotorDatabase, user: UserInDB) -> AsyncIterator[bytes]:
+    """
+    A FHIR-style `collection` Bundle: a DiagnosticReport per report with an
+    Observation per vital, and a MedicationRequest per reminder. Written as
+    one JSON document, one entry at a time.
+    """
+    user_id = str(user.id)
+    yield b'{"resourceType":"Bundle","type":"collection","timestamp":' + dumps(datetime.now()) + b',"entry":['
+    separator = b""
+
+    def entry(resource: dict) -> bytes:
+        nonlocal separator
+        chunk = separator + dumps({"fullUrl": f"urn:{resource['resourceType']}:{resource['id']}", "resource": resource})
+        separator = b","
+        return chunk
+
+    async for report in crud_report.iter_reports_for_user(db, user_id):
+        report_id, date = str(report["_id"]), report.get("upload_date")
+        observations = [_observation(report_id, i, date, e) for i, e in enumerate(_entities(report))]
+        chunk = entry({
+            "resourceType": "DiagnosticReport",
+            "id": report_id,
+            "status": "final",
+            "code": {"text": report.get("filename")},
+            "effectiveDateTime": date,
+            "conclusion": report.get("simple_summary"),
+            "result": [{"reference": f"urn:Observation:{o['id']}"} for o in observations],
+        })
+        yield chunk + b"".join(entry(o) for o in observations)
+
+    async for doc in crud_reminder.iter_reminders_for_user(db, user_id):
+        yield entry(_medication_request(doc))
+    yield b"]}"
+
+
+EXPORTERS = {"ndjson": ndjson_export, "csv": csv_export, "fhir": fhir_export}
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Gzips a byte stream incrementally. The first chunk, and then every
+    GZIP_FLUSH_BYTES of input, is sync-flushed so the client keeps receiving
+    data instead of waiting for the compressor's buffer to fill.
+    """
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    pending, first = 0, True
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        pending += len(chunk)
+        if first or pending >= GZIP_FLUSH_BYTES:
+            data += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending, first = 0, False
+        if data:
+            yield data
+    yield compressor.flush()
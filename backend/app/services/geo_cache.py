@@ -0,0 +1,132 @@
+import json
+import math
+import logging
+from typing import List, Optional, Tuple
+
+from redis import asyncio as aioredis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# --- Geohash Snapping ---
+# Nearby lookups are cached per geohash cell and radius bucket, so everyone
+# standing in the same neighbourhood shares one provider call.
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 6  # ~1.2 km x 0.6 km cells
+RADIUS_BUCKETS = [1000, 2000, 5000, 10000, 20000, 50000]  # Places API caps radius at 50 km
+CACHE_TTL_SECONDS = 24 * 60 * 60
+CACHE_KEY_PREFIX = "pharmacies"
+EARTH_RADIUS_M = 6371000
+
+
+def geohash_encode(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    geohash, bits, bit_count, even = [], 0, 0, True
+
+    while len(geohash) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+
+    return "".join(geohash)
+
+
+def geohash_bounds(geohash: str) -> Tuple[float, float, float, float]:
+    """Returns (min_lat, min_lon, max_lat, max_lon) of a geohash cell."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        bits = GEOHASH_ALPHABET.index(char)
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (bits >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return lat_range[0], lon_range[0], lat_range[1], lon_range[1]
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = math.radians(lat2 - lat1)
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def radius_bucket(radius: int) -> int:
+    for bucket in RADIUS_BUCKETS:
+        if radius <= bucket:
+            return bucket
+    return RADIUS_BUCKETS[-1]
+
+
+def snap_query(lat: float, lon: float, radius: int) -> Tuple[str, float, float, int]:
+    """
+    Snaps a lookup to its cache cell.
+    Returns (cache_key, center_lat, center_lon, fetch_radius). The fetch radius
+    covers the bucket radius from any point inside the cell.
+    """
+    cell = geohash_encode(lat, lon)
+    min_lat, min_lon, max_lat, max_lon = geohash_bounds(cell)
+    center_lat, center_lon = (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+    half_diagonal = haversine_m(center_lat, center_lon, max_lat, max_lon)
+
+    bucket = radius_bucket(radius)
+    fetch_radius = min(int(bucket + half_diagonal), RADIUS_BUCKETS[-1])
+    return f"{CACHE_KEY_PREFIX}:{cell}:{bucket}", center_lat, center_lon, fetch_radius
+
+
+def filter_by_distance(pharmacies: list, lat: float, lon: float, radius: int) -> list:
+    """Recomputes distance from the real user position and drops anything outside the radius."""
+    nearby = []
+    for pharmacy in pharmacies:
+        distance = haversine_m(lat, lon, pharmacy['geometry']['lat'], pharmacy['geometry']['lng'])
+        if distance <= radius:
+            nearby.append({**pharmacy, 'distance_meters': round(distance)})
+    nearby.sort(key=lambda p: p['distance_meters'])
+    return nearby
+
+
+class GeoCache:
+    def __init__(self):
+        try:
+            options = {"ssl_cert_reqs": None} if settings.REDIS_URL.startswith("rediss://") else {}
+            self.redis = aioredis.from_url(settings.REDIS_URL, socket_timeout=0.5, **options)
+        except Exception as e:
+            logger.error(f"Failed to init pharmacy geo cache: {e}")
+            self.redis = None
+
+    async def get(self, key: str) -> Optional[List[dict]]:
+        if not self.redis:
+            return None
+        try:
+            cached = await self.redis.get(key)
+            return json.loads(cached) if cached else None
+        except Exception as e:
+            logger.warning(f"Geo cache read failed for {key}: {e}")
+            return None
+
+    async def set(self, key: str, pharmacies: List[dict]) -> None:
+        if not self.redis:
+            return
+        try:
+            await self.redis.set(key, json.dumps(pharmacies), ex=CACHE_TTL_SECONDS)
+        except Exception as e:
+            logger.warning(f"Geo cache write failed for {key}: {e}")
+
+geo_cache = GeoCache()
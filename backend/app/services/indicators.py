@@ -0,0 +1,262 @@
+import re
+import logging
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.services.units import conversion, parse_value
+
+logger = logging.getLogger(__name__)
+
+# --- Canonical Lab Indicators ---
+# Gemini and the local parser keep the report's own wording ("Hb", "HGB",
+# "Haemoglobin", "Hemoglobin (Photometry)"). Each entity gets a canonical
+# `Code` once, at ingest, so reports can be compared and trended with dict
+# lookups. Names resolve by exact alias first, then by trigram candidates
+# confirmed with edit distance.
+
+# code -> (display name, aliases). Aliases are matched after _key() normalization.
+INDICATORS: Dict[str, Tuple[str, List[str]]] = {
+    # Complete blood count
+    "HGB": ("Hemoglobin", ["hb", "hgb", "haemoglobin", "hemoglobin", "hb conc"]),
+    "RBC": ("RBC Count", ["rbc", "rbc count", "red blood cell count", "red blood cells", "total rbc count", "erythrocyte count", "erythrocytes"]),
+    "WBC": ("WBC Count", ["wbc", "wbc count", "tlc", "total leucocyte count", "total leukocyte count", "white blood cell count", "total wbc count", "leucocyte count", "leukocytes"]),
+    "PLT": ("Platelet Count", ["plt", "platelets", "platelet count", "platelet", "thrombocyte count"]),
+    "HCT": ("Hematocrit", ["hct", "pcv", "packed cell volume", "hematocrit", "haematocrit"]),
+    "MCV": ("MCV", ["mcv", "mean corpuscular volume", "mean cell volume"]),
+    "MCH": ("MCH", ["mch", "mean corpuscular hemoglobin", "mean corpuscular haemoglobin", "mean cell hemoglobin"]),
+    "MCHC": ("MCHC", ["mchc", "mean corpuscular hemoglobin concentration", "mean corpuscular haemoglobin concentration"]),
+    "RDW": ("RDW", ["rdw", "rdw cv", "red cell distribution width"]),
+    "MPV": ("MPV", ["mpv", "mean platelet volume"]),
+    "NEUT": ("Neutrophils", ["neutrophils", "neutrophil", "polymorphs", "neut", "segmented neutrophils"]),
+    "LYMPH": ("Lymphocytes", ["lymphocytes", "lymphocyte", "lymph"]),
+    "MONO": ("Monocytes", ["monocytes", "monocyte", "mono"]),
+    "EOS": ("Eosinophils", ["eosinophils", "eosinophil", "eos"]),
+    "BASO": ("Basophils", ["basophils", "basophil", "baso"]),
+    "ESR": ("ESR", ["esr", "erythrocyte sedimentation rate", "sed rate"]),
+    # Diabetes
+    "GLU_F": ("Fasting Glucose", ["fasting glucose", "fasting blood sugar", "fbs", "glucose fasting", "fasting plasma glucose", "fpg", "blood sugar fasting"]),
+    "GLU_PP": ("Post-Prandial Glucose", ["post prandial glucose", "ppbs", "postprandial blood sugar", "post prandial blood sugar", "glucose pp", "blood sugar pp", "ppg"]),
+    "GLU_R": ("Random Glucose", ["random glucose", "random blood sugar", "rbs", "glucose random", "blood sugar random"]),
+    "HBA1C": ("HbA1c", ["hba1c", "glycated hemoglobin", "glycosylated hemoglobin", "glycated haemoglobin", "glycosylated haemoglobin", "a1c", "hb a1c"]),
+    "EAG": ("Estimated Average Glucose", ["estimated average glucose", "eag", "mean blood glucose"]),
+    # Lipid profile
+    "CHOL": ("Total Cholesterol", ["total cholesterol", "cholesterol", "cholesterol total", "s cholesterol"]),
+    "HDL": ("HDL Cholesterol", ["hdl", "hdl cholesterol", "hdl c", "high density lipoprotein", "cholesterol hdl", "hdl direct", "hdl cholesterol direct"]),
+    "LDL": ("LDL Cholesterol", ["ldl", "ldl cholesterol", "ldl c", "low density lipoprotein", "cholesterol ldl", "ldl direct", "ldl cholesterol direct"]),
+    "VLDL": ("VLDL Cholesterol", ["vldl", "vldl cholesterol", "very low density lipoprotein"]),
+    "TRIG": ("Triglycerides", ["triglycerides", "triglyceride", "tg", "tgl"]),
+    "CHOL_HDL": ("Cholesterol/HDL Ratio", ["cholesterol hdl ratio", "total cholesterol hdl ratio", "tc hdl ratio", "chol hdl ratio"]),
+    # Kidney
+    "CREA": ("Creatinine", ["creatinine", "s creatinine", "creat"]),
+    "UREA": ("Urea", ["urea", "blood urea", "s urea"]),
+    "BUN": ("Blood Urea Nitrogen", ["bun", "blood urea nitrogen", "urea nitrogen"]),
+    "URIC": ("Uric Acid", ["uric acid", "s uric acid", "urate"]),
+    "EGFR": ("eGFR", ["egfr", "estimated gfr", "gfr", "estimated glomerular filtration rate"]),
+    "NA": ("Sodium", ["sodium", "na", "s sodium"]),
+    "K": ("Potassium", ["potassium", "k", "s potassium"]),
+    "CL": ("Chloride", ["chloride", "cl", "s chloride"]),
+    "CA": ("Calcium", ["calcium", "ca", "s calcium", "total calcium"]),
+    "PHOS": ("Phosphorus", ["phosphorus", "phosphate", "inorganic phosphorus"]),
+    # Liver
+    "BILI_T": ("Total Bilirubin", ["total bilirubin", "bilirubin total", "t bilirubin", "bilirubin", "tbil"]),
+    "BILI_D": ("Direct Bilirubin", ["direct bilirubin", "bilirubin direct", "conjugated bilirubin", "d bilirubin", "dbil"]),
+    "BILI_I": ("Indirect Bilirubin", ["indirect bilirubin", "bilirubin indirect", "unconjugated bilirubin"]),
+    "ALT": ("ALT (SGPT)", ["alt", "sgpt", "alanine aminotransferase", "alanine transaminase", "alt sgpt", "sgpt alt"]),
+    "AST": ("AST (SGOT)", ["ast", "sgot", "aspartate aminotransferase", "aspartate transaminase", "ast sgot", "sgot ast"]),
+    "ALP": ("Alkaline Phosphatase", ["alp", "alkaline phosphatase", "alk phos"]),
+    "GGT": ("GGT", ["ggt", "gamma gt", "gamma glutamyl transferase", "ggtp"]),
+    "TP": ("Total Protein", ["total protein", "protein total", "total proteins"]),
+    "ALB": ("Albumin", ["albumin", "s albumin"]),
+    "GLOB": ("Globulin", ["globulin"]),
+    "AG_RATIO": ("A/G Ratio", ["a g ratio", "albumin globulin ratio", "ag ratio"]),
+    # Thyroid
+    "TSH": ("TSH", ["tsh", "thyroid stimulating hormone", "thyrotropin", "ultrasensitive tsh", "tsh ultrasensitive"]),
+    "T3": ("Total T3", ["t3", "total t3", "triiodothyronine", "t3 total"]),
+    "T4": ("Total T4", ["t4", "total t4", "thyroxine", "t4 total"]),
+    "FT3": ("Free T3", ["ft3", "free t3", "free triiodothyronine"]),
+    "FT4": ("Free T4", ["ft4", "free t4", "free thyroxine"]),
+    # Vitamins, iron, inflammation
+    "VITD": ("Vitamin D", ["vitamin d", "25 oh vitamin d", "25 hydroxy vitamin d", "vit d", "vitamin d3", "vitamin d total", "25 oh vit d"]),
+    "VITB12": ("Vitamin B12", ["vitamin b12", "vit b12", "b12", "cobalamin", "cyanocobalamin"]),
+    "FERRITIN": ("Ferritin", ["ferritin", "s ferritin"]),
+    "IRON": ("Iron", ["iron", "serum iron", "s iron"]),
+    "TIBC": ("TIBC", ["tibc", "total iron binding capacity"]),
+    "CRP": ("CRP", ["crp", "c reactive protein", "hs crp", "hscrp", "high sensitivity crp"]),
+}
+
+# Method, specimen and filler words that don't change which test it is.
+NOISE_WORDS = {"serum", "plasma", "blood", "whole", "level", "levels", "test", "value", "result", "method", "calculated"}
+# Words that do, and so are kept even from a parenthetical: "Bilirubin (Direct)".
+QUALIFIER_WORDS = {"direct", "indirect", "total", "free", "fasting", "random", "conjugated", "unconjugated"}
+PARENTHETICAL = re.compile(r"\([^)]*\)|\[[^\]]*\]")
+NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+FUZZY_MIN_LENGTH = 4  # Shorter keys ("hb", "k", "na") must match exactly
+FUZZY_MIN_DICE = 0.5  # Trigram overlap needed to be a candidate
+FUZZY_MIN_SIMILARITY = 0.8  # 1 - edit distance / length needed to accept it
+FUZZY_MAX_CANDIDATES = 8
+
+
+def _key(name: str) -> str:
+    """
+    'Haemoglobin (Photometry)' -> 'haemoglobin'; 'Bilirubin (Direct)' -> 'bilirubin direct';
+    'S. Creatinine' -> 's creatinine'.
+    """
+    name = name.lower()
+    qualifiers = [
+        word for match in PARENTHETICAL.findall(name) for word in NON_ALNUM.sub(" ", match).split()
+        if word in QUALIFIER_WORDS
+    ]
+    text = NON_ALNUM.sub(" ", PARENTHETICAL.sub(" ", name)).split() + qualifiers
+    words = [w for w in text if w not in NOISE_WORDS]
+    return " ".join(words or text)
+
+
+def _word_set_key(key: str) -> str:
+    """Word order doesn't change the test: 'calcium total' / 'total calcium'."""
+    return " ".join(sorted(key.split()))
+
+
+def _exact_words(key: str) -> Set[str]:
+    """Numbers and short abbreviations, which must match exactly even in a fuzzy match."""
+    return {word for word in key.split() if len(word) < FUZZY_MIN_LENGTH or any(ch.isdigit() for ch in word)}
+
+
+def _trigrams(key: str) -> Set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a: str, b: str) -> int:
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+class IndicatorIndex:
+    """
+    Exact alias map plus a trigram -> aliases index for near misses
+    ("Haemoglobine", "Tryglycerides"). Built once per process.
+    """
+    def __init__(self, indicators: Dict[str, Tuple[str, List[str]]]):
+        self.names = {code: name for code, (name, _) in indicators.items()}
+        self.exact: Dict[str, str] = {}
+        self.word_sets: Dict[str, str] = {}
+        self.trigrams: Dict[str, Set[str]] = {}
+        for code, (name, aliases) in indicators.items():
+            for alias in [name, *aliases]:
+                key = _key(alias)
+                if self.exact.setdefault(key, code) != code:
+                    logger.warning(f"Indicator alias '{alias}' maps to both {self.exact[key]} and {code}.")
+                if self.word_sets.setdefault(_word_set_key(key), code) != code:
+                    logger.warning(f"Indicator alias '{alias}' reordered maps to both {self.word_sets[_word_set_key(key)]} and {code}.")
+                for gram in _trigrams(key):
+                    self.trigrams.setdefault(gram, set()).add(key)
+
+    def lookup(self, name: str) -> Optional[str]:
+        key = _key(name)
+        if key in self.exact:
+            return self.exact[key]
+        if _word_set_key(key) in self.word_sets:
+            return self.word_sets[_word_set_key(key)]
+        if len(key) < FUZZY_MIN_LENGTH:
+            return None
+
+        grams = _trigrams(key)
+        shared: Dict[str, int] = {}
+        for gram in grams:
+            for alias in self.trigrams.get(gram, ()):
+                shared[alias] = shared.get(alias, 0) + 1
+
+        candidates = sorted(
+            ((2 * count / (len(grams) + len(_trigrams(alias))), alias) for alias, count in shared.items()),
+            reverse=True,
+        )[:FUZZY_MAX_CANDIDATES]
+
+        # "Vitamin B6" is one edit from "vitamin b12" and "hdl" from "ldl", but they are different tests.
+        exact_words = _exact_words(key)
+        best_code, best_similarity = None, FUZZY_MIN_SIMILARITY
+        for dice, alias in candidates:
+            if dice < FUZZY_MIN_DICE:
+                break
+            if _exact_words(alias) != exact_words:
+                continue
+            similarity = 1 - _edit_distance(key, alias) / max(len(key), len(alias))
+            if similarity >= best_similarity:
+                best_code, best_similarity = self.exact[alias], similarity
+        return best_code
+
+
+indicator_index = IndicatorIndex(INDICATORS)
+
+
+@lru_cache(maxsize=4096)
+def canonical_code(name: str) -> Optional[str]:
+    return indicator_index.lookup(name) if name else None
+
+
+def canonicalize_entities(entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Adds `Code` (or None when unknown) to each {"Indicator", "Value"} entity, in place."""
+    for entity in entities:
+        if isinstance(entity, dict):
+            entity["Code"] = canonical_code(str(entity.get("Indicator") or ""))
+    return entities
+
+
+# --- Report Comparison ---
+
+def _number_and_unit(entity: Dict[str, Any]) -> Tuple[Optional[float], str]:
+    # Parsed once at ingest; reports saved before that are parsed here.
+    if "Number" in entity:
+        return entity["Number"], entity.get("Unit") or ""
+    return parse_value(entity.get("Value"))
+
+
+def _by_code(entities: List[Any]) -> Dict[str, Dict[str, Any]]:
+    """Entities keyed by code. Reports saved before canonicalization are resolved on the fly."""
+    keyed = {}
+    for entity in entities or []:
+        if not isinstance(entity, dict):
+            continue
+        code = entity.get("Code") if "Code" in entity else canonical_code(str(entity.get("Indicator") or ""))
+        keyed.setdefault(code or f"?{_key(str(entity.get('Indicator') or ''))}", entity)
+    return keyed
+
+
+def compare_entities(previous: List[Any], current: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Diffs two reports' indicators by canonical code. Numeric changes are
+    computed in the current report's unit, when the previous value converts
+    to it (units.conversion).
+    """
+    before, after = _by_code(previous), _by_code(current)
+    rows = []
+    for code in list(after) + [c for c in before if c not in after]:
+        old, new = before.get(code), after.get(code)
+        row = {
+            "code": None if code.startswith("?") else code,
+            "indicator": indicator_index.names.get(code) or (new or old).get("Indicator"),
+            "previous": old.get("Value") if old else None,
+            "current": new.get("Value") if new else None,
+        }
+        if old is None:
+            row["change"] = "added"
+        elif new is None:
+            row["change"] = "removed"
+        else:
+            (old_number, old_unit), (new_number, new_unit) = _number_and_unit(old), _number_and_unit(new)
+            scale = conversion(row["code"], old_unit, new_unit) if None not in (old_number, new_number) else None
+            if scale is not None:
+                old_number = round(old_number * scale[0] + scale[1], 6)
+                row["delta"] = round(new_number - old_number, 4)
+                if old_number:
+                    row["percent_change"] = round((new_number - old_number) / abs(old_number) * 100, 1)
+                row["change"] = "up" if new_number > old_number else "down" if new_number < old_number else "same"
+            else:
+                row["change"] = "same" if str(old.get("Value")) == str(new.get("Value")) else "changed"
+        rows.append(row)
+    return rows
@@ -0,0 +1,125 @@
+import logging
+from bisect import bisect_right
+from statistics import median
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# --- Table-Aware Layout Extraction ---
+# Lab reports are tables (test | value | unit | reference range). Flattened
+# text loses the columns, so rows of cells are rebuilt from word positions:
+#   digital pages: PyMuPDF word boxes, plus find_tables() for ruled tables
+#   scanned pages: Tesseract word boxes, split on column rules found by OpenCV
+# A row is a list of cell strings; a page is a list of rows in reading order.
+# Worker-only: imports OpenCV.
+
+Word = Tuple[float, float, float, float, str]  # (x0, y0, x1, y1, text)
+Rule = Tuple[float, float, float]  # (x, top, bottom) of a vertical ruling line
+
+CELL_GAP_EM = 0.8  # A gap wider than this many line heights starts a new cell
+MIN_RULE_HEIGHT_SHARE = 1 / 40  # Vertical rules must be at least this share of the page height
+RULE_MERGE_PX = 10  # Rules closer than this are the same line (thick or double borders)
+
+
+def _split_cells(words: List[Word], rules: List[Rule]) -> List[str]:
+    """Splits one row (words sorted by x) into cells, on column rules when the row has them, else on wide gaps."""
+    center_y = (words[0][1] + words[0][3]) / 2
+    edges = [x for x, top, bottom in rules if top <= center_y <= bottom]
+
+    cells: List[List[str]] = []
+    if len(edges) >= 2:
+        previous_column = None
+        for x0, _, x1, _, text in words:
+            column = bisect_right(edges, (x0 + x1) / 2)
+            if column != previous_column:
+                cells.append([])
+                previous_column = column
+            cells[-1].append(text)
+    else:
+        max_gap = CELL_GAP_EM * median(w[3] - w[1] for w in words)
+        previous_x1 = None
+        for x0, _, x1, _, text in words:
+            if previous_x1 is None or x0 - previous_x1 > max_gap:
+                cells.append([])
+            cells[-1].append(text)
+            previous_x1 = x1
+
+    return [" ".join(cell) for cell in cells]
+
+
+def _group_rows(words: List[Word], rules: List[Rule] = ()) -> List[Tuple[float, List[str]]]:
+    """Clusters words whose vertical centers fall within half a line height. Returns (top, cells) per row."""
+    rows = []
+    for word in sorted(words, key=lambda w: ((w[1] + w[3]) / 2, w[0])):
+        center = (word[1] + word[3]) / 2
+        if rows and abs(center - rows[-1]["center"]) <= rows[-1]["height"] / 2:
+            rows[-1]["words"].append(word)
+        else:
+            rows.append({"center": center, "height": max(1.0, word[3] - word[1]), "words": [word]})
+
+    return [
+        (min(w[1] for w in row["words"]), _split_cells(sorted(row["words"]), list(rules)))
+        for row in rows
+    ]
+
+
+def group_words_into_rows(words: List[Word], rules: List[Rule] = ()) -> List[List[str]]:
+    return [cells for _, cells in _group_rows(words, rules)]
+
+
+def rows_from_pdf_page(page) -> List[List[str]]:
+    """
+    Rows for a page with a text layer. Ruled tables come from find_tables()
+    (PyMuPDF >= 1.23); everything else is rebuilt from get_text("words").
+    """
+    table_rows, table_boxes = [], []
+    if hasattr(page, "find_tables"):
+        try:
+            for table in page.find_tables().tables:
+                table_boxes.append(table.bbox)
+                for index, row in enumerate(table.extract()):
+                    cells = [" ".join((cell or "").split()) for cell in row]
+                    cells = [cell for cell in cells if cell]
+                    if cells:
+                        table_rows.append((table.bbox[1], index, cells))
+        except Exception as e:
+            logger.warning(f"find_tables failed on page {page.number + 1}: {e}")
+
+    def in_table(word) -> bool:
+        cx, cy = (word[0] + word[2]) / 2, (word[1] + word[3]) / 2
+        return any(x0 <= cx <= x1 and y0 <= cy <= y1 for x0, y0, x1, y1 in table_boxes)
+
+    words = [tuple(w[:5]) for w in page.get_text("words") if not in_table(w)]
+    free_rows = [(top, 0, cells) for top, cells in _group_rows(words)]
+
+    return [cells for _, _, cells in sorted(table_rows + free_rows, key=lambda r: (r[0], r[1]))]
+
+
+def detect_column_rules(binary_image: np.ndarray) -> List[Rule]:
+    """
+    Finds vertical ruling lines in a binarized page (dark ink on white) with a
+    morphological opening, so scanned grids split cells on their printed borders.
+    """
+    height = binary_image.shape[0]
+    inverted = cv2.bitwise_not(binary_image)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, max(10, int(height * MIN_RULE_HEIGHT_SHARE))))
+    vertical = cv2.morphologyEx(inverted, cv2.MORPH_OPEN, kernel)
+    contours, _ = cv2.findContours(vertical, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    rules: List[Rule] = []
+    for x, y, w, h in sorted(cv2.boundingRect(c) for c in contours):
+        center = x + w / 2
+        if rules and center - rules[-1][0] <= RULE_MERGE_PX:
+            _, top, bottom = rules[-1]
+            rules[-1] = (rules[-1][0], min(top, y), max(bottom, y + h))
+        else:
+            rules.append((center, y, y + h))
+    return rules
+
+
+def rows_from_ocr_words(words: List[Word], binary_image: np.ndarray) -> List[List[str]]:
+    """Rows for an OCR'd page; `words` must be in the pixel space of `binary_image`."""
+    return group_words_into_rows(words, detect_column_rules(binary_image))
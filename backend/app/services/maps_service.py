@@ -1,67 +1,200 @@
-import googlemaps
-from googlemaps.exceptions import ApiError
+import asyncio
 import logging
-import requests
+import time
+from typing import Optional
+
+import httpx
 from app.core.config import settings
+from app.core.metrics import MAPS_PROVIDER_SECONDS, MAPS_PROVIDER_WINS
+from app.db.mongodb import get_database
+from app.services.geo_cache import geo_cache, snap_query, filter_by_distance
+from app.services.osm_index import element_to_pharmacy, has_local_index, query_local_index
 
 logger = logging.getLogger(__name__)
 
+GOOGLE_PLACES_URL = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+
+# Per-provider timeouts (seconds). Google normally answers in well under a second.
+GOOGLE_TIMEOUT = 3.0
+OSM_TIMEOUT = 8.0
+# If Google hasn't answered by then, start OSM in parallel and take whichever wins.
+HEDGE_DELAY = 0.8
+
+
 class MapsService:
     def __init__(self):
-        # 1. Initialize Google Maps
-        if settings.GOOGLE_MAPS_API_KEY:
-            self.gmaps = googlemaps.Client(key=settings.GOOGLE_MAPS_API_KEY)
-        else:
+        # 1. Google Places config
+        self.google_api_key = settings.GOOGLE_MAPS_API_KEY or None
+        if not self.google_api_key:
             logger.warning("GOOGLE_MAPS_API_KEY not set. Will default to OSM fallback.")
-            self.gmaps = None
-            
+
         # 2. Initialize OpenStreetMap (OSM) Config from .env
         self.osm_api_key = getattr(settings, 'OSM_API_KEY', None)
         self.osm_api_url = getattr(settings, 'OSM_API_URL', "https://overpass-api.de/api/interpreter")
 
-    def get_nearby_pharmacies(self, lat: float, lon: float, radius: int = 5000) -> list:
+        # Whether an imported OSM extract is available; checked once on first use.
+        self._osm_index_ready: Optional[bool] = None
+
+        # Shared connection pool, created on first use inside the running event loop.
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                headers={'User-Agent': 'VitalyzeMedicalLocator/1.0 (contact@yourdomain.com)'},
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get_nearby_pharmacies(self, lat: float, lon: float, radius: int = 5000) -> list:
+        """
+        Returns pharmacies within `radius` meters, nearest first.
+        Results are cached per geohash cell and radius bucket; a cache hit only
+        recomputes distances from the user's exact position.
+        """
+        cache_key, center_lat, center_lon, fetch_radius = snap_query(lat, lon, radius)
+
+        pharmacies = await geo_cache.get(cache_key)
+        if pharmacies is None:
+            logger.info(f"Pharmacy cache miss for {cache_key}. Querying providers.")
+            pharmacies = await self._fetch_pharmacies(center_lat, center_lon, fetch_radius)
+            # Empty results usually mean both providers failed; don't pin that for a day.
+            if pharmacies:
+                await geo_cache.set(cache_key, pharmacies)
+
+        return filter_by_distance(pharmacies, lat, lon, radius)
+
+    async def _fetch_pharmacies(self, lat: float, lon: float, radius: int) -> list:
         """
-        Fetches nearby pharmacies using Google Places API.
-        Falls back to OpenStreetMap if Google API fails or is missing.
+        Hedged lookup: Google Places first, OpenStreetMap fired after HEDGE_DELAY
+        (or immediately if Google fails). The first provider with a good answer wins.
         """
-        pharmacies = []
-
-        # --- ATTEMPT 1: Google Maps ---
-        if self.gmaps:
-            try:
-                response = self.gmaps.places_nearby(
-                    location=(lat, lon),
-                    radius=radius,
-                    type='pharmacy'
-                )
-
-                for place in response.get('results', []):
-                    pharmacies.append({
-                        'name': place.get('name'),
-                        'vicinity': place.get('vicinity'), 
-                        'rating': place.get('rating'),     
-                        'user_ratings_total': place.get('user_ratings_total'),
-                        'geometry': {
-                            'lat': place['geometry']['location']['lat'],
-                            'lng': place['geometry']['location']['lng']
-                        },
-                        'place_id': place.get('place_id'),
-                        'source': 'google' # Helps frontend know where data came from
-                    })
-                
-                return pharmacies
-
-            except ApiError as e:
-                logger.error(f"Google Maps API Error: {e}. Initiating OSM fallback.")
-            except Exception as e:
-                logger.error(f"Unexpected error in Google Maps service: {e}. Initiating OSM fallback.")
-        else:
-            logger.warning("Google Maps client not available. Initiating OSM fallback.")
-
-        # --- ATTEMPT 2: OpenStreetMap Fallback ---
-        return self._get_osm_pharmacies(lat, lon, radius)
-
-    def _get_osm_pharmacies(self, lat: float, lon: float, radius: int) -> list:
+        if not self.google_api_key:
+            logger.warning("Google Maps key not available. Using OSM only.")
+            return await self._timed("osm", self._get_osm_pharmacies(lat, lon, radius), OSM_TIMEOUT) or []
+
+        google = asyncio.create_task(self._timed("google", self._get_google_pharmacies(lat, lon, radius), GOOGLE_TIMEOUT))
+        tasks = {google}
+
+        try:
+            done, tasks = await asyncio.wait(tasks, timeout=HEDGE_DELAY)
+            if done and google.result() is not None:
+                MAPS_PROVIDER_WINS.labels(provider="google").inc()
+                return google.result()
+
+            logger.info("Google Places slow or failed. Hedging with OSM.")
+            osm = asyncio.create_task(self._timed("osm", self._get_osm_pharmacies(lat, lon, radius), OSM_TIMEOUT))
+            tasks.add(osm)
+
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if result is not None:
+                        MAPS_PROVIDER_WINS.labels(provider="google" if task is google else "osm").inc()
+                        return result
+            return []
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _timed(self, provider: str, coro, timeout: float) -> Optional[list]:
+        """Runs one provider call with its own timeout and records its latency by outcome."""
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await asyncio.wait_for(coro, timeout=timeout)
+            outcome = "ok" if result is not None else "error"
+            return result
+        except asyncio.TimeoutError:
+            logger.error(f"{provider} pharmacy lookup timed out after {timeout}s.")
+            outcome = "timeout"
+            return None
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            MAPS_PROVIDER_SECONDS.labels(provider=provider, outcome=outcome).observe(time.perf_counter() - start)
+
+    async def _get_google_pharmacies(self, lat: float, lon: float, radius: int) -> Optional[list]:
+        """
+        Google Places Nearby Search over the shared HTTP pool.
+        Returns None on failure so the caller can fall back.
+
+        Results are ranked by distance, not prominence: Places returns at most
+        20, and within a wide radius those would be the best-known pharmacies
+        kilometres away. `radius` can't be combined with rankby=distance, so
+        the caller's distance filter applies it.
+        """
+        try:
+            response = await self.client.get(
+                GOOGLE_PLACES_URL,
+                params={
+                    'location': f"{lat},{lon}",
+                    'rankby': 'distance',
+                    'type': 'pharmacy',
+                    'key': self.google_api_key,
+                },
+            )
+            response.raise_for_status()
+            data = response.json()
+
+            if data.get('status') not in ('OK', 'ZERO_RESULTS'):
+                logger.error(f"Google Maps API Error: {data.get('status')} {data.get('error_message', '')}")
+                return None
+
+            pharmacies = []
+            for place in data.get('results', []):
+                pharmacies.append({
+                    'name': place.get('name'),
+                    'vicinity': place.get('vicinity'),
+                    'rating': place.get('rating'),
+                    'user_ratings_total': place.get('user_ratings_total'),
+                    'geometry': {
+                        'lat': place['geometry']['location']['lat'],
+                        'lng': place['geometry']['location']['lng']
+                    },
+                    'place_id': place.get('place_id'),
+                    'source': 'google' # Helps frontend know where data came from
+                })
+
+            return pharmacies
+
+        except httpx.HTTPError as e:
+            logger.error(f"Google Maps request failed: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Unexpected error in Google Maps service: {e}")
+            return None
+
+    async def _get_osm_pharmacies(self, lat: float, lon: float, radius: int) -> Optional[list]:
+        """
+        OpenStreetMap lookup. Served from the local 2dsphere index when the
+        location is inside an imported OSM extract, otherwise from the live
+        Overpass API.
+        """
+        try:
+            if self._osm_index_ready is None:
+                self._osm_index_ready = await has_local_index(get_database())
+                logger.info(f"Local OSM pharmacy index available: {self._osm_index_ready}")
+
+            if self._osm_index_ready:
+                pharmacies = await query_local_index(get_database(), lat, lon, radius)
+                if pharmacies is not None:
+                    return pharmacies
+                logger.info("Location is outside the local OSM index. Querying Overpass.")
+        except Exception as e:
+            logger.error(f"Local OSM index query failed: {e}. Falling back to Overpass.")
+
+        return await self._query_overpass(lat, lon, radius)
+
+    async def _query_overpass(self, lat: float, lon: float, radius: int) -> Optional[list]:
         """
         Fallback method using OpenStreetMap Overpass API.
         Formats the output to perfectly match the Google Places format.
@@ -78,70 +211,41 @@ class MapsService:
             );
             out center;
             """
-            
-            # --- THE FIX ---
-            # Overpass API strictly requires an explicit Accept header and a valid User-Agent.
-            headers = {
-                'User-Agent': 'VitalyzeMedicalLocator/1.0 (contact@yourdomain.com)',
-                'Accept': 'application/json'
-            }
-            
+
+            # Overpass API strictly requires an explicit Accept header and a valid User-Agent
+            # (the User-Agent is set on the shared client).
+            headers = {'Accept': 'application/json'}
+
             if self.osm_api_key:
                 headers['Authorization'] = f"Bearer {self.osm_api_key}"
 
-            response = requests.post(
-                self.osm_api_url, 
-                data={'data': overpass_query}, 
-                headers=headers, 
-                timeout=10
+            response = await self.client.post(
+                self.osm_api_url,
+                data={'data': overpass_query},
+                headers=headers,
             )
-            
+
             # This will raise the 4xx/5xx error if it still fails
             response.raise_for_status()
             data = response.json()
 
             pharmacies = []
             for element in data.get('elements', []):
-                tags = element.get('tags', {})
-                
-                # Extract coordinates
-                loc_lat = element.get('lat') or element.get('center', {}).get('lat')
-                loc_lon = element.get('lon') or element.get('center', {}).get('lon')
-                
-                if not loc_lat or not loc_lon:
-                    continue
-
-                # OSM stores addresses in separate tags. Stitch them together.
-                street = tags.get('addr:street', '')
-                housenumber = tags.get('addr:housenumber', '')
-                city = tags.get('addr:city', '')
-                
-                vicinity = f"{housenumber} {street}, {city}".strip(' ,')
-                if not vicinity:
-                    vicinity = "Address not available"
+                pharmacy = element_to_pharmacy(element)
+                if pharmacy:
+                    pharmacies.append(pharmacy)
 
-                pharmacies.append({
-                    'name': tags.get('name', 'Pharmacy'),
-                    'vicinity': vicinity,
-                    'rating': None,
-                    'user_ratings_total': None,
-                    'geometry': {
-                        'lat': loc_lat,
-                        'lng': loc_lon
-                    },
-                    'place_id': f"osm_{element.get('type')}_{element.get('id')}",
-                    'source': 'osm'
-                })
-            
             return pharmacies
 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPStatusError as e:
             # Enhanced error logging to print the exact rejection message from Overpass
-            error_details = e.response.text if e.response is not None else "No response body"
-            logger.error(f"OpenStreetMap API Error: {e} | Server Details: {error_details}")
-            return []
+            logger.error(f"OpenStreetMap API Error: {e} | Server Details: {e.response.text}")
+            return None
+        except httpx.HTTPError as e:
+            logger.error(f"OpenStreetMap API Error: {e}")
+            return None
         except Exception as e:
             logger.error(f"Unexpected error in OSM fallback: {e}")
-            return []
+            return None
 
-maps_service = MapsService()
\ No newline at end of file
+maps_service = MapsService()
@@ -0,0 +1,112 @@
+import math
+import logging
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+logger = logging.getLogger(__name__)
+
+# --- Local OSM Pharmacy Index ---
+# Pharmacies imported from an OSM extract (see import_osm_pharmacies.py) live in
+# a Mongo collection with a 2dsphere index, so radius queries never leave our
+# own infrastructure. Each import also records the bounding box it covers:
+# outside those boxes an empty result means "not imported", not "no pharmacies".
+
+OSM_COLLECTION = "osm_pharmacies"
+OSM_COVERAGE_COLLECTION = "osm_coverage"  # One bounding box per imported extract
+OSM_LOCAL_LIMIT = 60  # Matches the upper end of what Overpass returns for a dense city radius
+METERS_PER_DEGREE_LAT = 111_320
+
+
+def element_to_pharmacy(element: dict) -> Optional[dict]:
+    """
+    Converts an Overpass/OSM element into the Google Places shaped dict the
+    frontend expects. Returns None when the element has no usable location.
+    """
+    tags = element.get('tags', {})
+
+    # Extract coordinates
+    loc_lat = element.get('lat') or element.get('center', {}).get('lat')
+    loc_lon = element.get('lon') or element.get('center', {}).get('lon')
+
+    if not loc_lat or not loc_lon:
+        return None
+
+    # OSM stores addresses in separate tags. Stitch them together.
+    street = tags.get('addr:street', '')
+    housenumber = tags.get('addr:housenumber', '')
+    city = tags.get('addr:city', '')
+
+    vicinity = f"{housenumber} {street}, {city}".strip(' ,')
+    if not vicinity:
+        vicinity = "Address not available"
+
+    return {
+        'name': tags.get('name', 'Pharmacy'),
+        'vicinity': vicinity,
+        'rating': None,
+        'user_ratings_total': None,
+        'geometry': {
+            'lat': loc_lat,
+            'lng': loc_lon
+        },
+        'place_id': f"osm_{element.get('type')}_{element.get('id')}",
+        'source': 'osm'
+    }
+
+
+def pharmacy_to_document(pharmacy: dict) -> dict:
+    """Adds the GeoJSON point the 2dsphere index needs. `_id` is the OSM place_id."""
+    return {
+        '_id': pharmacy['place_id'],
+        **pharmacy,
+        'location': {
+            'type': 'Point',
+            'coordinates': [pharmacy['geometry']['lng'], pharmacy['geometry']['lat']],
+        },
+    }
+
+
+def extend_bbox(bbox: Optional[list], pharmacy: dict) -> list:
+    """[min_lon, min_lat, max_lon, max_lat] grown to include the pharmacy."""
+    lat, lon = pharmacy['geometry']['lat'], pharmacy['geometry']['lng']
+    if bbox is None:
+        return [lon, lat, lon, lat]
+    return [min(bbox[0], lon), min(bbox[1], lat), max(bbox[2], lon), max(bbox[3], lat)]
+
+
+def covers(bbox: list, lat: float, lon: float, radius: int) -> bool:
+    """Whether the whole search circle lies inside the bounding box."""
+    dlat = radius / METERS_PER_DEGREE_LAT
+    dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+    return bbox[0] <= lon - dlon and lon + dlon <= bbox[2] and bbox[1] <= lat - dlat and lat + dlat <= bbox[3]
+
+
+async def has_local_index(db: AsyncIOMotorDatabase) -> bool:
+    # Imports made before coverage was recorded are ignored until re-imported.
+    return await db[OSM_COVERAGE_COLLECTION].estimated_document_count() > 0
+
+
+async def query_local_index(db: AsyncIOMotorDatabase, lat: float, lon: float, radius: int) -> Optional[list]:
+    """
+    Radius query against the imported pharmacies, nearest first, in the same
+    output shape as the live Overpass lookup. Returns None when the search
+    circle is not inside an imported extract, so the caller asks Overpass.
+    """
+    coverage = [doc['bbox'] async for doc in db[OSM_COVERAGE_COLLECTION].find({}, {'bbox': 1})]
+    if not any(covers(bbox, lat, lon, radius) for bbox in coverage):
+        return None
+
+    cursor = db[OSM_COLLECTION].find(
+        {
+            'location': {
+                '$nearSphere': {
+                    '$geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+                    '$maxDistance': radius,
+                }
+            }
+        },
+        {'_id': 0, 'location': 0},
+    ).limit(OSM_LOCAL_LIMIT)
+
+    return [doc async for doc in cursor]
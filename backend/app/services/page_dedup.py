@@ -0,0 +1,205 @@
+import json
+import zlib
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# --- Duplicate Page Detection ---
+# Scanned bundles repeat pages: the same sheet added twice, a letterhead or
+# terms page per section, boilerplate pages that lab portals export as
+# identical images. Each rendered page gets a fingerprint before OCR:
+#   - a 64-bit perceptual hash (DCT of a 32x32 thumbnail), to find candidates
+#   - a binarized thumbnail, to confirm them
+# Two pages of the same lab template hash alike even when one value differs,
+# and at the pixel level a changed digit or decimal point is smaller than the
+# noise between two scans of one sheet. So a candidate is only reused when
+# its thumbnail matches pixel for pixel once aligned; anything less (a real
+# rescan included) is OCR'd again and counted as a near duplicate.
+#
+# PageTextCache (settings.OCR_PAGE_CACHE) extends this across documents in
+# Redis, for the boilerplate that arrives with every report. Text is only
+# stored once the same page (confirmed pixel for pixel, not just by hash) has
+# been seen in OCR_PAGE_CACHE_MIN_SIGHTINGS documents in a row, so a one-off
+# patient page never is.
+# Worker-only: imports OpenCV.
+
+Page = Tuple[str, List[List[str]]]  # (OCR text, layout rows)
+
+CANDIDATE_MAX_DISTANCE = 8  # Hash bits (of 64) two candidate pages may differ by
+THUMB_WIDTH = 1654  # A4 at OCR_FAST_DPI, so adaptive-mode pages compare at their own resolution
+MAX_SHIFT_PX = 24  # Copies placed further apart than this are treated as different pages
+DIFF_WINDOW_PX = 16  # About one character cell at THUMB_WIDTH
+MAX_WINDOW_DIFF = 12  # Differing pixels allowed in any one window; a changed comma is ~20
+MAX_CONFIRMATIONS = 3  # Candidates compared pixel by pixel per page
+CACHE_PREFIX = "ocr_page"
+
+
+def perceptual_hash(gray: np.ndarray) -> int:
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].flatten()[1:]  # Lowest frequencies, without the DC term
+    bits = low > np.median(low)
+    return int("".join("1" if bit else "0" for bit in bits), 2)
+
+
+def ink_thumbnail(gray: np.ndarray) -> np.ndarray:
+    """Ink as 255 on 0, THUMB_WIDTH wide."""
+    scale = THUMB_WIDTH / gray.shape[1]
+    small = cv2.resize(gray, (THUMB_WIDTH, max(1, round(gray.shape[0] * scale))), interpolation=cv2.INTER_AREA)
+    return cv2.adaptiveThreshold(small, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 15, 15)
+
+
+def fingerprint(image: np.ndarray) -> Dict[str, Any]:
+    """Hash plus the thumbnail packed to one bit per pixel (about 0.5 MB a page)."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    thumb = ink_thumbnail(gray)
+    return {"hash": perceptual_hash(gray), "bits": np.packbits(thumb > 0), "shape": thumb.shape}
+
+
+def _thumbnail(page_fingerprint: Dict[str, Any]) -> np.ndarray:
+    height, width = page_fingerprint["shape"]
+    return np.unpackbits(page_fingerprint["bits"], count=height * width).reshape(height, width) * np.uint8(255)
+
+
+def _overlap(first: np.ndarray, second: np.ndarray, dx: int, dy: int) -> Tuple[np.ndarray, np.ndarray]:
+    """The parts of both thumbnails that line up when `second` is `first` moved by (dx, dy)."""
+    height, width = first.shape
+    rows, shifted_rows = (slice(0, height - dy), slice(dy, height)) if dy >= 0 else (slice(-dy, height), slice(0, height + dy))
+    cols, shifted_cols = (slice(0, width - dx), slice(dx, width)) if dx >= 0 else (slice(-dx, width), slice(0, width + dx))
+    return first[rows, cols], second[shifted_rows, shifted_cols]
+
+
+def same_page(first: np.ndarray, second: np.ndarray) -> bool:
+    """True when two ink thumbnails are the same image, up to a whole-pixel shift."""
+    if first.shape[1] != second.shape[1] or abs(first.shape[0] - second.shape[0]) > MAX_SHIFT_PX:
+        return False
+    height = min(first.shape[0], second.shape[0])
+    first, second = first[:height], second[:height]
+    if np.array_equal(first, second):
+        return True
+
+    # Coarse shift at quarter size, then the best whole-pixel shift around it.
+    quarter = (first.shape[1] // 4, height // 4)
+    (dx, dy), _ = cv2.phaseCorrelate(
+        cv2.resize(first, quarter, interpolation=cv2.INTER_AREA).astype(np.float32),
+        cv2.resize(second, quarter, interpolation=cv2.INTER_AREA).astype(np.float32),
+    )
+    dx, dy = round(dx * 4), round(dy * 4)
+    if abs(dx) > MAX_SHIFT_PX or abs(dy) > MAX_SHIFT_PX:
+        return False
+    shifts = [(dx + i, dy + j) for i in (-1, 0, 1) for j in (-1, 0, 1)]
+    dx, dy = min(shifts, key=lambda shift: cv2.countNonZero(cv2.bitwise_xor(*_overlap(first, second, *shift))))
+
+    # Differences are judged per character-sized window, so scattered edge
+    # pixels pass but any one changed glyph doesn't.
+    diff = cv2.bitwise_xor(*_overlap(first, second, dx, dy)) // 255
+    windows = cv2.boxFilter(diff, cv2.CV_16U, (DIFF_WINDOW_PX, DIFF_WINDOW_PX), normalize=False)
+    return int(windows.max()) <= MAX_WINDOW_DIFF
+
+
+def is_candidate(first: Dict[str, Any], second: Dict[str, Any]) -> bool:
+    return bin(first["hash"] ^ second["hash"]).count("1") <= CANDIDATE_MAX_DISTANCE
+
+
+class DocumentPages:
+    """The pages already OCR'd in one document, to reuse for their duplicates."""
+    def __init__(self):
+        self.pages: List[Tuple[Dict[str, Any], Page]] = []
+        self.near_duplicates = 0  # Candidates that didn't match closely enough to reuse
+
+    def find(self, page_fingerprint: Dict[str, Any]) -> Optional[Page]:
+        candidates = [(other, page) for other, page in self.pages if is_candidate(page_fingerprint, other)]
+        if not candidates:
+            return None
+        # A document of one lab's template makes every page a candidate; confirm only the closest few.
+        candidates.sort(key=lambda candidate: bin(page_fingerprint["hash"] ^ candidate[0]["hash"]).count("1"))
+        thumb = _thumbnail(page_fingerprint)
+        for other, page in candidates[:MAX_CONFIRMATIONS]:
+            if same_page(thumb, _thumbnail(other)):
+                return page
+        self.near_duplicates += 1
+        return None
+
+    def add(self, page_fingerprint: Dict[str, Any], page: Page):
+        self.pages.append((page_fingerprint, page))
+
+
+def _stored_fingerprint(bits: bytes, shape: bytes) -> Dict[str, Any]:
+    return {"bits": np.frombuffer(zlib.decompress(bits), dtype=np.uint8), "shape": tuple(int(n) for n in shape.split(b","))}
+
+
+class PageTextCache:
+    """OCR results shared across documents, keyed by perceptual hash and confirmed like in-document duplicates."""
+    def __init__(self, client: Optional["redis.Redis"] = None):
+        self.redis = client
+        if self.redis is None:
+            try:
+                options = {"ssl_cert_reqs": None} if settings.REDIS_URL.startswith("rediss://") else {}
+                self.redis = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=2, **options)
+            except Exception as e:
+                logger.error(f"OCR page cache disabled, no Redis: {e}")
+
+    def _key(self, page_fingerprint: Dict[str, Any]) -> str:
+        return f"{CACHE_PREFIX}:{page_fingerprint['hash']:016x}"
+
+    def lookup(self, page_fingerprint: Dict[str, Any]) -> Optional[Page]:
+        if self.redis is None:
+            return None
+        try:
+            text, rows, bits, shape = self.redis.hmget(self._key(page_fingerprint), "text", "rows", "bits", "shape")
+        except redis.RedisError as e:
+            logger.warning(f"OCR page cache lookup failed: {e}")
+            return None
+        if text is None:
+            return None
+        if not same_page(_thumbnail(page_fingerprint), _thumbnail(_stored_fingerprint(bits, shape))):
+            return None
+        return text.decode("utf-8"), json.loads(rows)
+
+    def record(self, page_fingerprint: Dict[str, Any], page: Page):
+        """
+        Counts a sighting of this page; stores its text once it has been seen often enough.
+        Pages of one template share a hash, so only pages matching the thumbnail kept from
+        the first sighting count; a different page restarts the count with its own thumbnail.
+        """
+        if self.redis is None:
+            return
+        key = self._key(page_fingerprint)
+        height, width = page_fingerprint["shape"]
+        try:
+            with self.redis.pipeline() as pipe:
+                pipe.watch(key)
+                text, bits, shape, sightings = pipe.hmget(key, "text", "bits", "shape", "sightings")
+                if text is not None:
+                    return  # Holds confirmed boilerplate; lookup already rejected this page
+                same = bits is not None and same_page(
+                    _thumbnail(page_fingerprint), _thumbnail(_stored_fingerprint(bits, shape))
+                )
+                sightings = int(sightings) + 1 if same else 1
+
+                pipe.multi()
+                if same:
+                    pipe.hset(key, "sightings", sightings)
+                else:
+                    pipe.hset(key, mapping={
+                        "sightings": 1,
+                        "bits": zlib.compress(page_fingerprint["bits"].tobytes()),
+                        "shape": f"{height},{width}",
+                    })
+                if sightings >= settings.OCR_PAGE_CACHE_MIN_SIGHTINGS:
+                    text, rows = page
+                    pipe.hset(key, mapping={"text": text.encode("utf-8"), "rows": json.dumps(rows)})
+                pipe.expire(key, settings.OCR_PAGE_CACHE_TTL_SECONDS)
+                pipe.execute()
+        except redis.WatchError:
+            logger.debug(f"OCR page cache entry {key} changed concurrently; sighting not counted.")
+        except redis.RedisError as e:
+            logger.warning(f"OCR page cache write failed: {e}")
+
+page_text_cache = PageTextCache()
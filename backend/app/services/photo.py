@@ -0,0 +1,157 @@
+import math
+import logging
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    from pillow_heif import register_heif_opener
+    register_heif_opener()
+    HEIF_SUPPORTED = True
+except ImportError:  # pragma: no cover - optional dependency, HEIC uploads fail as unreadable
+    HEIF_SUPPORTED = False
+
+logger = logging.getLogger(__name__)
+
+# --- Camera Photo Preprocessing ---
+# Phone photos of a report arrive at 12+ megapixels, in perspective and a
+# little rotated. Before OCR each photo is:
+#   1. scaled down so its text is about `text_height` px tall; Tesseract
+#      reads 20-40 px text best, and the extra pixels only cost time
+#   2. flattened onto the page's rectangle when the page edges are visible
+#   3. deskewed by the median angle of its text lines
+# Page corners and text height are measured on small thumbnails, so the
+# full-size photo is only resampled once, by the downscale.
+# Worker-only: imports OpenCV.
+
+TARGET_TEXT_HEIGHT = 28  # px, median height of character blobs after scaling
+MAX_TEXT_HEIGHT = 40  # Second attempt when the first OCR pass is unsure
+DETECT_MAX_SIDE = 1000  # Thumbnail for finding the page outline
+MEASURE_MAX_SIDE = 2000  # Thumbnail for measuring text height
+MIN_PAGE_AREA = 0.25  # Share of the photo a page outline must cover
+MIN_TEXT_BLOBS = 40  # Fewer character blobs than this and the text height is a guess
+MIN_SKEW_DEGREES = 0.3
+MAX_SKEW_DEGREES = 15
+
+
+class UnreadableImageError(ValueError):
+    pass
+
+
+def load_image(path: str) -> np.ndarray:
+    """BGR pixels with the EXIF orientation applied. HEIC/HEIF needs the optional pillow-heif."""
+    image = cv2.imread(path, cv2.IMREAD_COLOR)  # Applies EXIF orientation
+    if image is not None:
+        return image
+
+    from PIL import Image, ImageOps
+    try:
+        with Image.open(path) as pil_image:
+            rgb = ImageOps.exif_transpose(pil_image).convert("RGB")
+    except Exception as e:
+        hint = "" if HEIF_SUPPORTED else " (HEIC/HEIF needs pillow-heif)"
+        raise UnreadableImageError(f"Could not decode image {path}{hint}: {e}") from e
+    return cv2.cvtColor(np.asarray(rgb), cv2.COLOR_RGB2BGR)
+
+
+def _thumbnail(gray: np.ndarray, max_side: int) -> Tuple[np.ndarray, float]:
+    scale = min(1.0, max_side / max(gray.shape[:2]))
+    if scale == 1.0:
+        return gray, 1.0
+    return cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA), scale
+
+
+def _order_corners(points: np.ndarray) -> np.ndarray:
+    """(top-left, top-right, bottom-right, bottom-left)."""
+    sums, diffs = points.sum(axis=1), np.diff(points, axis=1).ravel()
+    return np.array([
+        points[sums.argmin()], points[diffs.argmin()], points[sums.argmax()], points[diffs.argmax()]
+    ], dtype=np.float32)
+
+
+def find_page(gray: np.ndarray) -> Optional[np.ndarray]:
+    """The page's four corners in `gray`'s pixels, or None when no page outline is visible."""
+    edges = cv2.Canny(cv2.GaussianBlur(gray, (5, 5), 0), 50, 150)
+    edges = cv2.dilate(edges, np.ones((3, 3), np.uint8))
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    min_area = MIN_PAGE_AREA * gray.shape[0] * gray.shape[1]
+    for contour in sorted(contours, key=cv2.contourArea, reverse=True)[:5]:
+        if cv2.contourArea(contour) < min_area:
+            break
+        outline = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+        if len(outline) == 4 and cv2.isContourConvex(outline):
+            return _order_corners(outline.reshape(4, 2).astype(np.float32))
+    return None
+
+
+def estimate_text_height(gray: np.ndarray) -> Optional[float]:
+    """Median height of character-sized blobs in `gray`'s pixels, or None when there is too little text."""
+    binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 25, 15)
+    _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    heights, widths = stats[1:, cv2.CC_STAT_HEIGHT], stats[1:, cv2.CC_STAT_WIDTH]
+    glyphs = (heights >= 5) & (heights <= gray.shape[0] / 20) & (widths <= heights * 2) & (widths >= 2)
+    if glyphs.sum() < MIN_TEXT_BLOBS:
+        return None
+    return float(np.median(heights[glyphs]))
+
+
+def skew_angle(gray: np.ndarray, text_height: float) -> float:
+    """Median angle of the text lines in degrees, clockwise positive; 0.0 when there are too few lines."""
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    # Smear characters into one blob per line (and per table cell).
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(3, int(text_height * 1.5)), max(1, int(text_height / 6))))
+    lines = cv2.dilate(binary, kernel)
+    contours, _ = cv2.findContours(lines, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    angles = []
+    for contour in contours:
+        box = cv2.boxPoints(cv2.minAreaRect(contour))
+        first, second = box[1] - box[0], box[2] - box[1]
+        long_side, short_side = (first, second) if np.hypot(*first) >= np.hypot(*second) else (second, first)
+        length, thickness = np.hypot(*long_side), np.hypot(*short_side)
+        if length < text_height * 4 or length < thickness * 5:
+            continue
+        angle = math.degrees(math.atan2(long_side[1], long_side[0]))
+        angles.append((angle + 90) % 180 - 90)
+    return float(np.median(angles)) if len(angles) >= 5 else 0.0
+
+
+def prepare_photo(image: np.ndarray, text_height: float = TARGET_TEXT_HEIGHT) -> Tuple[np.ndarray, float]:
+    """
+    Downscaled, flattened and deskewed copy of a camera photo, ready for the
+    OCR preprocessor. Returns (image, scale applied to the original).
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+
+    measure, measure_scale = _thumbnail(gray, MEASURE_MAX_SIDE)
+    measured = estimate_text_height(measure)
+    scale = min(1.0, text_height / (measured / measure_scale)) if measured else 1.0
+    if scale < 1.0:
+        image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+
+    detect, detect_scale = _thumbnail(gray, DETECT_MAX_SIDE)
+    corners = find_page(detect)
+    if corners is not None:
+        corners /= detect_scale
+        top_left, top_right, bottom_right, bottom_left = corners
+        width = int(max(np.hypot(*(top_right - top_left)), np.hypot(*(bottom_right - bottom_left))))
+        height = int(max(np.hypot(*(bottom_left - top_left)), np.hypot(*(bottom_right - top_right))))
+        target = np.array([[0, 0], [width - 1, 0], [width - 1, height - 1], [0, height - 1]], dtype=np.float32)
+        matrix = cv2.getPerspectiveTransform(corners, target)
+        image = cv2.warpPerspective(image, matrix, (width, height), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+
+    angle = skew_angle(gray, measured / measure_scale * scale if measured else text_height)
+    if MIN_SKEW_DEGREES <= abs(angle) <= MAX_SKEW_DEGREES:
+        h, w = gray.shape[:2]
+        matrix = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+        image = cv2.warpAffine(image, matrix, (w, h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+    logger.info(
+        f"Photo prepared: scale {scale:.2f}, text height {measured / measure_scale if measured else 0:.0f}px, "
+        f"page outline {'found' if corners is not None else 'not found'}, deskew {angle:.1f}°."
+    )
+    return image, scale
@@ -0,0 +1,60 @@
+import time
+import random
+import logging
+import threading
+from typing import Optional
+
+import redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# --- Shared Rate Limit ---
+# A fixed-window counter in Redis, so every worker process and thread draws
+# from one budget. Windows are short (WINDOW_SECONDS) so a per-minute limit
+# is spread out instead of being spent in a burst at the top of the minute.
+# Without Redis the limit falls back to this process only.
+
+WINDOW_SECONDS = 10
+KEY_PREFIX = "ratelimit"
+
+
+class RateLimiter:
+    def __init__(self, name: str, per_minute: int, client: Optional["redis.Redis"] = None):
+        self.name = name
+        self.per_window = max(1, round(per_minute * WINDOW_SECONDS / 60))
+        self.redis = client
+        if self.redis is None:
+            try:
+                options = {"ssl_cert_reqs": None} if settings.REDIS_URL.startswith("rediss://") else {}
+                self.redis = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=2, **options)
+            except Exception as e:
+                logger.error(f"Rate limiter '{name}' has no Redis, limiting this process only: {e}")
+        self._lock = threading.Lock()
+        self._local = {}  # window -> count, for the no-Redis fallback
+
+    def _count(self, window: int) -> int:
+        if self.redis is not None:
+            try:
+                key = f"{KEY_PREFIX}:{self.name}:{window}"
+                pipe = self.redis.pipeline()
+                pipe.incr(key)
+                pipe.expire(key, WINDOW_SECONDS * 2)
+                return pipe.execute()[0]
+            except redis.RedisError as e:
+                logger.warning(f"Rate limiter '{self.name}' could not reach Redis, limiting this process only: {e}")
+        with self._lock:
+            self._local = {w: c for w, c in self._local.items() if w >= window}
+            self._local[window] = self._local.get(window, 0) + 1
+            return self._local[window]
+
+    def acquire(self):
+        """Blocks until a call is allowed in the current window."""
+        while True:
+            now = time.time()
+            window = int(now // WINDOW_SECONDS)
+            if self._count(window) <= self.per_window:
+                return
+            # Jitter so waiting workers don't all retry at the same instant.
+            time.sleep((window + 1) * WINDOW_SECONDS - now + random.uniform(0, 0.5))
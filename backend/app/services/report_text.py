@@ -0,0 +1,139 @@
+import re
+import logging
+from collections import Counter
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+# --- Report Text Preparation ---
+# Cleans extracted report text before it is sent to Gemini so that prompt size
+# tracks the actual results, not letterheads repeated on every page.
+
+PAGE_BREAK = "\f"  # Inserted between pages by extract_text_from_pdf
+CELL_SEPARATOR = " | "  # Between the cells of a table row from the layout stage
+
+FOOTER_LINE = re.compile(
+    r"(?i)^\s*(page\s*\d+(\s*(of|/)\s*\d+)?|-+\s*end\s*of\s*report\s*-+|end\s*of\s*report|"
+    r".*electronically\s*(generated|verified|signed).*|.*not\s*valid\s*for\s*medico.*|"
+    r"printed\s*on.*|scan\s*(the\s*)?qr.*|.*computer\s*generated\s*report.*)\s*$"
+)
+
+# A trailing reference range such as "13.0 - 17.0", "(4.5-5.5)" or "< 200".
+REFERENCE_RANGE = re.compile(
+    r"\s+[\(\[]?\s*(?:\d+(?:\.\d+)?\s*[-–]\s*\d+(?:\.\d+)?|[<>≤≥]=?\s*\d+(?:\.\d+)?)\s*[\)\]]?\s*$"
+)
+
+# A whole cell holding a reference range, e.g. "13.0 - 17.0", "(4.5-5.5)" or "< 200".
+REFERENCE_CELL = re.compile(
+    r"^[\(\[]?\s*(?:\d+(?:\.\d+)?\s*[-–]\s*\d+(?:\.\d+)?|[<>≤≥]=?\s*\d+(?:\.\d+)?)\s*[\)\]]?$"
+)
+NUMERIC_CELL = re.compile(r"^[<>]?\s?\d")
+# A standalone measured value; digits inside a name ("HbA1c", "B12") do not count.
+VALUE_TOKEN = re.compile(r"(?:^|\s)[<>]?\d+(?:\.\d+)?(?=\s|$)")
+
+EDGE_LINES = 12  # Lines at the top and bottom of a page that can hold its header/footer
+CHARS_PER_TOKEN = 4  # Rough Gemini tokenizer ratio for English lab text
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate used for logging before a prompt is sent."""
+    return len(text) // CHARS_PER_TOKEN + 1 if text else 0
+
+
+def _strip_reference_range(line: str) -> str:
+    # Only strip when a measured value is still left on the line afterwards.
+    stripped = REFERENCE_RANGE.sub("", line)
+    if stripped != line and VALUE_TOKEN.search(stripped):
+        return stripped
+    return line
+
+
+def prepare_report_text(full_text: str) -> str:
+    """
+    Removes boilerplate from extracted report text:
+    1. Page numbers, footers and "end of report" markers.
+    2. Lines repeated at the top or bottom of several pages (lab letterheads,
+       patient banners), keeping only the first occurrence.
+    3. Reference-range columns at the end of result lines (table rows
+       drop theirs in drop_reference_cells once they are left for the LLM).
+    """
+    pages = [[" ".join(line.split()) for line in page.splitlines() if line.strip()] for page in full_text.split(PAGE_BREAK)]
+
+    # A line printed near the top or bottom of more than one page is a header
+    # or footer, not a result. Bare cells ("g/dL", "4.8") are never dropped:
+    # text extracted one cell per line repeats them between real results.
+    page_counts, edge_counts = Counter(), Counter()
+    for lines in pages:
+        page_counts.update({line.lower() for line in lines})
+        edge_counts.update({line.lower() for line in lines[:EDGE_LINES] + lines[-EDGE_LINES:]})
+    repeated = {
+        line for line, count in page_counts.items()
+        if count > 1 and edge_counts[line] == count and " " in line
+    } if len(pages) > 1 else set()
+
+    kept_lines = []
+    seen_repeated = set()
+    for lines in pages:
+        for line in lines:
+            if FOOTER_LINE.match(line):
+                continue
+
+            key = line.lower()
+            if key in repeated:
+                if key in seen_repeated:
+                    continue
+                seen_repeated.add(key)
+
+            # Table rows keep their range cell: it tells the row parser a unit-less value is a result.
+            kept_lines.append(line if CELL_SEPARATOR in line else _strip_reference_range(line))
+
+    prepared = "\n".join(kept_lines)
+    logger.info(f"Prepared report text: {len(full_text)} -> {len(prepared)} chars across {len(pages)} page(s).")
+    return prepared
+
+
+def chunk_text(text: str, max_chars: int) -> List[str]:
+    """
+    Splits text into chunks of at most max_chars, always on line boundaries so
+    that a single result row is never cut in half.
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    current_len = 0
+
+    for line in text.splitlines():
+        line = line[:max_chars]
+        if current and current_len + len(line) + 1 > max_chars:
+            chunks.append("\n".join(current))
+            current, current_len = [], 0
+        current.append(line)
+        current_len += len(line) + 1
+
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def drop_reference_cells(cells: List[str]) -> List[str]:
+    # A range cell is only a reference once a value cell precedes it ("< 0.5" can be a value).
+    kept, has_value = [], False
+    for cell in cells:
+        if has_value and REFERENCE_CELL.match(cell):
+            continue
+        if kept and NUMERIC_CELL.match(cell):
+            has_value = True
+        kept.append(cell)
+    return kept
+
+
+def rows_to_text(layout_rows: List[List[List[str]]]) -> str:
+    """
+    Renders layout rows (pages -> rows -> cells) as one compact line per row,
+    cells joined by CELL_SEPARATOR. Reference-range cells are kept for the row
+    parser and only dropped from the rows that are sent to the LLM.
+    Pages stay separated by PAGE_BREAK so prepare_report_text still applies.
+    """
+    return PAGE_BREAK.join(
+        "\n".join(CELL_SEPARATOR.join(cells) for cells in page_rows if cells)
+        for page_rows in layout_rows
+    )
@@ -1,19 +1,31 @@
 import logging
-from google.cloud import storage
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
 class StorageService:
     def __init__(self):
-        try:
-            self.client = storage.Client.from_service_account_json(
-                settings.GOOGLE_APPLICATION_CREDENTIALS
-            )
-            self.bucket_name = f"{settings.GCP_PROJECT_ID}-reports" 
-        except Exception as e:
-            logger.error(f"Failed to init GCS Client: {e}")
-            self.client = None
+        self.bucket_name = f"{settings.GCP_PROJECT_ID}-reports" 
+        self._client = None
+        self._client_failed = False
+
+    @property
+    def client(self):
+        """
+        Builds the GCS client on first use. google.cloud.storage is only
+        imported here, so processes that never upload don't load it.
+        """
+        if self._client is None and not self._client_failed:
+            try:
+                from google.cloud import storage
+
+                self._client = storage.Client.from_service_account_json(
+                    settings.GOOGLE_APPLICATION_CREDENTIALS
+                )
+            except Exception as e:
+                logger.error(f"Failed to init GCS Client: {e}")
+                self._client_failed = True
+        return self._client
 
     def upload_file(self, file_obj, destination_blob_name: str) -> str:
         """
@@ -0,0 +1,168 @@
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# --- Lab Value Units ---
+# Values arrive as text in whatever unit the lab printed ("14.2 g/dL",
+# "142 g/L", "4.5 mill/mm3"). At ingest each entity gets its parsed `Number`
+# and a normalized `Unit`. Trend responses then convert a whole series to the
+# indicator's canonical unit in one NumPy operation: one factor per distinct
+# unit, broadcast over every point.
+# NumPy is imported on first use, so the API process doesn't load it at startup.
+
+# Normalized unit key -> (dimension, factor to the dimension's base unit, display).
+# Bases: mass mg/dL, molar mmol/L, count /µL, activity U/L, hormone µIU/mL.
+UNITS: Dict[str, Tuple[str, float, str]] = {}
+
+
+def _register(dimension: str, factor: float, display: str, *keys: str):
+    for key in (display, *keys):
+        UNITS[normalize_unit(key)] = (dimension, factor, display)
+
+
+def normalize_unit(unit: Optional[str]) -> str:
+    """'g/dL' -> 'g/dl', 'mill/cu.mm' -> 'mill/cumm', 'ug/L' -> 'µg/l', 'x10³/µL' -> '10^3/µl'."""
+    key = (unit or "").strip().lower().replace(" ", "").replace("μ", "µ").replace("cu.mm", "cumm")
+    key = key.replace("³", "^3").replace("⁶", "^6").replace("x10", "10").replace("*10", "10")
+    key = re.sub(r"^(u|mc)(?=g|mol|iu)", "µ", key)
+    return re.sub(r"/u(?=l$)", "/µ", key)
+
+
+_register("mass", 1000, "g/dL", "gm/dl", "gms/dl", "g%", "gm%", "gms%")
+_register("mass", 100, "g/L", "gm/l")
+_register("mass", 1, "mg/dL", "mg%")
+_register("mass", 0.1, "mg/L")
+_register("mass", 1e-3, "µg/dL")
+_register("mass", 1e-4, "ng/mL", "µg/l")
+_register("mass", 1e-6, "ng/dL")
+_register("mass", 1e-7, "pg/mL", "ng/l")
+_register("molar", 1, "mmol/L")
+_register("molar", 1e-3, "µmol/L")
+_register("molar", 1e-6, "nmol/L")
+_register("molar", 1e-9, "pmol/L")
+_register("molar", 1, "mEq/L")  # Scaled by valence in conversion()
+_register("count", 1, "/µL", "cells/µl", "/cumm", "cells/cumm", "/mm3", "cells/mm3")
+_register("count", 1e3, "10^3/µL", "10^9/l", "thou/mm3", "thou/µl", "thou/cumm", "k/µl")
+_register("count", 1e5, "lakh/µL", "lakh/cumm", "lakhs/cumm", "lakh/mm3", "lakhs/mm3")
+_register("count", 1e6, "10^6/µL", "10^12/l", "mill/mm3", "million/mm3", "mill/cumm", "million/cumm", "million/µl", "m/µl")
+_register("activity", 1, "U/L", "iu/l")
+_register("hormone", 1, "µIU/mL", "miu/l")
+_register("hormone", 1000, "mIU/mL")
+_register("percent", 1, "%")
+_register("ifcc", 1, "mmol/mol")
+_register("volume", 1, "fL")
+_register("cell_mass", 1, "pg")
+_register("rate", 1, "mm/hr", "mm/1sthr", "mm/h")
+_register("time", 1, "sec", "seconds", "s")
+_register("gfr", 1, "mL/min/1.73m²", "ml/min/1.73m2")
+
+# Indicator code (see services/indicators.py) -> canonical unit.
+CANONICAL_UNITS: Dict[str, str] = {
+    "HGB": "g/dL", "RBC": "10^6/µL", "WBC": "10^3/µL", "PLT": "10^3/µL", "HCT": "%", "MCV": "fL", "MCH": "pg",
+    "MCHC": "g/dL", "RDW": "%", "MPV": "fL", "NEUT": "%", "LYMPH": "%", "MONO": "%", "EOS": "%", "BASO": "%",
+    "ESR": "mm/hr", "GLU_F": "mg/dL", "GLU_PP": "mg/dL", "GLU_R": "mg/dL", "HBA1C": "%", "EAG": "mg/dL",
+    "CHOL": "mg/dL", "HDL": "mg/dL", "LDL": "mg/dL", "VLDL": "mg/dL", "TRIG": "mg/dL", "CREA": "mg/dL",
+    "UREA": "mg/dL", "BUN": "mg/dL", "URIC": "mg/dL", "EGFR": "mL/min/1.73m²", "NA": "mmol/L", "K": "mmol/L",
+    "CL": "mmol/L", "CA": "mg/dL", "PHOS": "mg/dL", "BILI_T": "mg/dL", "BILI_D": "mg/dL", "BILI_I": "mg/dL",
+    "ALT": "U/L", "AST": "U/L", "ALP": "U/L", "GGT": "U/L", "TP": "g/dL", "ALB": "g/dL", "GLOB": "g/dL",
+    "TSH": "µIU/mL", "T3": "ng/dL", "T4": "µg/dL", "FT3": "pg/mL", "FT4": "ng/dL", "VITD": "ng/mL",
+    "VITB12": "pg/mL", "FERRITIN": "ng/mL", "IRON": "µg/dL", "TIBC": "µg/dL", "CRP": "mg/L",
+}
+
+# g/mol, for mass <-> molar conversion: mg/dL = mmol/L * MW / 10.
+MOLAR_MASS: Dict[str, float] = {
+    "GLU_F": 180.16, "GLU_PP": 180.16, "GLU_R": 180.16, "EAG": 180.16,
+    "CHOL": 386.65, "HDL": 386.65, "LDL": 386.65, "VLDL": 386.65, "TRIG": 885.7,
+    "CREA": 113.12, "UREA": 60.06, "BUN": 28.014, "URIC": 168.11,
+    "CA": 40.08, "PHOS": 30.97, "NA": 22.99, "K": 39.10, "CL": 35.45,
+    "BILI_T": 584.66, "BILI_D": 584.66, "BILI_I": 584.66,
+    "T3": 650.98, "FT3": 650.98, "T4": 776.87, "FT4": 776.87,
+    "VITD": 400.64, "VITB12": 1355.37, "IRON": 55.845, "TIBC": 55.845,
+}
+VALENCE: Dict[str, int] = {"CA": 2}  # mEq/L -> mmol/L for non-monovalent ions
+
+# HbA1c: IFCC mmol/mol -> NGSP % is affine, not a plain factor.
+HBA1C_IFCC_TO_NGSP = (0.09148, 2.152)
+
+VALUE = re.compile(r"^\s*(?P<qualifier>[<>]=?)?\s*(?P<number>-?\d[\d,]*(?:\.\d+)?)\s*(?P<unit>.*?)\s*$")
+
+
+def parse_value(value: Any) -> Tuple[Optional[float], str]:
+    """'14.2 g/dL' -> (14.2, 'g/dl'); '1,50,000 /cumm' -> (150000.0, '/cumm'); 'Negative' -> (None, '')."""
+    match = VALUE.match(str(value)) if value is not None else None
+    if not match:
+        return None, ""
+    return float(match.group("number").replace(",", "")), normalize_unit(match.group("unit"))
+
+
+def conversion(code: Optional[str], unit: str, target: str) -> Optional[Tuple[float, float]]:
+    """
+    (scale, offset) taking `unit` to `target` for indicator `code`, or None
+    when they don't convert. An empty unit is read as the target unit: table
+    columns often print the unit once in the header.
+    """
+    unit, target = normalize_unit(unit), normalize_unit(target)
+    if not unit or unit == target:
+        return 1.0, 0.0
+    if unit not in UNITS or target not in UNITS:
+        return None
+
+    (from_dim, from_factor, _), (to_dim, to_factor, _) = UNITS[unit], UNITS[target]
+    if unit == "meq/l":
+        from_factor /= VALENCE.get(code, 1)
+    if target == "meq/l":
+        to_factor /= VALENCE.get(code, 1)
+
+    if from_dim == to_dim:
+        return from_factor / to_factor, 0.0
+    if {from_dim, to_dim} == {"mass", "molar"} and code in MOLAR_MASS:
+        mg_dl_per_mmol_l = MOLAR_MASS[code] / 10
+        scale = mg_dl_per_mmol_l if from_dim == "molar" else 1 / mg_dl_per_mmol_l
+        return from_factor * scale / to_factor, 0.0
+    if code == "HBA1C" and (from_dim, to_dim) == ("ifcc", "percent"):
+        return HBA1C_IFCC_TO_NGSP
+    if code == "HBA1C" and (from_dim, to_dim) == ("percent", "ifcc"):
+        slope, intercept = HBA1C_IFCC_TO_NGSP
+        return 1 / slope, -intercept / slope
+    return None
+
+
+def display_unit(unit: str) -> str:
+    key = normalize_unit(unit)
+    return UNITS[key][2] if key in UNITS else unit
+
+
+def annotate_values(entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Adds the parsed `Number` and normalized `Unit` to each entity, in place. Runs once at ingest."""
+    for entity in entities:
+        if isinstance(entity, dict):
+            number, unit = parse_value(entity.get("Value"))
+            entity["Number"] = number
+            entity["Unit"] = display_unit(unit) if number is not None else None
+    return entities
+
+
+def convert_series(
+    code: Optional[str], numbers: Sequence[Optional[float]], units: Sequence[Optional[str]], target: Optional[str] = None
+) -> Tuple[Any, str]:
+    """
+    Converts a series to `target` (default: the indicator's canonical unit, or
+    its most common unit when the indicator has none). Returns (float array,
+    target display unit); points that don't convert are NaN.
+    """
+    import numpy as np
+
+    values = np.array(numbers, dtype=float)  # None -> NaN
+    if not len(values):
+        return values, display_unit(target or CANONICAL_UNITS.get(code, ""))
+
+    # Python work is per distinct unit; everything per point is array math.
+    distinct, inverse, counts = np.unique(np.array([u or "" for u in units], dtype=str), return_inverse=True, return_counts=True)
+    if target is None:
+        target = CANONICAL_UNITS.get(code) or str(distinct[counts.argmax()])
+
+    table = np.full((len(distinct), 2), np.nan)
+    for row, unit in enumerate(distinct):
+        factors = conversion(code, str(unit), target)
+        if factors is not None:
+            table[row] = factors
+    return values * table[inverse, 0] + table[inverse, 1], display_unit(target)
@@ -0,0 +1,155 @@
+import re
+import logging
+from typing import List, Dict, Tuple, Optional
+
+from app.services.report_text import CELL_SEPARATOR, REFERENCE_CELL, drop_reference_cells
+
+logger = logging.getLogger(__name__)
+
+# --- Deterministic Lab Result Parser ---
+# Most lab reports print one result per line: "Hemoglobin  14.2  g/dL  13.0 - 17.0".
+# We resolve those lines locally and only hand the leftovers to Gemini.
+# Table rows from the layout stage ("Hemoglobin | 14.2 | g/dL") are read by column.
+
+KNOWN_UNITS = {
+    "g/dl", "g/l", "mg/dl", "mg/l", "mg/g", "ug/dl", "µg/dl", "μg/dl", "ug/l", "µg/l",
+    "mmol/l", "umol/l", "µmol/l", "μmol/l", "nmol/l", "pmol/l", "meq/l",
+    "u/l", "iu/l", "iu/ml", "miu/l", "miu/ml", "uiu/ml", "µiu/ml", "μiu/ml",
+    "ng/ml", "ng/dl", "pg/ml", "pg", "fl", "%",
+    "mill/mm3", "million/mm3", "mill/cumm", "million/cumm", "million/ul", "million/µl",
+    "/cumm", "cells/cumm", "/mm3", "cells/mm3", "/ul", "/µl", "cells/ul", "cells/µl",
+    "10^3/ul", "10^3/µl", "x10^3/ul", "x10^3/µl", "10^6/ul", "10^6/µl", "x10^6/ul", "x10^6/µl",
+    "10^9/l", "x10^9/l", "10^12/l", "x10^12/l", "thou/mm3", "thou/ul", "lakhs/cumm", "lakh/cumm",
+    "mm/hr", "mm/1st hr", "sec", "seconds", "ml/min/1.73m2", "ml/min", "/hpf", "/lpf",
+}
+
+# Name, optional separator, value (may carry < or >), unit, then anything (flags/reference range).
+RESULT_LINE = re.compile(
+    r"^\s*(?P<name>[A-Za-z][A-Za-z0-9 ().,\-+/']{1,60}?)\s*[:\-]?\s+"
+    r"(?P<value>[<>]?\s?\d+(?:\.\d+)?)\s*"
+    r"(?P<unit>%|[A-Za-zµμ/^0-9.]*/[A-Za-zµμ0-9^. ]+?|[A-Za-zµμ]+)?"
+    r"(?=\s|$)(?P<rest>.*)$"
+)
+
+# Lines that carry digits but are never test results.
+METADATA_LINE = re.compile(
+    r"(?i)\b(page\s*\d|patient\s*id|reg(istration)?\s*no|sample\s*(id|no)|lab\s*no|uhid|"
+    r"age\b|dob|date|time|collected|received|reported|printed|phone|mobile|tel|fax|"
+    r"pin\s*code|barcode|ref(erred)?\s*by|dr\.)"
+)
+
+# A value cell, optionally with its unit in the same cell: "14.2", "<0.5", "14.2 g/dL".
+VALUE_CELL = re.compile(r"^(?P<value>[<>]?\s?\d+(?:\.\d+)?)\s*(?P<unit>\S.*)?$")
+
+FLAG_TOKENS = {"h", "l", "high", "low", "hh", "ll", "*", "abnormal", "normal", "critical"}
+
+# Lines around an unresolved line that go to the LLM with it. Text extracted
+# one cell per line ("Hemoglobin\n14.2\ng/dL") puts the name and unit of a
+# value on the lines next to it.
+CONTEXT_LINES = 2
+
+
+def _normalize_unit(unit: str) -> str:
+    return unit.strip().lower().replace(" ", "").replace("μ", "µ").replace("cu.mm", "cumm")
+
+
+def parse_result_line(line: str) -> Optional[Dict[str, str]]:
+    """
+    Tries to read a single "<test> <value> <unit> ..." line.
+    Returns {"Indicator", "Value"} on a confident match, otherwise None.
+    """
+    match = RESULT_LINE.match(line)
+    if not match:
+        return None
+
+    name = match.group("name").strip(" :-.,")
+    unit = (match.group("unit") or "").strip()
+    value = match.group("value").replace(" ", "")
+
+    # Only accept lines with a unit we recognise; anything else is ambiguous.
+    if not unit or _normalize_unit(unit) not in KNOWN_UNITS:
+        return None
+
+    # A trailing "H"/"Low" flag right after the unit is fine, but a name that is
+    # itself a flag token or too short to be a test name is not.
+    if len(name) < 2 or name.lower() in FLAG_TOKENS:
+        return None
+
+    return {"Indicator": name, "Value": f"{value} {unit}"}
+
+
+def parse_result_row(cells: List[str]) -> Optional[Dict[str, str]]:
+    """
+    Reads a layout table row: [test, value, unit?, flag?, reference range?].
+    A unit-less value (ratios, specific gravity) is only accepted when a
+    reference-range cell follows it; otherwise "Visit No | 77" would pass.
+    An unrecognised unit still leaves the row for the LLM.
+    """
+    if len(cells) < 2:
+        return None
+
+    name = cells[0].strip(" :-.,")
+    if len(name) < 2 or not name[0].isalpha() or name.lower() in FLAG_TOKENS or METADATA_LINE.search(name):
+        return None
+
+    match = VALUE_CELL.match(cells[1].strip())
+    if not match:
+        return None
+    value = match.group("value").replace(" ", "")
+
+    unit_cells = [match.group("unit")] if match.group("unit") else []
+    unit_cells += cells[2:]
+    unit_cells = [cell.strip() for cell in unit_cells if cell.strip().lower() not in FLAG_TOKENS]
+
+    if not unit_cells:
+        return None
+    if _normalize_unit(unit_cells[0]) in KNOWN_UNITS:
+        return {"Indicator": name, "Value": f"{value} {unit_cells[0]}"}
+    if REFERENCE_CELL.match(unit_cells[0]):
+        return {"Indicator": name, "Value": value}
+    return None
+
+
+def extract_vitals_locally(full_text: str) -> Tuple[List[Dict[str, str]], List[str]]:
+    """
+    Deterministic first pass over the report text.
+
+    Returns a tuple of (resolved indicators, unresolved lines). Unresolved lines
+    are the ones that look like they might hold a result (they contain a digit
+    and are not obvious metadata) but could not be parsed confidently. Each
+    comes with CONTEXT_LINES lines either side, in report order.
+    """
+    resolved: List[Dict[str, str]] = []
+    unresolved: List[int] = []
+    seen = set()
+
+    lines = [raw_line.strip() for raw_line in full_text.splitlines() if raw_line.strip()]
+    for index, line in enumerate(lines):
+        if CELL_SEPARATOR in line:
+            entity = parse_result_row(line.split(CELL_SEPARATOR))
+        else:
+            entity = parse_result_line(line)
+        if entity:
+            key = entity["Indicator"].lower()
+            if key not in seen:
+                seen.add(key)
+                resolved.append(entity)
+            continue
+
+        if any(ch.isdigit() for ch in line) and not METADATA_LINE.search(line):
+            unresolved.append(index)
+
+    with_context = sorted({
+        i for index in unresolved for i in range(max(0, index - CONTEXT_LINES), min(len(lines), index + CONTEXT_LINES + 1))
+    })
+    logger.info(
+        f"Local vitals parser resolved {len(resolved)} indicators, {len(unresolved)} lines left for the LLM "
+        f"({len(with_context)} with context)."
+    )
+    return resolved, [_without_reference_cells(lines[i]) for i in with_context]
+
+
+def _without_reference_cells(line: str) -> str:
+    if CELL_SEPARATOR not in line:
+        return line
+    return CELL_SEPARATOR.join(drop_reference_cells(line.split(CELL_SEPARATOR)))
@@ -1,7 +1,9 @@
 
+import time
 import requests
 import logging
 from app.core.config import settings
+from app.core.metrics import WHATSAPP_SEND_SECONDS
 
 logger = logging.getLogger(__name__)
 
@@ -44,15 +46,19 @@ def send_template_message(
             }
         ]
 
+    response = None
+    start = time.perf_counter()
     try:
         response = requests.post(api_url, headers=headers, json=payload)
         response.raise_for_status()
         
         logger.info(f"WhatsApp message sent to {phone_number}. Response: {response.json()}")
+        WHATSAPP_SEND_SECONDS.labels(template=template_name, status="sent").observe(time.perf_counter() - start)
         return True
     except requests.exceptions.RequestException as e:
         # Log the response text to see the exact error from Meta
-        error_msg = response.text if response else str(e)
+        error_msg = response.text if response is not None else str(e)
         logger.error(f"Failed to send WhatsApp message to {phone_number}: {e}")
         logger.error(f"Meta API Error Details: {error_msg}")
+        WHATSAPP_SEND_SECONDS.labels(template=template_name, status="failed").observe(time.perf_counter() - start)
         return False
\ No newline at end of file
@@ -0,0 +1,129 @@
+import logging
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from .celery_app import celery
+from .report_processing import JobStore, extract_vitals_with_gemini, generate_summary_with_gemini
+from app.core.config import settings
+from app.crud import crud_backfill
+from app.models.report import BackfillRunInDB
+from app.services.indicators import canonicalize_entities, compare_entities
+from app.services.units import annotate_values
+from app.services.rate_limiter import RateLimiter
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# --- Re-analysis Backfill ---
+# Re-runs vitals extraction (and optionally the summary) over the stored text
+# of selected reports. Each task handles one batch of `batch_size` reports,
+# `concurrency` at a time, checkpoints `last_id` and re-enqueues itself, so a
+# run can be paused, survives worker restarts and never holds a worker for
+# long. Every Gemini call, across all workers, goes through one rate limit.
+# Stored reports keep only their text, so layout rows aren't used here.
+
+model_limiter = RateLimiter("gemini-backfill", settings.BACKFILL_MODEL_CALLS_PER_MINUTE)
+
+
+def reanalyze(report: dict, run: BackfillRunInDB, token_usage: Dict[str, int]) -> Tuple[list, Optional[str]]:
+    """
+    The new (entities, summary) for one report; the summary is kept as is with
+    `skip_summary`. Raises rather than return an empty or partial result, so a
+    Gemini outage fails the report instead of overwriting its stored vitals.
+    """
+    text = report.get("raw_text") or ""
+    entities = extract_vitals_with_gemini(text, token_usage, limiter=model_limiter)
+    if not entities:
+        raise ValueError("Re-analysis found no vitals")
+    canonicalize_entities(entities)
+    annotate_values(entities)
+    if run.skip_summary:
+        return entities, report.get("simple_summary")
+    return entities, generate_summary_with_gemini(entities, text, token_usage, limiter=model_limiter)
+
+
+def run_backfill_batch(store: JobStore, run_id: str) -> bool:
+    """Processes the next batch of a run. Returns False once the run is finished or stopped."""
+    run = store.run(crud_backfill.get_run, run_id)
+    if run is None:
+        raise LookupError(f"Backfill run {run_id} not found.")
+    if run.status in ("paused", "completed", "failed"):
+        logger.info(f"Backfill {run_id} is {run.status}, not continuing.")
+        return False
+    if run.status == "queued":
+        store.run(crud_backfill.set_status, run_id, "running")
+
+    reports = store.run(crud_backfill.next_batch, run)
+    if not reports:
+        store.run(crud_backfill.set_status, run_id, "completed")
+        logger.info(f"✅ Backfill {run_id} completed: {run.processed} reports, {run.changed} changed, {run.failed} failed.")
+        return False
+
+    def analyze(report: dict) -> Dict[str, Any]:
+        usage: Dict[str, int] = {}
+        if not report.get("raw_text"):
+            return {"report": report, "error": "No stored text", "usage": usage}
+        try:
+            entities, summary = reanalyze(report, run, usage)
+            return {"report": report, "entities": entities, "summary": summary, "usage": usage}
+        except Exception as e:
+            logger.error(f"Backfill {run_id}: report {report['_id']} failed: {e}")
+            return {"report": report, "error": str(e), "usage": usage}
+
+    with ThreadPoolExecutor(max_workers=max(1, run.concurrency)) as pool:
+        results = list(pool.map(analyze, reports))
+
+    counts = {"processed": len(results), "changed": 0, "failed": 0}
+    token_usage: Dict[str, int] = {}
+    updates, failed_ids, samples = [], [], []
+    for result in results:
+        report = result["report"]
+        for key, value in result["usage"].items():
+            token_usage[key] = token_usage.get(key, 0) + value
+        if "error" in result:
+            counts["failed"] += 1
+            failed_ids.append(str(report["_id"]))
+            continue
+
+        diff = [row for row in compare_entities(report.get("structured_entities") or [], result["entities"])
+                if row["change"] != "same"]
+        if diff or result["summary"] != report.get("simple_summary"):
+            counts["changed"] += 1
+            samples.append({"report_id": str(report["_id"]), "vitals": diff,
+                            "summary_changed": result["summary"] != report.get("simple_summary")})
+        if not run.dry_run:
+            updates.append(UpdateOne({"_id": report["_id"]}, {"$set": {
+                "structured_entities": result["entities"],
+                "simple_summary": result["summary"],
+                "reanalyzed_at": datetime.now(),
+                "backfill_run_id": run_id,
+            }}))
+
+    user_ids = [str(result["report"].get("user_id")) for result in results if "error" not in result]
+    store.run(
+        crud_backfill.save_batch, run, reports[-1]["_id"], updates, user_ids, counts, failed_ids, samples, token_usage
+    )
+    logger.info(
+        f"Backfill {run_id}{' (dry run)' if run.dry_run else ''}: {counts['processed']} reports, "
+        f"{counts['changed']} changed, {counts['failed']} failed, up to {reports[-1]['_id']}."
+    )
+    return True  # The next call finds nothing left and marks the run completed
+
+
+@celery.task(bind=True)
+def task_backfill_reports(self, run_id: str):
+    """One batch per task; re-enqueues itself until the run is done or paused."""
+    store = JobStore()
+    try:
+        more = run_backfill_batch(store, run_id)
+    except Exception as e:
+        logger.error(f"Backfill {run_id} failed: {e}")
+        store.run(crud_backfill.set_status, run_id, "failed", error=str(e))
+        raise
+    finally:
+        store.close()
+    if more:
+        task_backfill_reports.delay(run_id)
@@ -1,11 +1,11 @@
 import ssl
-import asyncio
 import logging
 from celery import Celery
+from celery.signals import worker_init
 from celery.schedules import crontab
-from motor.motor_asyncio import AsyncIOMotorClient
 
 from app.core.config import settings
+from app.core.metrics import start_worker_exporter
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO)
@@ -20,7 +20,7 @@ celery = Celery(
     "app.tasks",
     broker=settings.REDIS_URL,
     backend=settings.REDIS_URL,
-    include=["app.tasks.reminder_tasks", "app.tasks.report_processing"]
+    include=["app.tasks.reminder_tasks", "app.tasks.report_processing", "app.tasks.backfill_tasks"]
 )
 
 celery.conf.update(
@@ -32,6 +32,11 @@ celery.conf.update(
     broker_use_ssl=ssl_options,
     redis_backend_use_ssl=ssl_options,
     broker_connection_retry_on_startup=True,
+    # Results live in MongoDB ('report_jobs'), not in the size-limited Redis.
+    # Only tasks that opt back in store a result, and it is a compact job
+    # reference that expires after RESULT_TTL_SECONDS.
+    task_ignore_result=True,
+    result_expires=settings.RESULT_TTL_SECONDS,
 )
 
 
@@ -41,54 +46,31 @@ TIMING_TO_CRONTAB = {
     "evening": crontab(hour=20, minute=0),
 }
 
-async def restore_reminders_from_db():
-    """
-    Async function to fetch all users and re-schedule their active daily reminders.
-    """
-    logger.info("♻️  Attempting to restore reminders from MongoDB...")
-    
-    client = AsyncIOMotorClient(settings.MONGO_URI)
-    db = client[settings.MONGO_DB_NAME]
-    
-    cursor = db["users"].find({"daily_reminders": {"$exists": True, "$not": {"$size": 0}}})
-    
-    count = 0
-    async for user in cursor:
-        user_id = str(user["_id"])
-        user_name = user.get("name", "User")
-        phone_number = user.get("phone_number")
-        
-        for reminder in user.get("daily_reminders", []):
-            if reminder.get("is_active", True):
-                medicine_name = reminder["medicine_name"]
-                timings = reminder["timings"] # List like ["morning", "evening"]
-                
-                from app.tasks.reminder_tasks import send_daily_reminder_task
-                
-                for timing in timings:
-                    if timing in TIMING_TO_CRONTAB:
-                        task_name = f"daily-reminder-{user_id}-{medicine_name}-{timing}"
-                        
-                        celery.add_periodic_task(
-                            TIMING_TO_CRONTAB[timing],
-                            send_daily_reminder_task.s(user_name, phone_number, medicine_name),
-                            name=task_name
-                        )
-                        count += 1
-                        
-    logger.info(f"✅ Successfully restored {count} daily reminder tasks from Database.")
-    client.close()
+# One beat entry per timing. The dispatcher reads the active reminders for that
+# timing from MongoDB at run time, so creating, updating or deactivating a
+# reminder never needs a beat restart or a per-reminder periodic task.
+celery.conf.beat_schedule = {
+    f"dispatch-daily-reminders-{timing}": {
+        "task": "app.tasks.reminder_tasks.dispatch_daily_reminders",
+        "schedule": schedule,
+        "args": (timing,),
+    }
+    for timing, schedule in TIMING_TO_CRONTAB.items()
+}
+
+# Refill reminders are stored with their due time (refill_date) and picked up by
+# a sweeper, instead of ETA tasks that would sit in the broker and in worker
+# memory for months and could not be rescheduled.
+celery.conf.beat_schedule["sweep-due-refill-reminders"] = {
+    "task": "app.tasks.reminder_tasks.sweep_due_refill_reminders",
+    "schedule": 60.0,
+}
+
 
-@celery.on_after_configure.connect
-def setup_periodic_tasks(sender, **kwargs):
-    """
-    This signal runs when the Celery worker (or beat) starts up.
-    It triggers the async restoration logic.
-    """
+@worker_init.connect
+def start_metrics_exporter(**kwargs):
+    """Exposes worker-side metrics (OCR, Gemini, WhatsApp, Mongo) when METRICS_ENABLED is set."""
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(restore_reminders_from_db())
-        loop.close()
+        start_worker_exporter()
     except Exception as e:
-        logger.error(f"❌ Failed to restore reminders on startup: {e}")
\ No newline at end of file
+        logger.error(f"❌ Failed to start worker metrics exporter: {e}")
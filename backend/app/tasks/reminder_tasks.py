@@ -1,11 +1,39 @@
 
+import uuid
+import asyncio
 import logging
+from datetime import datetime
+from celery import group
+from motor.motor_asyncio import AsyncIOMotorClient
+
 from .celery_app import celery
+from app.core.config import settings
+from app.core.metrics import mongo_client_kwargs
 from app.services import whatsapp_service
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+REMINDERS_COLLECTION = "reminders"
+REFILL_SWEEP_BATCH = 500
+
+
+def _run_with_reminders(work):
+    """Runs `await work(collection)` against the 'reminders' collection on a fresh event loop."""
+    async def runner():
+        client = AsyncIOMotorClient(settings.MONGO_URI, **mongo_client_kwargs())
+        try:
+            return await work(client[settings.MONGO_DB_NAME][REMINDERS_COLLECTION])
+        finally:
+            client.close()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(runner())
+    finally:
+        loop.close()
+
 
 @celery.task
 def send_daily_reminder_task(user_name: str, phone_number: str, medicine_name: str):
@@ -40,4 +68,72 @@ def send_refill_reminder_task(user_name: str, phone_number: str, medicine_name:
     if success:
         return f"Refill reminder sent to {user_name}."
     else:
-        return f"Failed to send refill reminder to {user_name}."
\ No newline at end of file
+        return f"Failed to send refill reminder to {user_name}."
+
+
+@celery.task
+def dispatch_daily_reminders(timing: str):
+    """
+    Runs from beat at each timing. Reads the active daily reminders for that
+    timing from the 'reminders' collection and fans out one send task each.
+    """
+    async def load_due_reminders(collection):
+        cursor = collection.find(
+            {"type": "daily", "is_active": True, "timings": timing},
+            {"user_name": 1, "phone_number": 1, "medicine_name": 1},
+        )
+        return [doc async for doc in cursor]
+
+    reminders = _run_with_reminders(load_due_reminders)
+
+    if reminders:
+        group(
+            send_daily_reminder_task.s(r.get("user_name", "User"), r["phone_number"], r["medicine_name"])
+            for r in reminders
+        ).apply_async()
+
+    logger.info(f"Dispatched {len(reminders)} '{timing}' daily reminders.")
+    return len(reminders)
+
+
+@celery.task
+def sweep_due_refill_reminders():
+    """
+    Runs from beat every minute. Claims active refill reminders whose
+    refill_date has passed, in batches, and fans out one send task each.
+
+    Claiming sets `refill_sent_at` and a per-sweep token in one update_many
+    guarded by `refill_sent_at: None`, so overlapping sweeps never send the
+    same reminder twice.
+    """
+    async def claim_due_reminders(collection):
+        now = datetime.utcnow()
+        due_query = {"type": "refill", "is_active": True, "refill_sent_at": None, "refill_date": {"$lte": now}}
+        claimed = []
+        while True:
+            ids = [doc["_id"] async for doc in collection.find(due_query, {"_id": 1}).limit(REFILL_SWEEP_BATCH)]
+            if not ids:
+                break
+            token = uuid.uuid4().hex
+            await collection.update_many(
+                {"_id": {"$in": ids}, "refill_sent_at": None},
+                {"$set": {"refill_sent_at": now, "refill_sweep_token": token}},
+            )
+            cursor = collection.find(
+                {"refill_sweep_token": token},
+                {"user_name": 1, "phone_number": 1, "medicine_name": 1},
+            )
+            claimed += [doc async for doc in cursor]
+            if len(ids) < REFILL_SWEEP_BATCH:
+                break
+        return claimed
+
+    reminders = _run_with_reminders(claim_due_reminders)
+
+    if reminders:
+        group(
+            send_refill_reminder_task.s(r.get("user_name", "User"), r["phone_number"], r["medicine_name"])
+            for r in reminders
+        ).apply_async()
+        logger.info(f"Dispatched {len(reminders)} due refill reminders.")
+    return len(reminders)
@@ -7,27 +7,51 @@ import numpy as np
 import pytesseract
 import fitz  # PyMuPDF
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from pdf2image import convert_from_path
-from typing import List, Dict, Any, Union, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from typing_extensions import TypedDict
+from pydantic import TypeAdapter, ValidationError
 import google.generativeai as genai
-import os
-import json
-
-from google.oauth2 import service_account
-import vertexai
-from vertexai.generative_models import GenerativeModel
 
+from celery import Task
 from motor.motor_asyncio import AsyncIOMotorClient
 from .celery_app import celery
 from app.core.config import settings
-from app.models.report import ReportCreate
+from app.core.metrics import (
+    timer, mongo_client_kwargs, OCR_STAGE_SECONDS, OCR_PAGE_SECONDS, OCR_PAGES, GEMINI_CALL_SECONDS, GEMINI_TOKENS
+)
+from app.crud import crud_report_job
+from app.models.report import ReportCreate, ReportJobInDB
+from app.services import layout, photo, page_dedup
+from app.services.vitals_parser import extract_vitals_locally
+from app.services.indicators import canonicalize_entities
+from app.services.units import annotate_values
+from app.services.rate_limiter import RateLimiter
+from app.services.report_text import PAGE_BREAK, prepare_report_text, chunk_text, estimate_tokens, rows_to_text
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 custom_config = r'--psm 6'
-
-# --- PDF & Image Processing Utilities (Unchanged) ---
+line_config = r'--psm 7'  # Single text line, for re-reading one low-confidence region
+
+# --- Adaptive OCR ---
+# With settings.OCR_ADAPTIVE, every page is first OCR'd at OCR_FAST_DPI and
+# Tesseract's per-word confidences (image_to_data) decide what happens next:
+#   - no low-confidence words: keep the fast result
+#   - a few low-confidence lines: re-render at OCR_FULL_DPI and re-read only those lines
+#   - a mostly unreadable page: re-OCR the whole page at OCR_FULL_DPI, then OCR_MAX_DPI
+# Clean scans never pay for 300 dpi; bad scans get more than 300 dpi.
+OCR_FAST_DPI = 200
+OCR_FULL_DPI = 300
+OCR_MAX_DPI = 400
+OCR_MIN_WORD_CONF = 60  # A line with any word below this is re-read
+OCR_MIN_PAGE_CONF = 75  # Mean word confidence below this re-OCRs the whole page
+OCR_MAX_LOW_CONF_LINES = 0.3  # Share of low-confidence lines above which the whole page is re-OCR'd
+OCR_REGION_PADDING = 4  # Pixels (at OCR_FAST_DPI) added around a line before cropping
+
+# --- PDF & Image Processing Utilities ---
 
 def pdf_to_cv2_objects(pdf_path: str, dpi: int = 300) -> List[np.ndarray]:
     cv2_images = []
@@ -43,6 +67,11 @@ def pdf_to_cv2_objects(pdf_path: str, dpi: int = 300) -> List[np.ndarray]:
         raise e
     return cv2_images
 
+def render_pdf_page(pdf_path: str, page_number: int, dpi: int) -> np.ndarray:
+    """Renders a single (1-based) page, for re-reading it at a higher DPI."""
+    page_image = convert_from_path(pdf_path, dpi=dpi, first_page=page_number, last_page=page_number)[0]
+    return cv2.cvtColor(np.array(page_image), cv2.COLOR_RGB2BGR)
+
 def preprocessor(cv2_image: np.ndarray) -> np.ndarray:
     # 1. Convert to Gray
     gray = cv2.cvtColor(cv2_image, cv2.COLOR_BGR2GRAY)
@@ -66,31 +95,241 @@ def preprocessor(cv2_image: np.ndarray) -> np.ndarray:
 def extract_text(processed_image: np.ndarray) -> str:
     return pytesseract.image_to_string(processed_image, lang="eng", config=custom_config)
 
-def extract_text_from_pdf(file_path: str) -> str:
+def extract_lines(processed_image: np.ndarray, config: str = custom_config) -> List[Dict[str, Any]]:
+    """
+    Runs Tesseract once via image_to_data and groups its words into lines:
+    {"block", "text", "confs", "words": [(x0, y0, x1, y1, word)], "box"} in reading order.
+    """
+    data = pytesseract.image_to_data(processed_image, lang="eng", config=config, output_type=pytesseract.Output.DICT)
+    lines: Dict[tuple, Dict[str, Any]] = {}
+    for i, word in enumerate(data["text"]):
+        conf = float(data["conf"][i])
+        if conf < 0 or not word.strip():
+            continue
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        left, top = data["left"][i], data["top"][i]
+        right, bottom = left + data["width"][i], top + data["height"][i]
+
+        line = lines.setdefault(key, {"block": key[0], "words": [], "confs": []})
+        line["words"].append((left, top, right, bottom, word))
+        line["confs"].append(conf)
+
+    for line in lines.values():
+        words = line["words"]
+        line["text"] = " ".join(w[4] for w in words)
+        line["box"] = (min(w[0] for w in words), min(w[1] for w in words), max(w[2] for w in words), max(w[3] for w in words))
+    return list(lines.values())
+
+def _mean_confidence(lines: List[Dict[str, Any]]) -> float:
+    confs = [conf for line in lines for conf in line["confs"]]
+    return sum(confs) / len(confs) if confs else 0.0
+
+def _is_low_confidence(line: Dict[str, Any]) -> bool:
+    return min(line["confs"]) < OCR_MIN_WORD_CONF
+
+def lines_to_text(lines: List[Dict[str, Any]]) -> str:
+    """Joins lines like image_to_string does: one per row, a blank line between blocks."""
+    output, previous_block = [], None
+    for line in lines:
+        if previous_block is not None and line["block"] != previous_block:
+            output.append("")
+        output.append(line["text"])
+        previous_block = line["block"]
+    return "\n".join(output)
+
+def reread_low_confidence_lines(lines: List[Dict[str, Any]], high_res_image: np.ndarray, scale: float) -> int:
+    """
+    Crops each low-confidence line out of the higher-DPI render and OCRs just
+    that strip. Replaces the line's text when the re-read is more confident.
+    Returns the number of lines replaced.
+    """
+    height, width = high_res_image.shape[:2]
+    replaced = 0
+    for line in lines:
+        if not _is_low_confidence(line):
+            continue
+        left, top, right, bottom = line["box"]
+        crop_left = max(0, int((left - OCR_REGION_PADDING) * scale))
+        crop_top = max(0, int((top - OCR_REGION_PADDING) * scale))
+        crop = high_res_image[
+            crop_top:min(height, int((bottom + OCR_REGION_PADDING) * scale)),
+            crop_left:min(width, int((right + OCR_REGION_PADDING) * scale)),
+        ]
+        if crop.size == 0:
+            continue
+
+        region = extract_lines(preprocessor(crop), config=line_config)
+        if region and _mean_confidence(region) > _mean_confidence([line]):
+            line["text"] = " ".join(r["text"] for r in region)
+            line["confs"] = [conf for r in region for conf in r["confs"]]
+            # Back to page coordinates at the original DPI, for the layout stage.
+            line["words"] = [
+                ((crop_left + x0) / scale, (crop_top + y0) / scale, (crop_left + x1) / scale, (crop_top + y1) / scale, word)
+                for r in region for x0, y0, x1, y1, word in r["words"]
+            ]
+            replaced += 1
+    return replaced
+
+def ocr_page_fixed(image: np.ndarray) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    """Single Tesseract pass. Returns (lines, the binarized image their boxes refer to)."""
+    with timer(OCR_STAGE_SECONDS, stage="preprocessor"):
+        processed_image = preprocessor(image)
+    with timer(OCR_STAGE_SECONDS, stage="extract_text"):
+        lines = extract_lines(processed_image)
+    return lines, processed_image
+
+def ocr_page_adaptive(pdf_path: str, page_number: int, fast_image: np.ndarray) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    """
+    OCRs one page rendered at OCR_FAST_DPI, escalating DPI only where Tesseract
+    is unsure. Returns (lines, the binarized image their boxes refer to).
+    """
+    lines, processed_image = ocr_page_fixed(fast_image)
+
+    low_lines = sum(1 for line in lines if _is_low_confidence(line))
+    if lines and not low_lines:
+        return lines, processed_image
+
+    mostly_unreadable = (
+        not lines
+        or _mean_confidence(lines) < OCR_MIN_PAGE_CONF
+        or low_lines / len(lines) > OCR_MAX_LOW_CONF_LINES
+    )
+
+    if not mostly_unreadable:
+        with timer(OCR_STAGE_SECONDS, stage="render_high_dpi"):
+            high_res_image = render_pdf_page(pdf_path, page_number, OCR_FULL_DPI)
+        with timer(OCR_STAGE_SECONDS, stage="reread_regions"):
+            replaced = reread_low_confidence_lines(lines, high_res_image, OCR_FULL_DPI / OCR_FAST_DPI)
+        logger.info(f"Page {page_number}: re-read {replaced}/{low_lines} low-confidence lines at {OCR_FULL_DPI} dpi.")
+        return lines, processed_image
+
+    best = lines, processed_image
+    for dpi in (OCR_FULL_DPI, OCR_MAX_DPI):
+        logger.info(f"Page {page_number}: low OCR confidence ({_mean_confidence(best):.0f}), re-running at {dpi} dpi.")
+        with timer(OCR_STAGE_SECONDS, stage="render_high_dpi"):
+            image = render_pdf_page(pdf_path, page_number, dpi)
+        candidate = ocr_page_fixed(image)
+
+        if not candidate[0]:
+            break  # Nothing legible at this resolution either (e.g. a blank page)
+        if _mean_confidence(candidate[0]) > _mean_confidence(best[0]):
+            best = candidate
+        if _mean_confidence(best[0]) >= OCR_MIN_PAGE_CONF:
+            break
+    return best
+
+def ocr_page(pdf_path: str, page_number: int, image: np.ndarray) -> page_dedup.Page:
+    """OCR text and layout rows for one rendered page."""
+    with timer(OCR_PAGE_SECONDS):
+        if settings.OCR_ADAPTIVE:
+            lines, processed_image = ocr_page_adaptive(pdf_path, page_number, image)
+        else:
+            lines, processed_image = ocr_page_fixed(image)
+        with timer(OCR_STAGE_SECONDS, stage="layout"):
+            words = [word for line in lines for word in line["words"]]
+            rows = layout.rows_from_ocr_words(words, processed_image)
+    return lines_to_text(lines), rows
+
+def extract_layout_from_pdf(file_path: str, ocr_stats: Optional[Dict[str, int]] = None) -> Tuple[str, List[List[List[str]]]]:
+    """
+    Returns (full_text, layout_rows). layout_rows holds, per page, the table
+    rows recovered by the layout stage as lists of cell strings.
+
+    Scanned pages that repeat an earlier page of the document (or, with
+    OCR_PAGE_CACHE, a known boilerplate page) reuse its text instead of being
+    OCR'd; `ocr_stats` gets the page counts by source.
+    """
     text = ""
+    layout_rows: List[List[List[str]]] = []
     try:
         logger.info(f"Attempting direct text extraction for {file_path}...")
         with fitz.open(file_path) as doc:
-            for page in doc:
-                text += page.get_text()
+            text = PAGE_BREAK.join(page.get_text() for page in doc)
+            if len(text.strip()) >= 50:
+                with timer(OCR_STAGE_SECONDS, stage="layout"):
+                    layout_rows = [layout.rows_from_pdf_page(page) for page in doc]
         
         if len(text.strip()) < 50:
             logger.info("Text too short. Likely scanned. Switching to OCR.")
             raise ValueError("Likely Scanned PDF")
     except Exception:
         logger.info(f"Running Tesseract OCR pipeline on {file_path}")
-        full_ocr_text = []
+        full_ocr_text, layout_rows = [], []
+        stats = {"pages": 0, "ocr": 0, "duplicate": 0, "cached": 0, "near_duplicate": 0}
+        seen = page_dedup.DocumentPages()
+        cache = page_dedup.page_text_cache if settings.OCR_PAGE_CACHE else None
         try:
-            cv2_images = pdf_to_cv2_objects(file_path, dpi=300)
+            with timer(OCR_STAGE_SECONDS, stage="pdf_to_cv2_objects"):
+                cv2_images = pdf_to_cv2_objects(file_path, dpi=OCR_FAST_DPI if settings.OCR_ADAPTIVE else OCR_FULL_DPI)
             for i, image in enumerate(cv2_images):
-                processed_image = preprocessor(image)
-                page_text = extract_text(processed_image)
-                full_ocr_text.append(page_text)
-            text = "\n".join(full_ocr_text)
+                with timer(OCR_STAGE_SECONDS, stage="fingerprint"):
+                    fingerprint = page_dedup.fingerprint(image)
+                    page, source = seen.find(fingerprint), "duplicate"
+                    if page is None and cache:
+                        page, source = cache.lookup(fingerprint), "cached"
+                if page is None:
+                    page, source = ocr_page(file_path, i + 1, image), "ocr"
+                    if cache:
+                        cache.record(fingerprint, page)
+                seen.add(fingerprint, page)
+
+                stats["pages"] += 1
+                stats[source] += 1
+                OCR_PAGES.labels(source=source).inc()
+                full_ocr_text.append(page[0])
+                layout_rows.append(page[1])
+            text = PAGE_BREAK.join(full_ocr_text)
+
+            stats["near_duplicate"] = seen.near_duplicates
+            if stats["ocr"] < stats["pages"]:
+                logger.info(f"Skipped OCR for {stats['pages'] - stats['ocr']}/{stats['pages']} pages of {file_path}: {stats}")
+            if ocr_stats is not None:
+                ocr_stats.update(stats)
         except Exception as e:
             logger.error(f"OCR extraction failed: {e}")
             raise e
-    return text
+    return text, layout_rows
+
+def extract_text_from_pdf(file_path: str) -> str:
+    return extract_layout_from_pdf(file_path)[0]
+
+def extract_layout_from_image(file_path: str) -> Tuple[str, List[List[List[str]]]]:
+    """
+    Direct path for photo and image uploads: the image is prepared for OCR
+    (see services/photo.py) instead of being wrapped in a PDF and
+    re-rasterized. A doubtful first pass is retried once with larger text.
+    """
+    logger.info(f"Running photo OCR pipeline on {file_path}")
+    with timer(OCR_STAGE_SECONDS, stage="load_image"):
+        image = photo.load_image(file_path)
+
+    best, previous_scale = None, None
+    with timer(OCR_PAGE_SECONDS):
+        for text_height in (photo.TARGET_TEXT_HEIGHT, photo.MAX_TEXT_HEIGHT):
+            with timer(OCR_STAGE_SECONDS, stage="prepare_photo"):
+                prepared, scale = photo.prepare_photo(image, text_height)
+            if scale == previous_scale:
+                break  # Already at full resolution; a second pass would read the same pixels
+            candidate = ocr_page_fixed(prepared)
+            if best is None or _mean_confidence(candidate[0]) > _mean_confidence(best[0]):
+                best = candidate
+            if not settings.OCR_ADAPTIVE or _mean_confidence(best[0]) >= OCR_MIN_PAGE_CONF:
+                break
+            previous_scale = scale
+            logger.info(f"Low OCR confidence ({_mean_confidence(best[0]):.0f}) on photo, retrying with larger text.")
+
+        lines, processed_image = best
+        with timer(OCR_STAGE_SECONDS, stage="layout"):
+            words = [word for line in lines for word in line["words"]]
+            layout_rows = [layout.rows_from_ocr_words(words, processed_image)]
+    return lines_to_text(lines), layout_rows
+
+def extract_layout(
+    file_path: str, content_type: str = "application/pdf", ocr_stats: Optional[Dict[str, int]] = None
+) -> Tuple[str, List[List[List[str]]]]:
+    if content_type.startswith("image/"):
+        return extract_layout_from_image(file_path)
+    return extract_layout_from_pdf(file_path, ocr_stats)
 
 
 # --- NEW: Gemini Extraction Function ---
@@ -104,67 +343,170 @@ else:
     logger.error("CRITICAL: GEMINI_FREE_API_KEY is missing from settings!")
 
 
-def extract_vitals_with_gemini(full_text: str) -> list:
-    try:
-        # gemini-2.5-flash is faster and great for extraction
-        model = genai.GenerativeModel('gemini-2.5-flash', generation_config={"response_mime_type": "application/json"})
-        
-        prompt = f"""
-        You are an expert medical data extractor. 
-        Analyze the following medical report text and extract the medical test results.
-
-        REPORT TEXT:
-        "{full_text}"
-
-        INSTRUCTIONS:
-        1. Identify specific medical tests and their measured values.
-        2. Combine the numeric value and the unit into the "Value" field (e.g., "14.2 g/dL").
-        3. IGNORE reference ranges, dates, patient IDs, page numbers, QR codes, and scanner metadata.
-        4. IGNORE normal/abnormal flags (like "High", "Low").
-        5. Return ONLY a valid JSON array of objects.
-        6. Each object must have exactly two keys: "Indicator" (the test name) and "Value" (the result).
-
-        Example Output Format:
-        [
-            {{"Indicator": "Hemoglobin", "Value": "12.5 g/dL"}},
-            {{"Indicator": "RBC Count", "Value": "4.5 mill/mm3"}}
-        ]
-        """
-        
-        response = model.generate_content(prompt)
+class VitalEntry(TypedDict):
+    Indicator: str
+    Value: str
+
+# Strict schema shared by Gemini (response_schema) and our own validation.
+vitals_adapter = TypeAdapter(List[VitalEntry])
+
+VITALS_LLM_ATTEMPTS = 2  # First call + one retry on a malformed response
+VITALS_CHUNK_MAX_CHARS = 6000  # ~1.5k tokens of report text per extraction call
+VITALS_CHUNK_WORKERS = 4
+SUMMARY_CONTEXT_MAX_CHARS = 4000
+
+
+def _record_usage(token_usage: Optional[Dict[str, int]], response, purpose: str) -> None:
+    """Adds Gemini's reported token counts for one call to the per-report tally and metrics."""
+    usage = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
+    output_tokens = getattr(usage, "candidates_token_count", 0) or 0
+
+    GEMINI_TOKENS.labels(purpose=purpose, kind="prompt").inc(prompt_tokens)
+    GEMINI_TOKENS.labels(purpose=purpose, kind="output").inc(output_tokens)
+
+    if token_usage is None:
+        return
+    token_usage["llm_calls"] = token_usage.get("llm_calls", 0) + 1
+    token_usage["prompt_tokens"] = token_usage.get("prompt_tokens", 0) + prompt_tokens
+    token_usage["output_tokens"] = token_usage.get("output_tokens", 0) + output_tokens
+
+
+def _request_vitals_from_gemini(
+    report_text: str, token_usage: Optional[Dict[str, int]] = None, limiter: Optional[RateLimiter] = None
+) -> List[Dict[str, str]]:
+    """
+    Sends the (partial) report text to Gemini with a strict JSON response schema.
+    Malformed responses are retried once before giving up.
+    """
+    model = genai.GenerativeModel(
+        'gemini-2.5-flash',
+        generation_config={
+            "response_mime_type": "application/json",
+            "response_schema": List[VitalEntry],
+        }
+    )
 
-        raw_response = response.text.strip()
-        clean_json = raw_response.replace("```json", "").replace("```", "").strip()
-        
-        extracted_data = json.loads(clean_json)
-        return extracted_data
-    except Exception as e:
-        logger.error(f"Extraction failed: {e}")
-        return []
+    prompt = f"""
+    You are an expert medical data extractor. 
+    Analyze the following medical report text and extract the medical test results.
+
+    REPORT TEXT:
+    "{report_text}"
+
+    INSTRUCTIONS:
+    1. Identify specific medical tests and their measured values.
+    2. Combine the numeric value and the unit into the "Value" field (e.g., "14.2 g/dL").
+    3. IGNORE reference ranges, dates, patient IDs, page numbers, QR codes, and scanner metadata.
+    4. IGNORE normal/abnormal flags (like "High", "Low").
+    5. Each object must have exactly two keys: "Indicator" (the test name) and "Value" (the result).
+    6. Lines containing " | " are table rows; their cells are usually test, value, unit.
+    """
+
+    for attempt in range(1, VITALS_LLM_ATTEMPTS + 1):
+        if limiter:
+            limiter.acquire()
+        with timer(GEMINI_CALL_SECONDS, purpose="vitals"):
+            response = model.generate_content(prompt)
+        _record_usage(token_usage, response, "vitals")
+        try:
+            return [dict(entry) for entry in vitals_adapter.validate_json(response.text)]
+        except ValidationError as e:
+            logger.warning(f"Gemini returned invalid vitals JSON (attempt {attempt}/{VITALS_LLM_ATTEMPTS}): {e}")
+
+    raise ValueError("Gemini did not return valid vitals JSON after retrying.")
+
+
+def _merge_vitals(vitals: List[Dict[str, str]], new_vitals: List[Dict[str, str]]) -> None:
+    """Appends new indicators in place, skipping names we already have."""
+    seen = {entry["Indicator"].lower() for entry in vitals}
+    for entry in new_vitals:
+        if entry["Indicator"].lower() not in seen:
+            seen.add(entry["Indicator"].lower())
+            vitals.append(entry)
+
+
+def extract_vitals_with_gemini(
+    full_text: str,
+    token_usage: Optional[Dict[str, int]] = None,
+    layout_rows: Optional[List[List[List[str]]]] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> list:
+    """
+    Runs the local regex parser first and only sends the lines it could not
+    resolve to Gemini. Reports where every result line is parsed locally
+    never reach the LLM. Large leftovers are split into chunks that are
+    extracted concurrently and merged in report order.
+
+    When the layout stage recovered table rows, those compact rows are parsed
+    (and sent) instead of the flattened text. `limiter` throttles every Gemini call.
+    """
+    prepared_text = prepare_report_text(rows_to_text(layout_rows) if layout_rows else full_text)
+    vitals, unresolved_lines = extract_vitals_locally(prepared_text)
+
+    if not unresolved_lines:
+        return vitals
+
+    chunks = chunk_text("\n".join(unresolved_lines), VITALS_CHUNK_MAX_CHARS)
+    logger.info(f"Sending {len(chunks)} chunk(s), ~{sum(estimate_tokens(c) for c in chunks)} tokens, to Gemini for extraction.")
+
+    # One tally per chunk so worker threads never share a dict.
+    chunk_usages = [{} for _ in chunks]
+
+    def run_chunk(index: int) -> List[Dict[str, str]]:
+        # A failed chunk fails the stage: checkpointing partial vitals would stop the retry from ever re-running it.
+        try:
+            return _request_vitals_from_gemini(chunks[index], chunk_usages[index], limiter)
+        except Exception as e:
+            logger.error(f"Extraction failed for chunk {index + 1}/{len(chunks)}: {e}")
+            raise
 
-def generate_summary_with_gemini(entities: list, full_text: str) -> str:
-    try:
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        prompt = f"""
-        You are a helpful medical assistant using Vitalyze.ai. 
-        
-        Based on these extracted test results:
-        {json.dumps(entities)}
+    with ThreadPoolExecutor(max_workers=min(VITALS_CHUNK_WORKERS, len(chunks))) as executor:
+        for chunk_vitals in executor.map(run_chunk, range(len(chunks))):
+            _merge_vitals(vitals, chunk_vitals)
 
-        And this raw report text context:
-        "{full_text[:2000]}..."
+    if token_usage is not None:
+        for usage in chunk_usages:
+            for key, count in usage.items():
+                token_usage[key] = token_usage.get(key, 0) + count
 
-        Write a simple, comforting summary for the patient.
-        1. Mention the key findings in plain English.
-        2. Briefly explain what the tests are for (e.g., "Hemoglobin carries oxygen").
-        3. Do not use complex jargon.
-        4. End with a disclaimer that you are an AI.
-        """
+    return vitals
 
+def generate_summary_with_gemini(
+    entities: list, full_text: str, token_usage: Optional[Dict[str, int]] = None, limiter: Optional[RateLimiter] = None
+) -> str:
+    """Raises when Gemini fails or returns nothing, so the stage is retried instead of saving a placeholder."""
+    model = genai.GenerativeModel('gemini-2.5-flash')
+
+    # Results are already in `entities`; the text is only context, so cap it
+    # at a line boundary after boilerplate has been removed.
+    context_chunks = chunk_text(prepare_report_text(full_text), SUMMARY_CONTEXT_MAX_CHARS)
+    context_text = context_chunks[0] if context_chunks else ""
+
+    prompt = f"""
+    You are a helpful medical assistant using Vitalyze.ai. 
+    
+    Based on these extracted test results:
+    {json.dumps([{"Indicator": e.get("Indicator"), "Value": e.get("Value")} for e in entities])}
+
+    And this raw report text context:
+    "{context_text}"
+
+    Write a simple, comforting summary for the patient.
+    1. Mention the key findings in plain English.
+    2. Briefly explain what the tests are for (e.g., "Hemoglobin carries oxygen").
+    3. Do not use complex jargon.
+    4. End with a disclaimer that you are an AI.
+    """
+
+    if limiter:
+        limiter.acquire()
+    with timer(GEMINI_CALL_SECONDS, purpose="summary"):
         response = model.generate_content(prompt)
-        return response.text
-    except Exception as e:
-        return "Summary generation failed."
+    _record_usage(token_usage, response, "summary")
+    if not response.text.strip():
+        raise ValueError("Gemini returned an empty summary.")
+    return response.text
 
 # def extract_vitals_with_gemini(full_text: str) -> List[Dict[str, str]]:
 #     """
@@ -264,77 +606,169 @@ def generate_summary_with_gemini(entities: list, full_text: str) -> str:
 
 
 # --- Celery Tasks ---
+# The pipeline is extract -> vitals -> summary -> persist. Every stage saves
+# its output to the job's 'report_jobs' document before the next one starts.
+# Tasks retry with exponential backoff and skip the stages that are already
+# done, so a retry never repeats the OCR or the paid LLM calls.
+# Payloads stay in Mongo. The result backend only ever holds the final
+# task's compact job reference; /reports/status reads the job record.
 
-@celery.task(bind=True)
-def task_extract_data_from_pdf(self, file_path: str) -> Dict[str, Any]:
-    logger.info(f"Starting data extraction for: {file_path}")
-    try:
-        extracted_text = extract_text_from_pdf(file_path)
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        return {"full_text": extracted_text}
-    except Exception as e:
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        raise e
+PIPELINE_MAX_RETRIES = 3
+PIPELINE_RETRY_BACKOFF_MAX = 300  # seconds
 
 
-@celery.task(bind=True)
-def task_run_ai_analysis(self, extraction_result: Union[Dict, str], user_id: str, filename: str, gcs_path: Optional[str] = None):
-    logger.info(f"Starting AI analysis for User: {user_id}")
-    
-    text_to_analyze = ""
-    if isinstance(extraction_result, dict):
-        text_to_analyze = extraction_result.get("full_text", "")
-    else:
-        text_to_analyze = str(extraction_result)
-
-    if not text_to_analyze:
-        return {"error": "No text provided"}
-
-    # --- STEP 1: Extract Clean Data using Gemini ---
-    # We replaced the Regex/Google NLP with this single intelligent call.
-    vital_indicators = extract_vitals_with_gemini(text_to_analyze)
-    
-    # --- STEP 2: Generate Summary based on that data ---
-    simple_summary = generate_summary_with_gemini(vital_indicators, text_to_analyze)
-    
-    # 3. Save to DB
-    async def save_to_db():
+class JobNotFound(LookupError):
+    pass
+
+
+# Retrying cannot fix these: the job or the uploaded file is gone.
+PIPELINE_PERMANENT_ERRORS = (JobNotFound, FileNotFoundError, photo.UnreadableImageError)
+
+
+class JobStore:
+    """
+    Synchronous access to crud_report_job for a task run: one event loop and
+    one Mongo client, reused for every checkpoint the run writes.
+    """
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.client = AsyncIOMotorClient(settings.MONGO_URI, **mongo_client_kwargs())
+        self.db = self.client[settings.MONGO_DB_NAME]
+
+    def run(self, crud_function, *args, **kwargs):
+        return self.loop.run_until_complete(crud_function(self.db, *args, **kwargs))
+
+    def load(self, job_id: str) -> ReportJobInDB:
+        job = self.run(crud_report_job.get_job, job_id)
+        if job is None:
+            raise JobNotFound(f"Report job {job_id} not found.")
+        return job
+
+    def close(self):
+        self.client.close()
+        self.loop.close()
+
+
+class ReportPipelineTask(Task):
+    """Keeps the job document's status in step with Celery's retries and final failure."""
+
+    def _set_status(self, args, kwargs, status: str, exc: Exception, count_attempt: bool):
+        job_id = args[0] if args else kwargs.get("job_id")
+        store = JobStore()
         try:
-            client = AsyncIOMotorClient(settings.MONGO_URI)
-            db = client[settings.MONGO_DB_NAME]
-            
+            store.run(crud_report_job.set_status, job_id, status, error=str(exc), count_attempt=count_attempt)
+        except Exception as e:
+            logger.error(f"Could not record '{status}' for job {job_id}: {e}")
+        finally:
+            store.close()
+
+    def on_retry(self, exc, task_id, args, kwargs, einfo):
+        logger.warning(f"{self.name} failed for job {args[0] if args else kwargs}, retrying: {exc}")
+        self._set_status(args, kwargs, "retrying", exc, count_attempt=True)
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        self._set_status(args, kwargs, "failed", exc, count_attempt=True)
+
+
+pipeline_task_options = dict(
+    bind=True,
+    base=ReportPipelineTask,
+    autoretry_for=(Exception,),
+    dont_autoretry_for=PIPELINE_PERMANENT_ERRORS,
+    max_retries=PIPELINE_MAX_RETRIES,
+    retry_backoff=True,
+    retry_backoff_max=PIPELINE_RETRY_BACKOFF_MAX,
+)
+
+
+@celery.task(**pipeline_task_options)
+def task_extract_data_from_pdf(self, job_id: str) -> str:
+    """Stage 1: text + layout extraction (PDF or image). Returns the job ID for the next task in the chain."""
+    store = JobStore()
+    try:
+        job = store.load(job_id)
+        if crud_report_job.STAGE_EXTRACT in job.completed_stages:
+            logger.info(f"Job {job_id}: extraction already checkpointed, skipping.")
+            return job_id
+
+        logger.info(f"Starting data extraction for: {job.file_path}")
+        store.run(crud_report_job.set_status, job_id, "running")
+        ocr_stats: Dict[str, int] = {}
+        extracted_text, layout_rows = extract_layout(job.file_path, job.content_type, ocr_stats)
+        store.run(
+            crud_report_job.save_stage, job_id, crud_report_job.STAGE_EXTRACT,
+            {"extraction": {"full_text": extracted_text, "layout_rows": layout_rows, "ocr_stats": ocr_stats}},
+        )
+
+        # Only safe to drop the upload once its text is checkpointed.
+        if os.path.exists(job.file_path):
+            os.remove(job.file_path)
+        return job_id
+    finally:
+        store.close()
+
+
+@celery.task(**pipeline_task_options, ignore_result=False)
+def task_run_ai_analysis(self, job_id: str) -> dict:
+    """Stages 2-4: vitals, summary and persisting the report, each checkpointed."""
+    store = JobStore()
+    try:
+        job = store.load(job_id)
+        logger.info(f"Starting AI analysis for User: {job.user_id} (job {job_id})")
+
+        extraction = job.extraction or {}
+        text_to_analyze = extraction.get("full_text", "")
+        if not text_to_analyze:
+            store.run(crud_report_job.set_status, job_id, "failed", error="No text provided")
+            return {"job_id": job_id, "status": "failed"}
+
+        token_usage = job.token_usage or {
+            "report_chars": len(text_to_analyze), "report_tokens_estimate": estimate_tokens(text_to_analyze)
+        }
+
+        # --- STEP 1: Extract Clean Data (local parser first, Gemini for the rest) ---
+        vital_indicators = job.vitals
+        if crud_report_job.STAGE_VITALS not in job.completed_stages:
+            vital_indicators = extract_vitals_with_gemini(text_to_analyze, token_usage, extraction.get("layout_rows"))
+            # Codes and parsed numbers are resolved once here, so comparisons
+            # and trends never re-match names or re-parse value strings.
+            canonicalize_entities(vital_indicators)
+            annotate_values(vital_indicators)
+            store.run(
+                crud_report_job.save_stage, job_id, crud_report_job.STAGE_VITALS,
+                {"vitals": vital_indicators, "token_usage": token_usage},
+            )
+
+        # --- STEP 2: Generate Summary based on that data ---
+        simple_summary = job.summary
+        if crud_report_job.STAGE_SUMMARY not in job.completed_stages:
+            simple_summary = generate_summary_with_gemini(vital_indicators, text_to_analyze, token_usage)
+            store.run(
+                crud_report_job.save_stage, job_id, crud_report_job.STAGE_SUMMARY,
+                {"summary": simple_summary, "token_usage": token_usage},
+            )
+
+        logger.info(f"Token usage for report '{job.filename}': {token_usage}")
+
+        # --- STEP 3: Save to DB (raises, and so retries, on failure) ---
+        if crud_report_job.STAGE_PERSIST not in job.completed_stages:
             report_in = ReportCreate(
-                user_id=user_id,
-                filename=filename,
-                raw_text=text_to_analyze,
+                user_id=job.user_id,
+                filename=job.filename,
                 simple_summary=simple_summary,
                 # Store the clean indicators as the 'structured_entities' so the frontend works automatically
                 structured_entities=vital_indicators,
-                file_storage_path=gcs_path
+                file_storage_path=job.gcs_path
             )
-            
-            await db["reports"].insert_one(report_in.model_dump(by_alias=True, exclude=["id"]))
-            client.close()
-            return True
-        except Exception as db_err:
-            logger.error(f"Database Save Failed: {db_err}")
-            return False
+            store.run(crud_report_job.persist_report, job_id, report_in, text_to_analyze)
+            # The text now lives in 'report_texts'; the job no longer needs its copy.
+            store.run(
+                crud_report_job.save_stage, job_id, crud_report_job.STAGE_PERSIST, {},
+                status="completed", drop=("extraction",),
+            )
+    finally:
+        store.close()
 
-    try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(save_to_db())
-        loop.close()
-    except Exception as e:
-        logger.error(f"Async Loop Failed: {e}")
-
-    # Return structure matching what your frontend expects
-    return {
-        "status": "COMPLETED",
-        # We populate both keys with the clean data to ensure frontend compatibility
-        "structured_entities": vital_indicators,
-        "vital_indicators": vital_indicators,
-        "simple_summary": simple_summary
-    }
\ No newline at end of file
+    # The report itself is in Mongo under the same ID; keep the backend entry tiny.
+    return {"job_id": job_id, "status": "completed"}
@@ -0,0 +1,18 @@
+from celery import Signature
+
+from .celery_app import celery
+
+# --- Task Signatures for the API Process ---
+# The API only needs to *send* tasks. Building signatures by name keeps the
+# task modules (and their OCR/Gemini/WhatsApp dependencies) out of the API
+# process; only the worker imports them, via `include` in celery_app.
+
+EXTRACT_DATA_FROM_PDF = "app.tasks.report_processing.task_extract_data_from_pdf"
+RUN_AI_ANALYSIS = "app.tasks.report_processing.task_run_ai_analysis"
+BACKFILL_REPORTS = "app.tasks.backfill_tasks.task_backfill_reports"
+SEND_DAILY_REMINDER = "app.tasks.reminder_tasks.send_daily_reminder_task"
+SEND_REFILL_REMINDER = "app.tasks.reminder_tasks.send_refill_reminder_task"
+
+
+def task_signature(name: str, *args, **kwargs) -> Signature:
+    return celery.signature(name, args=args, kwargs=kwargs)
@@ -0,0 +1,114 @@
+import sys
+import os
+import json
+import argparse
+import logging
+from datetime import datetime
+
+# 1. SETUP PATH
+sys.path.append(os.getcwd())
+
+from app.crud import crud_backfill
+from app.models.report import BackfillFilters, BackfillRunInDB
+from app.tasks import report_processing
+from app.tasks.backfill_tasks import run_backfill_batch
+from app.tasks.signatures import BACKFILL_REPORTS, task_signature
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Re-analyses stored reports (vitals, and the summary unless --skip-summary)
+# from their saved text. Runs are dry by default: they record how many reports
+# would change, with a few sample diffs, and write nothing until --execute.
+# A run is checkpointed after every batch and can be paused and resumed.
+#
+# Usage (from backend/):
+#   python backfill_reports.py --missing-codes                  # dry run on the Celery workers
+#   python backfill_reports.py --user-id <id> --execute
+#   python backfill_reports.py --status <run_id>
+#   python backfill_reports.py --pause <run_id>
+#   python backfill_reports.py --resume <run_id>
+#   python backfill_reports.py --inline --stub-model --limit-ids <id> <id>   # in-process, no Gemini calls
+
+
+def _date(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def print_run(run: BackfillRunInDB):
+    print(json.dumps(run.model_dump(by_alias=True), default=str, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-run AI analysis over stored reports in throttled, resumable batches.")
+    parser.add_argument("--user-id")
+    parser.add_argument("--limit-ids", nargs="+", default=[], metavar="REPORT_ID", help="Only these reports")
+    parser.add_argument("--uploaded-after", type=_date)
+    parser.add_argument("--uploaded-before", type=_date)
+    parser.add_argument("--missing-codes", action="store_true", help="Only reports saved without indicator codes")
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--skip-summary", action="store_true")
+    parser.add_argument("--execute", action="store_true", help="Write the results (default is a dry run)")
+    parser.add_argument("--inline", action="store_true", help="Process in this process instead of on the workers")
+    parser.add_argument("--stub-model", action="store_true", help="Use the benchmark Gemini fake (with --inline)")
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument("--resume", metavar="RUN_ID")
+    action.add_argument("--pause", metavar="RUN_ID")
+    action.add_argument("--status", metavar="RUN_ID")
+    args = parser.parse_args()
+
+    if args.stub_model:
+        from benchmarks.fakes import FakeGeminiModel
+        report_processing.genai.GenerativeModel = FakeGeminiModel
+
+    store = report_processing.JobStore()
+    try:
+        if args.status or args.pause:
+            run_id = args.status or args.pause
+            if args.pause:
+                store.run(crud_backfill.set_status, run_id, "paused")
+                logger.info(f"Backfill {run_id} will stop after its current batch.")
+            run = store.run(crud_backfill.get_run, run_id)
+            if run is None:
+                sys.exit(f"Backfill run {run_id} not found.")
+            print_run(run)
+            return
+
+        if args.resume:
+            run_id = args.resume
+            if store.run(crud_backfill.get_run, run_id) is None:
+                sys.exit(f"Backfill run {run_id} not found.")
+            store.run(crud_backfill.set_status, run_id, "running")
+        else:
+            run = BackfillRunInDB(
+                filters=BackfillFilters(
+                    user_id=args.user_id,
+                    report_ids=args.limit_ids,
+                    uploaded_after=args.uploaded_after,
+                    uploaded_before=args.uploaded_before,
+                    missing_codes=args.missing_codes,
+                ),
+                dry_run=not args.execute,
+                skip_summary=args.skip_summary,
+                batch_size=args.batch_size,
+                concurrency=args.concurrency,
+            )
+            store.run(crud_backfill.create_run, run)
+            run_id = str(run.id)
+            remaining = store.run(crud_backfill.count_remaining, run)
+            logger.info(f"Backfill {run_id}: {remaining} reports selected{'' if args.execute else ' (dry run)'}.")
+
+        if args.inline:
+            while run_backfill_batch(store, run_id):
+                pass
+            print_run(store.run(crud_backfill.get_run, run_id))
+        else:
+            task_signature(BACKFILL_REPORTS, run_id).delay()
+            logger.info(f"Backfill {run_id} queued. Check it with: python backfill_reports.py --status {run_id}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
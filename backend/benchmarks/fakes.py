@@ -0,0 +1,386 @@
+import re
+import json
+import math
+import time
+import asyncio
+from types import SimpleNamespace
+
+import redis
+from bson import ObjectId
+from pymongo import InsertOne, UpdateOne, DeleteOne
+
+# --- Fake External Backends for Benchmarks ---
+# Stand-ins for Gemini, WhatsApp, Maps providers and MongoDB so the pipeline
+# can be timed in-process without network access or API keys. Each fake can
+# simulate a fixed latency to model the real service.
+
+# Settings() requires these; benchmarks never talk to the real services.
+DUMMY_ENV = {
+    "MONGO_URI": "mongodb://localhost:27017",
+    "MONGO_DB_NAME": "vitalyze_bench",
+    "REDIS_URL": "redis://localhost:6379/0",
+    "SECRET_KEY": "bench-secret",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "60",
+    "WHATSAPP_API_VERSION": "v19.0",
+    "WHATSAPP_ACCESS_TOKEN": "bench",
+    "WHATSAPP_PHONE_NUMBER_ID": "0",
+    "WHATSAPP_VERIFY_TOKEN": "bench",
+    "GOOGLE_MAPS_API_KEY": "bench",
+    "GEMINI_FREE_API_KEY": "bench",
+    "GCP_PROJECT_ID": "bench",
+    "GCP_LOCATION": "us-central1",
+    "GOOGLE_APPLICATION_CREDENTIALS": "/nonexistent/bench.json",
+    "OSM_API_URL": "http://localhost/overpass",
+}
+
+REPORT_TEXT_BLOCK = re.compile(r'REPORT TEXT:\s*"(.*?)"\s*INSTRUCTIONS', re.S)
+FIRST_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+class FakeGeminiModel:
+    """Mimics genai.GenerativeModel.generate_content for extraction and summary prompts."""
+    latency_s = 0.0
+    calls = 0
+
+    def __init__(self, model_name, generation_config=None, **kwargs):
+        self.structured = bool(generation_config and generation_config.get("response_mime_type") == "application/json")
+
+    def generate_content(self, prompt):
+        FakeGeminiModel.calls += 1
+        if self.latency_s:
+            time.sleep(self.latency_s)
+
+        if self.structured:
+            match = REPORT_TEXT_BLOCK.search(prompt)
+            entries = []
+            for line in (match.group(1) if match else "").splitlines():
+                number = FIRST_NUMBER.search(line)
+                if number and line[:number.start()].strip():
+                    entries.append({"Indicator": line[:number.start()].strip(" :"), "Value": number.group()})
+            text = json.dumps(entries)
+        else:
+            text = "Your results look mostly within normal ranges. I am an AI, please consult your doctor."
+
+        usage = SimpleNamespace(prompt_token_count=len(prompt) // 4, candidates_token_count=len(text) // 4)
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+
+class FakeWhatsAppResponse:
+    status_code = 200
+    text = '{"messages": [{"id": "wamid.bench"}]}'
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class FakeWhatsApp:
+    latency_s = 0.0
+    sent = 0
+
+    @classmethod
+    def post(cls, url, headers=None, json=None, **kwargs):
+        cls.sent += 1
+        if cls.latency_s:
+            time.sleep(cls.latency_s)
+        return FakeWhatsAppResponse()
+
+
+class FakeMapsProvider:
+    """Async replacement for MapsService._get_google_pharmacies / _get_osm_pharmacies."""
+    latency_s = 0.0
+    calls = 0
+
+    def __init__(self, source: str):
+        self.source = source
+
+    async def __call__(self, lat: float, lon: float, radius: int):
+        FakeMapsProvider.calls += 1
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        return [
+            {
+                'name': f"{self.source.title()} Pharmacy {i}",
+                'vicinity': "Bench Street",
+                'rating': None,
+                'user_ratings_total': None,
+                'geometry': {'lat': lat + (i - 10) * 0.001, 'lng': lon + (i - 10) * 0.001},
+                'place_id': f"{self.source}_{i}",
+                'source': self.source,
+            }
+            for i in range(20)
+        ]
+
+
+class FakeGeoCache:
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, pharmacies):
+        self.store[key] = pharmacies
+
+
+# --- Minimal in-memory Redis stand-in ---
+
+class FakeRedis:
+    """Hashes, lists, expiry (ignored) and WATCH/MULTI/EXEC pipelines; values come back as bytes like redis-py."""
+    def __init__(self):
+        self.hashes = {}
+        self.lists = {}
+        self.versions = {}  # Bumped on every write, so WATCH can see them
+
+    @staticmethod
+    def _encode(value) -> bytes:
+        return value if isinstance(value, bytes) else str(value).encode("utf-8")
+
+    def hmget(self, key, *fields):
+        stored = self.hashes.get(key, {})
+        return [stored.get(field) for field in fields]
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        items = dict(mapping or {})
+        if field is not None:
+            items[field] = value
+        self.hashes.setdefault(key, {}).update({name: self._encode(v) for name, v in items.items()})
+        self.versions[key] = self.versions.get(key, 0) + 1
+        return len(items)
+
+    def hincrby(self, key, field, amount=1):
+        count = int(self.hashes.get(key, {}).get(field, 0)) + amount
+        self.hset(key, field, count)
+        return count
+
+    def rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(self._encode(value) for value in values)
+        return len(self.lists[key])
+
+    def llen(self, key):
+        return len(self.lists.get(key, []))
+
+    def expire(self, key, seconds):
+        return key in self.hashes or key in self.lists
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client: FakeRedis):
+        self.client = client
+        self.watched = {}
+        self.queued = None  # None: commands run immediately (after WATCH)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.watched, self.queued = {}, None
+
+    def watch(self, *keys):
+        self.watched = {key: self.client.versions.get(key, 0) for key in keys}
+
+    def multi(self):
+        self.queued = []
+
+    def __getattr__(self, name):
+        command = getattr(self.client, name)
+        if self.queued is None:
+            return command
+        return lambda *args, **kwargs: self.queued.append((command, args, kwargs))
+
+    def execute(self):
+        if any(self.client.versions.get(key, 0) != version for key, version in self.watched.items()):
+            raise redis.WatchError("Watched variable changed.")
+        results = [command(*args, **kwargs) for command, args, kwargs in self.queued or []]
+        self.watched, self.queued = {}, None
+        return results
+
+
+# --- Minimal in-memory Motor stand-in ---
+
+def _distance_m(point: dict, near: dict) -> float:
+    # Haversine distance between two GeoJSON points, for $nearSphere.
+    (lon1, lat1), (lon2, lat2) = point["coordinates"], near["$geometry"]["coordinates"]
+    dlat, dlon = math.radians(lat2 - lat1), math.radians(lon2 - lon1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) ** 2
+    return 2 * 6_371_000 * math.asin(math.sqrt(a))
+
+
+def _matches(doc: dict, query: dict) -> bool:
+    # Equality (or membership for array fields), $in, $nin, $gt, $nearSphere and $and; other operator clauses ($exists, ...) are ignored.
+    def field_matches(value, expected):
+        if isinstance(expected, dict):
+            if "$nearSphere" in expected:
+                near = expected["$nearSphere"]
+                return value is not None and _distance_m(value, near) <= near.get("$maxDistance", math.inf)
+            if "$in" in expected:
+                return any(field_matches(value, option) for option in expected["$in"])
+            if "$nin" in expected:
+                return not any(field_matches(value, option) for option in expected["$nin"])
+            if "$gt" in expected:
+                return value is not None and value > expected["$gt"]
+            return True
+        return expected in value if isinstance(value, list) else value == expected
+    if "$and" in (query or {}):
+        return all(_matches(doc, clause) for clause in query["$and"])
+    return all(field_matches(doc.get(k), v) for k, v in (query or {}).items())
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n] if n else self.docs
+        return self
+
+    def __aiter__(self):
+        self._iter = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = []
+
+    def find(self, query=None, *args, **kwargs):
+        docs = [doc for doc in self.docs if _matches(doc, query)]
+        for field, expected in (query or {}).items():
+            if isinstance(expected, dict) and "$nearSphere" in expected:
+                docs.sort(key=lambda doc: _distance_m(doc[field], expected["$nearSphere"]))
+        return FakeCursor(docs)
+
+    async def estimated_document_count(self):
+        return len(self.docs)
+
+    async def insert_one(self, doc):
+        doc = {"_id": doc.get("_id", ObjectId()), **doc}
+        self.docs.append(doc)
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+    async def find_one(self, query=None, *args, **kwargs):
+        return next((doc for doc in self.docs if _matches(doc, query)), None)
+
+    async def count_documents(self, query=None):
+        return sum(1 for doc in self.docs if _matches(doc, query))
+
+    async def update_one(self, query, update, upsert=False):
+        # Supports the operators the app uses: $set, $setOnInsert, $inc, $addToSet, $push, $unset.
+        doc = next((doc for doc in self.docs if _matches(doc, query)), None)
+        inserted = doc is None
+        if inserted:
+            if not upsert:
+                return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+            doc = {k: v for k, v in query.items() if not isinstance(v, dict)}
+            doc.setdefault("_id", ObjectId())
+            doc.update(update.get("$setOnInsert", {}))
+            self.docs.append(doc)
+
+        _apply_update(doc, update)
+        return SimpleNamespace(
+            matched_count=0 if inserted else 1, modified_count=0 if inserted else 1,
+            upserted_id=doc["_id"] if inserted else None,
+        )
+
+    async def update_many(self, query, update):
+        docs = [doc for doc in self.docs if _matches(doc, query)]
+        for doc in docs:
+            _apply_update(doc, update)
+        return SimpleNamespace(matched_count=len(docs), modified_count=len(docs))
+
+    async def bulk_write(self, operations, ordered=True):
+        # pymongo's InsertOne / UpdateOne / DeleteOne, read through their private fields.
+        result = SimpleNamespace(inserted_count=0, upserted_count=0, modified_count=0, deleted_count=0)
+        for operation in operations:
+            if isinstance(operation, InsertOne):
+                await self.insert_one(operation._doc)
+                result.inserted_count += 1
+            elif isinstance(operation, UpdateOne):
+                outcome = await self.update_one(operation._filter, operation._doc, upsert=bool(operation._upsert))
+                result.modified_count += outcome.modified_count
+                result.upserted_count += outcome.upserted_id is not None
+            elif isinstance(operation, DeleteOne):
+                doc = next((doc for doc in self.docs if _matches(doc, operation._filter)), None)
+                if doc is not None:
+                    self.docs.remove(doc)
+                    result.deleted_count += 1
+        return result
+
+
+def _apply_update(doc: dict, update: dict):
+    doc.update(update.get("$set", {}))
+    for key, amount in update.get("$inc", {}).items():
+        doc[key] = doc.get(key, 0) + amount
+    for key, value in update.get("$addToSet", {}).items():
+        if value not in doc.setdefault(key, []):
+            doc[key].append(value)
+    for key, value in update.get("$push", {}).items():
+        values = value["$each"] if isinstance(value, dict) else [value]
+        doc[key] = doc.get(key, []) + list(values)
+        if isinstance(value, dict) and "$slice" in value:
+            doc[key] = doc[key][value["$slice"]:] if value["$slice"] < 0 else doc[key][:value["$slice"]]
+    for key in update.get("$unset", {}):
+        doc.pop(key, None)
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.collections = {}
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, FakeCollection())
+
+
+class FakeMotorClient:
+    databases = {}
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getitem__(self, name):
+        return FakeMotorClient.databases.setdefault(name, FakeDatabase())
+
+    def close(self):
+        pass
+
+
+def install_fakes(llm_latency_s: float = 0.0, whatsapp_latency_s: float = 0.0, maps_latency_s: float = 0.0):
+    """Patches the app modules in place. Must run after DUMMY_ENV is applied."""
+    from app.tasks import reminder_tasks, report_processing
+    from app.tasks.celery_app import celery
+    from app.services import whatsapp_service, maps_service as maps_module
+
+    # Tasks run eagerly in-process: no broker, and results stay in memory
+    # instead of the SSL-only Redis backend the app configures.
+    celery.conf.update(
+        broker_url="memory://", result_backend="cache+memory://",
+        broker_use_ssl=None, redis_backend_use_ssl=None,
+    )
+
+    FakeGeminiModel.latency_s = llm_latency_s
+    FakeWhatsApp.latency_s = whatsapp_latency_s
+    FakeMapsProvider.latency_s = maps_latency_s
+
+    report_processing.genai.GenerativeModel = FakeGeminiModel
+    report_processing.AsyncIOMotorClient = FakeMotorClient
+    reminder_tasks.AsyncIOMotorClient = FakeMotorClient  # daily reminder dispatcher
+    whatsapp_service.requests.post = FakeWhatsApp.post
+
+    maps_module.geo_cache = FakeGeoCache()
+    maps_module.maps_service._get_google_pharmacies = FakeMapsProvider("google")
+    maps_module.maps_service._get_osm_pharmacies = FakeMapsProvider("osm")
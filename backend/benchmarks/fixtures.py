@@ -0,0 +1,208 @@
+import os
+import random
+
+import fitz  # PyMuPDF
+
+# --- Benchmark Fixture Corpus ---
+# Lab-report PDFs are generated on the fly so no patient data (or binaries)
+# live in the repo. Three kinds:
+#   digital - real text layer, goes through page.get_text()
+#   scanned - image-only pages, forces the Tesseract OCR path
+#   mixed   - digital first page, scanned after that (exercises the text-layer heuristic)
+#
+# build_scan_corpus() adds clean and degraded scans with their ground-truth
+# text, for OCR accuracy/cost comparisons. build_photo_corpus() adds phone
+# photos of a printed report, each with the PDF a client would wrap it in.
+
+LETTERHEAD = [
+    "CITY DIAGNOSTIC LABORATORIES",
+    "NABL Accredited | 24x7 Helpline 1800-000-000",
+    "Patient Name: Bench Patient      Age: 42 Y   Sex: M",
+    "Ref By: Dr. Self       Sample ID: BX-20931",
+]
+
+TESTS = [
+    ("Hemoglobin", 11.5, 17.5, "g/dL", "13.0 - 17.0"),
+    ("RBC Count", 3.8, 6.0, "mill/mm3", "4.5 - 5.5"),
+    ("WBC Count", 3.5, 12.0, "10^3/uL", "4.0 - 11.0"),
+    ("Platelet Count", 1.2, 4.8, "lakhs/cumm", "1.5 - 4.1"),
+    ("Hematocrit", 36, 52, "%", "40 - 50"),
+    ("MCV", 76, 100, "fL", "83 - 101"),
+    ("Fasting Blood Sugar", 70, 160, "mg/dL", "70 - 100"),
+    ("HbA1c", 4.8, 8.5, "%", "4.0 - 5.6"),
+    ("Total Cholesterol", 140, 260, "mg/dL", "< 200"),
+    ("Triglycerides", 80, 240, "mg/dL", "< 150"),
+    ("Serum Creatinine", 0.6, 1.5, "mg/dL", "0.7 - 1.3"),
+    ("TSH", 0.3, 6.0, "uIU/mL", "0.4 - 4.0"),
+    ("Vitamin B12", 150, 900, "pg/mL", "200 - 900"),
+    ("Vitamin D (25-OH)", 10, 60, "ng/mL", "30 - 100"),
+    # Rows without a unit column; the local parser leaves these for the LLM.
+    ("Urine Specific Gravity", 1.005, 1.030, "", "1.005 - 1.030"),
+    ("Albumin/Globulin Ratio", 1.0, 2.2, "", "1.1 - 2.5"),
+]
+
+KINDS = ("digital", "scanned", "mixed")
+
+# quality -> (scan dpi, share of speckled pixels, contrast)
+SCAN_QUALITIES = {
+    "clean": (200, 0.0, 1.0),
+    "poor": (110, 0.015, 0.55),
+}
+
+
+def _report_lines(rng: random.Random, page_no: int, total_pages: int) -> list:
+    lines = list(LETTERHEAD) + ["", "TEST                     RESULT    UNIT        REFERENCE"]
+    for name, low, high, unit, ref in TESTS:
+        value = round(rng.uniform(low, high), 3 if high < 2 else 1)
+        lines.append(f"{name:<24} {value:<9} {unit:<11} {ref}")
+    lines += ["", "--- End of Report ---", f"Page {page_no} of {total_pages}"]
+    return lines
+
+
+def _add_text_page(doc: fitz.Document, lines: list):
+    page = doc.new_page(width=595, height=842)  # A4 in points
+    page.insert_text((40, 50), "\n".join(lines), fontname="cour", fontsize=9)
+
+
+def _degrade(pixmap: fitz.Pixmap, rng: random.Random, noise: float, contrast: float) -> fitz.Pixmap:
+    # Washed-out ink plus salt-and-pepper speckle, like a cheap or photocopied scan.
+    import numpy as np
+
+    pixels = np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(pixmap.height, pixmap.width)
+    pixels = (pixels * contrast + 255 * (1 - contrast)).astype(np.uint8)
+    speckle = np.random.default_rng(rng.randrange(2 ** 32)).random(pixels.shape) < noise
+    pixels[speckle] = 255 - pixels[speckle]
+    return fitz.Pixmap(fitz.csGRAY, pixmap.width, pixmap.height, pixels.tobytes(), False)
+
+
+def _add_scanned_page(doc: fitz.Document, lines: list, dpi: int = 200,
+                      rng: random.Random = None, noise: float = 0.0, contrast: float = 1.0):
+    # Render a text page to a bitmap and embed only the image, like a scanner would.
+    scratch = fitz.open()
+    _add_text_page(scratch, lines)
+    pixmap = scratch[0].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    if noise or contrast < 1.0:
+        pixmap = _degrade(pixmap, rng or random.Random(0), noise, contrast)
+    page = doc.new_page(width=595, height=842)
+    page.insert_image(page.rect, pixmap=pixmap)
+    scratch.close()
+
+
+def build_report(path: str, kind: str, pages: int = 2, seed: int = 0):
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for page_no in range(1, pages + 1):
+        lines = _report_lines(rng, page_no, pages)
+        scanned = kind == "scanned" or (kind == "mixed" and page_no > 1)
+        if scanned:
+            _add_scanned_page(doc, lines)
+        else:
+            _add_text_page(doc, lines)
+    doc.save(path)
+    doc.close()
+
+
+def build_corpus(directory: str, per_kind: int = 3, pages: int = 2, kinds=KINDS) -> dict:
+    """Writes `per_kind` PDFs of each of `kinds` into `directory`. Returns {kind: [paths]}."""
+    os.makedirs(directory, exist_ok=True)
+    corpus = {}
+    for kind in kinds:
+        corpus[kind] = []
+        for i in range(per_kind):
+            path = os.path.join(directory, f"{kind}_{i}.pdf")
+            if not os.path.exists(path):
+                build_report(path, kind, pages=pages, seed=i)
+            corpus[kind].append(path)
+    return corpus
+
+
+def build_scan(path: str, quality: str, pages: int = 2, seed: int = 0) -> str:
+    """Writes an image-only PDF of the given SCAN_QUALITIES entry (if missing). Returns its ground-truth text."""
+    rng = random.Random(seed)
+    page_lines = [_report_lines(rng, page_no, pages) for page_no in range(1, pages + 1)]
+
+    if not os.path.exists(path):
+        dpi, noise, contrast = SCAN_QUALITIES[quality]
+        noise_rng = random.Random(seed)
+        doc = fitz.open()
+        for lines in page_lines:
+            _add_scanned_page(doc, lines, dpi=dpi, rng=noise_rng, noise=noise, contrast=contrast)
+        doc.save(path)
+        doc.close()
+
+    return "\n".join(line for lines in page_lines for line in lines)
+
+
+def build_scan_corpus(directory: str, per_quality: int = 3, pages: int = 2) -> dict:
+    """Returns {quality: [(path, ground_truth_text)]}, writing any missing PDFs into `directory`."""
+    os.makedirs(directory, exist_ok=True)
+    return {
+        quality: [
+            (path, build_scan(path, quality, pages=pages, seed=i))
+            for i in range(per_quality)
+            for path in [os.path.join(directory, f"scan_{quality}_{i}.pdf")]
+        ]
+        for quality in SCAN_QUALITIES
+    }
+
+
+def _photograph(page_pixels, rng: random.Random, size=(3024, 4032)):
+    # The page lying on a desk, shot from slightly off-axis: perspective,
+    # a small rotation, uneven lighting and JPEG-grade noise.
+    import cv2
+    import numpy as np
+
+    width, height = size
+    page_h, page_w = page_pixels.shape[:2]
+    fit = min(width * 0.85 / page_w, height * 0.85 / page_h)
+    left, top = (width - page_w * fit) / 2, (height - page_h * fit) / 2
+    jitter = lambda: rng.uniform(-0.05, 0.05) * width
+    corners = np.float32([
+        [left + jitter(), top + jitter()], [left + page_w * fit + jitter(), top + jitter()],
+        [left + page_w * fit + jitter(), top + page_h * fit + jitter()], [left + jitter(), top + page_h * fit + jitter()],
+    ])
+    matrix = cv2.getPerspectiveTransform(np.float32([[0, 0], [page_w, 0], [page_w, page_h], [0, page_h]]), corners)
+    photo = cv2.warpPerspective(cv2.cvtColor(page_pixels, cv2.COLOR_GRAY2BGR), matrix, size, borderValue=(70, 85, 95))
+
+    light = np.linspace(rng.uniform(0.7, 0.85), 1.0, width, dtype=np.float32)[None, :, None]
+    photo = photo.astype(np.float32) * light + np.random.default_rng(rng.randrange(2 ** 32)).normal(0, 4, photo.shape)
+    return np.clip(photo, 0, 255).astype(np.uint8)
+
+
+def build_photo(photo_path: str, pdf_path: str, pages: int = 1, seed: int = 0) -> str:
+    """
+    Writes a JPEG phone photo of a printed report page and the A4 PDF a client
+    would wrap it in (if missing). Returns the page's ground-truth text.
+    """
+    rng = random.Random(seed)
+    lines = _report_lines(rng, 1, pages)
+
+    if not os.path.exists(photo_path):
+        import cv2
+        import numpy as np
+
+        scratch = fitz.open()
+        _add_text_page(scratch, lines)
+        pixmap = scratch[0].get_pixmap(dpi=300, colorspace=fitz.csGRAY)
+        page_pixels = np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(pixmap.height, pixmap.width)
+        cv2.imwrite(photo_path, _photograph(page_pixels, rng), [cv2.IMWRITE_JPEG_QUALITY, 90])
+        scratch.close()
+
+    if not os.path.exists(pdf_path):
+        doc = fitz.open()
+        page = doc.new_page(width=595, height=842)
+        page.insert_image(page.rect, filename=photo_path)
+        doc.save(pdf_path)
+        doc.close()
+
+    return "\n".join(lines)
+
+
+def build_photo_corpus(directory: str, count: int = 3) -> list:
+    """Returns [(photo path, pdf path, ground_truth_text)], writing any missing files into `directory`."""
+    os.makedirs(directory, exist_ok=True)
+    return [
+        (photo_path, pdf_path, build_photo(photo_path, pdf_path, seed=i))
+        for i in range(count)
+        for photo_path, pdf_path in [(os.path.join(directory, f"photo_{i}.jpg"), os.path.join(directory, f"photo_{i}.pdf"))]
+    ]
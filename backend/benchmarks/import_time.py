@@ -0,0 +1,111 @@
+import re
+import os
+import sys
+import argparse
+import subprocess
+
+# --- API Import-Time Budget Check ---
+# Runs `python -X importtime -c "import main"` in a fresh interpreter and fails
+# if any of the worker-only heavy libraries sneak back into its import graph,
+# or if the app's own imports (everything but FastAPI) take longer than
+# --budget-ratio times FastAPI's import in the same run. A ratio holds on slow
+# and fast machines alike; the median of --repeat runs counts.
+#
+# Usage (from backend/):
+#   python benchmarks/import_time.py
+#   python benchmarks/import_time.py --budget-ratio 1.5 --top 15
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.fakes import DUMMY_ENV
+
+# App imports measured at 1.2-1.6x FastAPI's own import time; budget leaves headroom.
+DEFAULT_BUDGET_RATIO = 2.0
+DEFAULT_REPEAT = 3
+
+# These belong to the Celery worker (OCR) or are initialized on first use.
+FORBIDDEN_MODULES = [
+    "cv2",
+    "numpy",
+    "pytesseract",
+    "fitz",
+    "pdf2image",
+    "vertexai",
+    "google.generativeai",
+    "google.cloud.storage",
+    "googlemaps",
+    "app.tasks.report_processing",
+]
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(module: str = "main"):
+    """Returns a list of (module, self_us, cumulative_us, depth) from -X importtime."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env={**DUMMY_ENV, **os.environ},  # Settings() needs these; nothing is contacted at import
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:])
+        raise SystemExit(f"❌ 'import {module}' failed; fix the import error before measuring.")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def total_ms_of(rows, module: str) -> float:
+    return next(cum for name, _, cum, _ in rows if name == module) / 1000
+
+
+def app_ratio(rows) -> float:
+    fastapi_ms = total_ms_of(rows, "fastapi")
+    return (total_ms_of(rows, "main") - fastapi_ms) / fastapi_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the API process import time against a budget.")
+    parser.add_argument("--budget-ratio", type=float, default=DEFAULT_BUDGET_RATIO,
+                        help="Allowed app import time as a multiple of FastAPI's")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--top", type=int, default=10, help="Show the N slowest imports (cumulative)")
+    args = parser.parse_args()
+
+    runs = sorted((measure("main") for _ in range(args.repeat)), key=app_ratio)
+    rows = runs[len(runs) // 2]
+    total_ms, fastapi_ms, ratio = total_ms_of(rows, "main"), total_ms_of(rows, "fastapi"), app_ratio(rows)
+    imported = {name for name, _, _, _ in rows}
+
+    print(
+        f"--- Import time for main.py: {total_ms:.0f} ms, of which fastapi {fastapi_ms:.0f} ms. "
+        f"App imports: {ratio:.2f}x fastapi (budget {args.budget_ratio:.2f}x) ---"
+    )
+    for name, self_us, cumulative_us, _ in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:9.1f} ms  (self {self_us / 1000:7.1f} ms)  {name}")
+
+    leaked = [m for m in FORBIDDEN_MODULES if m in imported]
+    failed = False
+
+    if leaked:
+        print(f"❌ Heavy modules imported by the API process: {', '.join(leaked)}")
+        failed = True
+    if ratio > args.budget_ratio:
+        print(f"❌ App imports take {ratio:.2f}x FastAPI's import time, over the {args.budget_ratio:.2f}x budget.")
+        failed = True
+
+    if failed:
+        sys.exit(1)
+    print("✅ Import time within budget.")
+
+
+if __name__ == "__main__":
+    main()
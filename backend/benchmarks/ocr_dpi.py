@@ -0,0 +1,102 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import difflib
+from datetime import datetime
+
+# --- Fixed vs Adaptive DPI OCR Benchmark ---
+# OCRs clean and degraded scans twice: with the fixed 300 dpi pipeline and
+# with the adaptive one (settings.OCR_ADAPTIVE). Reports CPU seconds per page,
+# including the Tesseract/poppler child processes, and word accuracy against
+# the fixtures' ground truth.
+#
+# Usage (from backend/):
+#   python benchmarks/ocr_dpi.py
+#   python benchmarks/ocr_dpi.py --per-quality 5 --pages 3
+#
+# Needs the worker dependencies (PyMuPDF, pdf2image/poppler, OpenCV, Tesseract).
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+
+from benchmarks.fakes import DUMMY_ENV
+
+for key, value in DUMMY_ENV.items():
+    os.environ.setdefault(key, value)
+
+DEFAULT_OUTPUT_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+WORD = re.compile(r"\S+")
+
+
+def cpu_seconds() -> float:
+    """CPU time of this process plus every child it has waited for (tesseract, pdftoppm)."""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def word_accuracy(ocr_text: str, truth: str) -> float:
+    """Share of ground-truth words recovered in order (difflib matching blocks)."""
+    expected, found = WORD.findall(truth), WORD.findall(ocr_text)
+    matcher = difflib.SequenceMatcher(None, expected, found, autojunk=False)
+    return sum(block.size for block in matcher.get_matching_blocks()) / max(1, len(expected))
+
+
+def run_mode(scans: list, pages: int, adaptive: bool) -> dict:
+    from app.core.config import settings
+    from app.tasks.report_processing import extract_text_from_pdf
+
+    settings.OCR_ADAPTIVE = adaptive
+    cpu_start, wall_start = cpu_seconds(), time.perf_counter()
+    accuracies = [word_accuracy(extract_text_from_pdf(path), truth) for path, truth in scans]
+    cpu, wall = cpu_seconds() - cpu_start, time.perf_counter() - wall_start
+    total_pages = pages * len(scans)
+
+    return {
+        "cpu_s_per_page": round(cpu / total_pages, 3),
+        "wall_s_per_page": round(wall / total_pages, 3),
+        "word_accuracy": round(sum(accuracies) / len(accuracies), 4),
+        "min_word_accuracy": round(min(accuracies), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare fixed 300 dpi OCR with adaptive DPI OCR.")
+    parser.add_argument("--per-quality", type=int, default=3, help="PDFs per scan quality (clean/poor)")
+    parser.add_argument("--pages", type=int, default=2)
+    parser.add_argument("--fixtures-dir", default=os.path.join(tempfile.gettempdir(), "vitalyze_bench_fixtures"))
+    parser.add_argument("--output", help="JSON result path (default: benchmarks/results/ocr_dpi_<timestamp>.json)")
+    args = parser.parse_args()
+
+    from benchmarks.fixtures import build_scan_corpus
+    corpus = build_scan_corpus(args.fixtures_dir, per_quality=args.per_quality, pages=args.pages)
+
+    results = {"config": vars(args), "qualities": {}}
+    for quality, scans in corpus.items():
+        fixed = run_mode(scans, args.pages, adaptive=False)
+        adaptive = run_mode(scans, args.pages, adaptive=True)
+        results["qualities"][quality] = {
+            "fixed_300dpi": fixed,
+            "adaptive": adaptive,
+            "cpu_saving": round(1 - adaptive["cpu_s_per_page"] / fixed["cpu_s_per_page"], 3),
+        }
+        print(f"--- {quality} ---")
+        print(json.dumps(results["qualities"][quality], indent=2))
+
+    output = args.output or os.path.join(
+        DEFAULT_OUTPUT_DIR, f"ocr_dpi_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
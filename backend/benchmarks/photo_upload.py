@@ -0,0 +1,78 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from datetime import datetime
+
+# --- Photo Upload Benchmark ---
+# OCRs the same phone photos two ways: wrapped in an A4 PDF (what clients
+# had to send, re-rasterized by pdf_to_cv2_objects) and uploaded directly
+# (extract_layout_from_image: downscale, page flattening, deskew). Reports
+# CPU and wall seconds per photo and word accuracy against the ground truth.
+#
+# Usage (from backend/):
+#   python benchmarks/photo_upload.py
+#   python benchmarks/photo_upload.py --photos 5
+#
+# Needs the worker dependencies (PyMuPDF, pdf2image/poppler, OpenCV, Tesseract).
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+
+from benchmarks.fakes import DUMMY_ENV
+
+for key, value in DUMMY_ENV.items():
+    os.environ.setdefault(key, value)
+
+from benchmarks.ocr_dpi import cpu_seconds, word_accuracy, DEFAULT_OUTPUT_DIR
+
+
+def run_path(extract, inputs: list) -> dict:
+    cpu_start, wall_start = cpu_seconds(), time.perf_counter()
+    accuracies = [word_accuracy(extract(path)[0], truth) for path, truth in inputs]
+    cpu, wall = cpu_seconds() - cpu_start, time.perf_counter() - wall_start
+
+    return {
+        "cpu_s_per_photo": round(cpu / len(inputs), 3),
+        "wall_s_per_photo": round(wall / len(inputs), 3),
+        "word_accuracy": round(sum(accuracies) / len(accuracies), 4),
+        "min_word_accuracy": round(min(accuracies), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PDF-wrapped and direct photo uploads through OCR.")
+    parser.add_argument("--photos", type=int, default=3)
+    parser.add_argument("--fixtures-dir", default=os.path.join(tempfile.gettempdir(), "vitalyze_bench_fixtures"))
+    parser.add_argument("--output", help="JSON result path (default: benchmarks/results/photo_upload_<timestamp>.json)")
+    args = parser.parse_args()
+
+    from benchmarks.fixtures import build_photo_corpus
+    from app.tasks.report_processing import extract_layout_from_pdf, extract_layout_from_image
+
+    corpus = build_photo_corpus(args.fixtures_dir, count=args.photos)
+    pdf_wrapped = run_path(extract_layout_from_pdf, [(pdf, truth) for photo, pdf, truth in corpus])
+    direct = run_path(extract_layout_from_image, [(photo, truth) for photo, pdf, truth in corpus])
+
+    results = {
+        "config": vars(args),
+        "pdf_wrapped": pdf_wrapped,
+        "direct_image": direct,
+        "cpu_saving": round(1 - direct["cpu_s_per_photo"] / pdf_wrapped["cpu_s_per_photo"], 3),
+    }
+    print(json.dumps(results, indent=2))
+
+    output = args.output or os.path.join(
+        DEFAULT_OUTPUT_DIR, f"photo_upload_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import resource
+import tempfile
+import statistics
+from datetime import datetime, timezone
+
+# --- End-to-End Report Pipeline Benchmark ---
+# Runs the report pipeline in-process against fake Gemini/WhatsApp/Maps/Mongo
+# backends and writes a JSON result file so runs can be diffed over time.
+#
+# Usage (from backend/):
+#   python benchmarks/run_pipeline.py
+#   python benchmarks/run_pipeline.py --scenarios extract_text ai_analysis --per-kind 5
+#   python benchmarks/run_pipeline.py --llm-latency-ms 800 --output results/with_llm_latency.json
+#   python benchmarks/run_pipeline.py --kinds digital       # hosts without poppler/Tesseract
+#
+# Needs the worker dependencies (PyMuPDF, pdf2image/poppler, Tesseract) for the
+# scanned and mixed PDFs, and FastAPI for the upload scenario.
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+
+from benchmarks.fakes import DUMMY_ENV, FakeGeminiModel, FakeWhatsApp, FakeMapsProvider, install_fakes
+from benchmarks.fixtures import KINDS
+
+for key, value in DUMMY_ENV.items():
+    os.environ.setdefault(key, value)
+
+SCENARIOS = ("extract_text", "ai_analysis", "upload", "reminder_fanout", "pharmacy_lookup")
+DEFAULT_OUTPUT_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024, 1)
+
+
+def latency_stats(samples: list) -> dict:
+    ordered = sorted(samples)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "p50_ms": round(percentile(50) * 1000, 2),
+        "p95_ms": round(percentile(95) * 1000, 2),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+def page_count(path: str) -> int:
+    import fitz
+    with fitz.open(path) as doc:
+        return doc.page_count
+
+
+# --- Scenarios ---
+
+def bench_extract_text(corpus: dict, iterations: int) -> dict:
+    from app.tasks.report_processing import extract_text_from_pdf
+
+    results = {}
+    for kind, paths in corpus.items():
+        samples, pages = [], 0
+        for _ in range(iterations):
+            for path in paths:
+                start = time.perf_counter()
+                extract_text_from_pdf(path)
+                samples.append(time.perf_counter() - start)
+                pages += page_count(path)
+        results[kind] = {
+            **latency_stats(samples),
+            "pages_per_sec": round(pages / sum(samples), 2),
+        }
+    return results
+
+
+def bench_ai_analysis(corpus: dict, iterations: int) -> dict:
+    from app.core.config import settings
+    from app.crud import crud_report_job
+    from app.models.report import ReportJobInDB
+    from app.models.user import to_document
+    from app.tasks.report_processing import extract_layout_from_pdf, task_run_ai_analysis
+    from benchmarks.fakes import FakeMotorClient
+
+    extractions = [extract_layout_from_pdf(path) for paths in corpus.values() for path in paths]
+    jobs = FakeMotorClient()[settings.MONGO_DB_NAME][crud_report_job.COLLECTION]
+    calls_before = FakeGeminiModel.calls
+
+    samples = []
+    for _ in range(iterations):
+        for i, (text, layout_rows) in enumerate(extractions):
+            # A fresh job checkpointed right after extraction, so every stage after it runs.
+            job = ReportJobInDB(
+                user_id="64b000000000000000000001", filename=f"bench_{i}.pdf", file_path="",
+                completed_stages=[crud_report_job.STAGE_EXTRACT],
+                extraction={"full_text": text, "layout_rows": layout_rows},
+            )
+            jobs.docs.append(to_document(job))
+            start = time.perf_counter()
+            task_run_ai_analysis.apply(args=[str(job.id)])
+            samples.append(time.perf_counter() - start)
+
+    return {
+        **latency_stats(samples),
+        "reports_per_min": round(len(samples) / sum(samples) * 60, 1),
+        "llm_calls_per_report": round((FakeGeminiModel.calls - calls_before) / len(samples), 2),
+    }
+
+
+def bench_upload(corpus: dict, iterations: int) -> dict:
+    from fastapi.testclient import TestClient
+    from main import app
+    from app.api.v1.endpoints import reports
+    from app.api.v1.endpoints.auth import get_current_active_user
+    from app.models.user import UserInDB
+    from app.tasks.celery_app import celery
+    from app.core.config import settings
+    from app.db.mongodb import get_database
+    from benchmarks.fakes import FakeMotorClient
+
+    # Run the whole Celery chain inline so the request covers upload -> extract -> analyze -> save.
+    celery.conf.task_always_eager = True
+    celery.conf.task_eager_propagates = True
+    reports.storage_service = None
+
+    user = UserInDB(
+        _id="64b000000000000000000001", name="Bench User",
+        phone_number="+910000000000", hashed_password="x",
+    )
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    app.dependency_overrides[get_database] = lambda: FakeMotorClient()[settings.MONGO_DB_NAME]
+    client = TestClient(app)
+
+    samples = {}
+    for _ in range(iterations):
+        for kind, paths in corpus.items():
+            for path in paths:
+                with open(path, "rb") as f:
+                    start = time.perf_counter()
+                    response = client.post(
+                        "/api/v1/reports/upload",
+                        files={"file": (os.path.basename(path), f, "application/pdf")},
+                    )
+                    samples.setdefault(kind, []).append(time.perf_counter() - start)
+                response.raise_for_status()
+
+    app.dependency_overrides.clear()
+    every = [s for kind_samples in samples.values() for s in kind_samples]
+    return {
+        **latency_stats(every),
+        "reports_per_min": round(len(every) / sum(every) * 60, 1),
+        "by_kind": {kind: latency_stats(s) for kind, s in samples.items()},
+    }
+
+
+def bench_reminder_fanout(reminders: int) -> dict:
+    from app.core.config import settings
+    from app.tasks.celery_app import celery
+    from app.tasks.reminder_tasks import dispatch_daily_reminders
+    from benchmarks.fakes import FakeMotorClient
+
+    # Seed the 'reminders' collection and run the beat dispatcher inline, so the
+    # measurement covers the Mongo fan-out query plus every WhatsApp send.
+    collection = FakeMotorClient()[settings.MONGO_DB_NAME]["reminders"]
+    collection.docs = [
+        {
+            "user_id": f"user_{i}", "user_name": f"User {i}", "phone_number": f"+9100000{i:05d}",
+            "type": "daily", "medicine_name": "Metformin", "is_active": True, "timings": ["morning"],
+        }
+        for i in range(reminders)
+    ]
+    celery.conf.task_always_eager = True
+
+    sent_before = FakeWhatsApp.sent
+    start = time.perf_counter()
+    dispatch_daily_reminders.apply(args=["morning"])
+    elapsed = time.perf_counter() - start
+
+    return {
+        "reminders": reminders,
+        "dispatch_ms": round(elapsed * 1000, 2),
+        "messages_per_sec": round(reminders / elapsed, 1),
+        "messages_sent": FakeWhatsApp.sent - sent_before,
+    }
+
+
+def bench_pharmacy_lookup(lookups: int) -> dict:
+    from app.services.maps_service import maps_service
+
+    rng = random.Random(42)
+    # Users spread over ~10 km around central Bengaluru so cells repeat like real traffic.
+    points = [(12.9716 + rng.uniform(-0.05, 0.05), 77.5946 + rng.uniform(-0.05, 0.05)) for _ in range(lookups)]
+    calls_before = FakeMapsProvider.calls
+
+    async def run():
+        samples = []
+        for lat, lon in points:
+            start = time.perf_counter()
+            await maps_service.get_nearby_pharmacies(lat, lon, 3000)
+            samples.append(time.perf_counter() - start)
+        return samples
+
+    samples = asyncio.run(run())
+    provider_calls = FakeMapsProvider.calls - calls_before
+    return {
+        **latency_stats(samples),
+        "provider_calls": provider_calls,
+        "cache_hit_ratio": round(1 - provider_calls / lookups, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the report pipeline with stubbed externals.")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--kinds", nargs="+", choices=KINDS, default=list(KINDS), help="Fixture PDF kinds to use")
+    parser.add_argument("--per-kind", type=int, default=3, help="PDFs per kind")
+    parser.add_argument("--pages", type=int, default=2, help="Pages per fixture PDF")
+    parser.add_argument("--iterations", type=int, default=1)
+    parser.add_argument("--reminders", type=int, default=500)
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--llm-latency-ms", type=float, default=0)
+    parser.add_argument("--whatsapp-latency-ms", type=float, default=0)
+    parser.add_argument("--maps-latency-ms", type=float, default=0)
+    parser.add_argument("--fixtures-dir", default=os.path.join(tempfile.gettempdir(), "vitalyze_bench_fixtures"))
+    parser.add_argument("--output", help="JSON result path (default: benchmarks/results/<timestamp>.json)")
+    args = parser.parse_args()
+
+    install_fakes(
+        llm_latency_s=args.llm_latency_ms / 1000,
+        whatsapp_latency_s=args.whatsapp_latency_ms / 1000,
+        maps_latency_s=args.maps_latency_ms / 1000,
+    )
+
+    corpus = {}
+    if {"extract_text", "ai_analysis", "upload"} & set(args.scenarios):
+        from benchmarks.fixtures import build_corpus
+        corpus = build_corpus(args.fixtures_dir, per_kind=args.per_kind, pages=args.pages, kinds=args.kinds)
+
+    runners = {
+        "extract_text": lambda: bench_extract_text(corpus, args.iterations),
+        "ai_analysis": lambda: bench_ai_analysis(corpus, args.iterations),
+        "upload": lambda: bench_upload(corpus, args.iterations),
+        "reminder_fanout": lambda: bench_reminder_fanout(args.reminders),
+        "pharmacy_lookup": lambda: bench_pharmacy_lookup(args.lookups),
+    }
+
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": vars(args),
+        "scenarios": {},
+    }
+
+    for name in args.scenarios:
+        print(f"--- Running {name} ---")
+        start = time.perf_counter()
+        results["scenarios"][name] = runners[name]()
+        results["scenarios"][name]["wall_time_s"] = round(time.perf_counter() - start, 2)
+        results["scenarios"][name]["peak_rss_mb"] = peak_rss_mb()
+        print(json.dumps(results["scenarios"][name], indent=2))
+
+    output = args.output or os.path.join(
+        DEFAULT_OUTPUT_DIR, f"pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
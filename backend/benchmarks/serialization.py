@@ -0,0 +1,159 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import List
+
+# --- Response Serialization Microbenchmark ---
+# Times GET /reports/history and GET /users/{id} through FastAPI's TestClient
+# twice: "before" rebuilds the original handlers (validated models returned
+# against `response_model`, stdlib JSONResponse), "after" calls the real
+# routes (trusted model_construct + FastJSONResponse). Reports ms and peak
+# traced allocations per response.
+#
+# Usage (from backend/):
+#   python benchmarks/serialization.py
+#   python benchmarks/serialization.py --reports 100 --requests 300
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+
+from benchmarks.fakes import DUMMY_ENV
+
+for key, value in DUMMY_ENV.items():
+    os.environ.setdefault(key, value)
+
+USER_ID = "64b000000000000000000001"
+INDICATORS = [
+    ("Hemoglobin", "g/dL"), ("WBC Count", "10^3/uL"), ("Platelet Count", "10^3/uL"), ("Fasting Glucose", "mg/dL"),
+    ("HbA1c", "%"), ("Total Cholesterol", "mg/dL"), ("HDL", "mg/dL"), ("LDL", "mg/dL"), ("Triglycerides", "mg/dL"),
+    ("Creatinine", "mg/dL"), ("Urea", "mg/dL"), ("TSH", "uIU/mL"), ("Vitamin D", "ng/mL"), ("Vitamin B12", "pg/mL"),
+    ("SGPT", "U/L"), ("SGOT", "U/L"), ("Sodium", "mmol/L"), ("Potassium", "mmol/L"), ("Calcium", "mg/dL"),
+    ("Uric Acid", "mg/dL"),
+]
+
+
+def report_docs(count: int) -> List[dict]:
+    """Report documents shaped like the ones crud_report stores."""
+    from bson import ObjectId
+
+    rng = random.Random(7)
+    start = datetime(2023, 1, 1)
+    return [
+        {
+            "_id": ObjectId(),
+            "user_id": USER_ID,
+            "filename": f"report_{i}.pdf",
+            "upload_date": start + timedelta(days=i * 3),
+            "simple_summary": " ".join(rng.choice(["Your", "results", "are", "mostly", "within", "range."]) for _ in range(200)),
+            "structured_entities": [
+                {"Indicator": name, "Value": round(rng.uniform(1, 300), 1), "Unit": unit, "Status": rng.choice(["Normal", "High", "Low"])}
+                for name, unit in INDICATORS
+            ],
+            "file_storage_path": f"users/{USER_ID}/report_{i}.pdf",
+            "raw_text_ref": ObjectId(),
+        }
+        for i in range(count)
+    ]
+
+
+def build_client(reports: int):
+    from bson import ObjectId
+    from fastapi import Depends
+    from fastapi.responses import JSONResponse
+    from fastapi.testclient import TestClient
+    from main import app
+    from app.api.v1.endpoints.auth import get_current_active_user
+    from app.core.config import settings
+    from app.core.serialization import trusted
+    from app.db.mongodb import get_database
+    from app.models.report import ReportInDB
+    from app.models.user import UserInDB
+    from benchmarks.fakes import FakeMotorClient
+
+    db = FakeMotorClient()[settings.MONGO_DB_NAME]
+    db["reports"].docs = report_docs(reports)
+    user_doc = {
+        "_id": ObjectId(USER_ID), "name": "Bench User", "phone_number": "+910000000000",
+        "age": 42, "gender": "female", "hashed_password": "$2b$12$" + "x" * 53, "created_at": datetime(2023, 1, 1),
+    }
+    db["users"].docs = [user_doc]
+    user = trusted(UserInDB, user_doc)
+
+    # The handlers as they were: validated construction, then FastAPI validates
+    # and encodes again against response_model.
+    @app.get("/bench/before/history", response_model=List[ReportInDB], response_class=JSONResponse)
+    async def history_before(db=Depends(get_database)):
+        cursor = db["reports"].find({"user_id": USER_ID}, {"raw_text": 0}).sort("upload_date", -1)
+        return [ReportInDB(**doc) async for doc in cursor]
+
+    @app.get("/bench/before/users/{user_id}", response_model=UserInDB, response_class=JSONResponse)
+    async def user_before(user_id: str, db=Depends(get_database)):
+        return UserInDB(**await db["users"].find_one({"_id": ObjectId(user_id)}))
+
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    app.dependency_overrides[get_database] = lambda: db
+    return TestClient(app)
+
+
+def measure(client, path: str, requests: int) -> dict:
+    for _ in range(5):  # warm up routing and pydantic's schema caches
+        client.get(path).raise_for_status()
+
+    samples, peaks = [], []
+    for _ in range(requests):
+        start = time.perf_counter()
+        client.get(path)
+        samples.append(time.perf_counter() - start)
+
+    for _ in range(max(1, requests // 10)):
+        tracemalloc.start()
+        response = client.get(path)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+        "peak_alloc_kib": round(statistics.median(peaks) / 1024, 1),
+        "response_kib": round(len(response.content) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark report/user response serialization.")
+    parser.add_argument("--reports", type=int, default=100, help="Reports in the history response")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--output", help="Optional JSON result path")
+    args = parser.parse_args()
+
+    client = build_client(args.reports)
+    cases = {
+        f"history_{args.reports}_reports": ("/bench/before/history", "/api/v1/reports/history"),
+        "user_by_id": (f"/bench/before/users/{USER_ID}", f"/api/v1/users/{USER_ID}"),
+    }
+
+    results = {"timestamp": datetime.now().isoformat(), "config": vars(args), "cases": {}}
+    for name, (before, after) in cases.items():
+        assert client.get(before).json() == client.get(after).json(), f"{name}: response bodies differ"
+        case = {"before": measure(client, before, args.requests), "after": measure(client, after, args.requests)}
+        case["speedup"] = round(case["before"]["median_ms"] / case["after"]["median_ms"], 2)
+        results["cases"][name] = case
+        print(f"--- {name} ---")
+        print(json.dumps(case, indent=2))
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import os
+import sys
+import math
+import time
+import random
+import argparse
+import statistics
+
+# --- Unit Conversion Corpus and Benchmark ---
+# 1. Checks every unit variant in UNIT_CORPUS: parse, convert to the
+#    indicator's canonical unit, and compare against the expected value.
+# 2. Times a trend conversion of N mixed-unit points: per-item Python parsing
+#    and conversion (what a request used to do) versus ingest-time parsing plus
+#    one vectorized convert_series() call.
+#
+# Usage (from backend/):
+#   python benchmarks/units.py
+#   python benchmarks/units.py --points 500 --repeat 50
+#
+# Exits non-zero when any corpus entry is wrong. Needs NumPy.
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+
+from app.services.units import CANONICAL_UNITS, parse_value, conversion, convert_series, annotate_values
+
+# (indicator code, value as printed by the lab, expected value in the canonical unit or None)
+UNIT_CORPUS = [
+    ("HGB", "14.2 g/dL", 14.2), ("HGB", "14.2 g/dl", 14.2), ("HGB", "14.2 gm/dl", 14.2), ("HGB", "14.2 gm%", 14.2),
+    ("HGB", "14.2 g%", 14.2), ("HGB", "142 g/L", 14.2), ("HGB", "142 gm/l", 14.2), ("HGB", "14.2", 14.2),
+    ("RBC", "4.5 mill/mm3", 4.5), ("RBC", "4.5 million/cumm", 4.5), ("RBC", "4.5 mill/cu.mm", 4.5),
+    ("RBC", "4.5 x10^12/L", 4.5), ("RBC", "4.5 10^6/uL", 4.5), ("RBC", "4.5 x10⁶/µL", 4.5), ("RBC", "4.5 million/µl", 4.5),
+    ("WBC", "7500 /cumm", 7.5), ("WBC", "7,500 cells/cumm", 7.5), ("WBC", "7500 /mm3", 7.5), ("WBC", "7500 cells/uL", 7.5),
+    ("WBC", "7.5 x10^9/L", 7.5), ("WBC", "7.5 10³/µL", 7.5), ("WBC", "7.5 thou/mm3", 7.5), ("WBC", "7.5 K/uL", 7.5),
+    ("PLT", "1.5 lakhs/cumm", 150.0), ("PLT", "1.5 lakh/cumm", 150.0), ("PLT", "1,50,000 /µL", 150.0),
+    ("PLT", "150 x10^3/uL", 150.0), ("PLT", "150 10^9/L", 150.0),
+    ("GLU_F", "99 mg/dL", 99.0), ("GLU_F", "99 mg%", 99.0), ("GLU_F", "5.5 mmol/L", 99.09), ("GLU_PP", "7.8 mmol/l", 140.52),
+    ("HBA1C", "6.5 %", 6.5), ("HBA1C", "48 mmol/mol", 6.543),
+    ("CHOL", "5.0 mmol/L", 193.325), ("LDL", "3.0 mmol/L", 115.995), ("HDL", "1.2 mmol/L", 46.398),
+    ("TRIG", "1.7 mmol/L", 150.569), ("CREA", "88.4 umol/L", 1.0), ("CREA", "88.4 µmol/L", 1.0), ("CREA", "1.0 mg/dL", 1.0),
+    ("UREA", "5.0 mmol/L", 30.03), ("URIC", "357 umol/L", 6.0015), ("BILI_T", "17.1 µmol/L", 0.99977),
+    ("CA", "2.5 mmol/L", 10.02), ("CA", "5 mEq/L", 10.02), ("NA", "140 mEq/L", 140.0), ("K", "4.2 mmol/L", 4.2),
+    ("VITD", "75 nmol/L", 30.0495), ("VITD", "30 ng/mL", 30.0), ("VITD", "30 ug/L", 30.0),
+    ("VITB12", "300 pmol/L", 406.611), ("VITB12", "406 pg/mL", 406.0), ("VITB12", "406 ng/L", 406.0),
+    ("TSH", "2.5 uIU/mL", 2.5), ("TSH", "2.5 µIU/ml", 2.5), ("TSH", "2.5 mIU/L", 2.5), ("TSH", "0.0025 mIU/mL", 2.5),
+    ("FT4", "1.2 ng/dL", 1.2), ("T4", "8 mcg/dL", 8.0), ("IRON", "17.9 umol/L", 99.963),
+    ("ALT", "30 U/L", 30.0), ("ALT", "30 IU/L", 30.0), ("ESR", "12 mm/1st hr", 12.0), ("ESR", "12 mm/hr", 12.0),
+    ("EGFR", "95 mL/min/1.73m2", 95.0), ("CRP", "0.5 mg/dL", 5.0), ("CRP", "5 mg/L", 5.0),
+    ("NEUT", "60 %", 60.0), ("NEUT", "4500 /µL", None),  # absolute count is not a percentage
+    ("HGB", "14.2 mmol/L", None),  # no molar mass for hemoglobin
+    ("HGB", "Negative", None),
+]
+
+
+def check_corpus() -> int:
+    failures = 0
+    for code, value, expected in UNIT_CORPUS:
+        number, unit = parse_value(value)
+        factors = conversion(code, unit, CANONICAL_UNITS[code]) if number is not None else None
+        got = None if factors is None else number * factors[0] + factors[1]
+        ok = (got is None) if expected is None else (got is not None and math.isclose(got, expected, rel_tol=1e-3))
+        if not ok:
+            failures += 1
+            print(f"❌ {code} {value!r}: expected {expected}, got {got}")
+    print(f"Corpus: {len(UNIT_CORPUS) - failures}/{len(UNIT_CORPUS)} unit variants converted correctly.")
+    return failures
+
+
+def per_item(code: str, values: list) -> list:
+    """The old shape of a trend request: parse and convert every string on every read."""
+    target = CANONICAL_UNITS[code]
+    out = []
+    for value in values:
+        number, unit = parse_value(value)
+        factors = conversion(code, unit, target) if number is not None else None
+        out.append(None if factors is None else number * factors[0] + factors[1])
+    return out
+
+
+def bench(points: int, repeat: int) -> None:
+    rng = random.Random(3)
+    variants = [value for code, value, expected in UNIT_CORPUS if code == "HGB" and expected is not None]
+    values = [rng.choice(variants) for _ in range(points)]
+    entities = annotate_values([{"Indicator": "Hemoglobin", "Value": v} for v in values])  # done once, at ingest
+    numbers, units = [e["Number"] for e in entities], [e["Unit"] or "" for e in entities]
+    convert_series("HGB", numbers[:2], units[:2])  # import NumPy outside the timings
+
+    def timed(fn):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+        return statistics.median(samples) * 1000
+
+    before = timed(lambda: per_item("HGB", values))
+    after = timed(lambda: convert_series("HGB", numbers, units))
+    print(f"{points} points: per-item {before:.3f} ms, vectorized {after:.3f} ms ({before / after:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the unit corpus and time trend conversion.")
+    parser.add_argument("--points", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    failures = check_corpus()
+    bench(args.points, args.repeat)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
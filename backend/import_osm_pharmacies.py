@@ -0,0 +1,166 @@
+import sys
+import os
+import json
+import argparse
+import logging
+
+# 1. SETUP PATH
+sys.path.append(os.getcwd())
+
+from pymongo import MongoClient, ReplaceOne, GEOSPHERE
+
+from app.core.config import settings
+from app.services.osm_index import (
+    OSM_COLLECTION, OSM_COVERAGE_COLLECTION, element_to_pharmacy, extend_bbox, pharmacy_to_document,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+# Usage:
+#   python import_osm_pharmacies.py pharmacies.json          (Overpass JSON dump)
+#   python import_osm_pharmacies.py india-latest.osm.pbf     (needs `pip install osmium`)
+#   python import_osm_pharmacies.py extract.pbf --replace    (drop the old index first)
+#
+# The bounding box of the imported pharmacies is recorded per file; lookups
+# outside every recorded box go to the live Overpass API.
+#
+# A suitable Overpass dump can be produced with:
+#   [out:json]; nwr["amenity"="pharmacy"]({{bbox}}); out center;
+
+
+def _centroid(points: list) -> dict:
+    return {
+        'lat': sum(p[0] for p in points) / len(points),
+        'lon': sum(p[1] for p in points) / len(points),
+    }
+
+
+def read_overpass_json(path: str):
+    """
+    Yields pharmacy elements from an Overpass JSON dump. Dumps made with
+    `out center` already carry a center; for `out body; >; out skel` dumps the
+    way centroid is computed from the node coordinates in the same file.
+    """
+    with open(path, encoding="utf-8") as f:
+        elements = json.load(f).get('elements', [])
+
+    node_coords = {e['id']: (e['lat'], e['lon']) for e in elements if e.get('type') == 'node' and 'lat' in e}
+    way_nodes = {e['id']: e.get('nodes', []) for e in elements if e.get('type') == 'way'}
+
+    for element in elements:
+        if element.get('tags', {}).get('amenity') != 'pharmacy':
+            continue
+
+        if element.get('type') == 'way' and 'center' not in element:
+            points = [node_coords[n] for n in element.get('nodes', []) if n in node_coords]
+            if points:
+                element['center'] = _centroid(points)
+
+        elif element.get('type') == 'relation' and 'center' not in element:
+            points = []
+            for member in element.get('members', []):
+                if member.get('type') == 'node' and member.get('ref') in node_coords:
+                    points.append(node_coords[member['ref']])
+                elif member.get('type') == 'way':
+                    points += [node_coords[n] for n in way_nodes.get(member.get('ref'), []) if n in node_coords]
+            if points:
+                element['center'] = _centroid(points)
+
+        yield element
+
+
+def read_pbf(path: str):
+    """Yields pharmacy elements from an OSM PBF extract using pyosmium."""
+    try:
+        import osmium
+    except ImportError:
+        logger.error("Reading .pbf files needs pyosmium. Install it with `pip install osmium`.")
+        sys.exit(1)
+
+    elements = []
+
+    class PharmacyHandler(osmium.SimpleHandler):
+        def node(self, n):
+            if n.tags.get('amenity') == 'pharmacy':
+                elements.append({
+                    'type': 'node', 'id': n.id,
+                    'lat': n.location.lat, 'lon': n.location.lon,
+                    'tags': dict(n.tags),
+                })
+
+        def way(self, w):
+            if w.tags.get('amenity') == 'pharmacy':
+                points = [(node.lat, node.lon) for node in w.nodes if node.location.valid()]
+                if points:
+                    elements.append({
+                        'type': 'way', 'id': w.id,
+                        'center': _centroid(points),
+                        'tags': dict(w.tags),
+                    })
+
+        def area(self, a):
+            # Multipolygon relations; closed ways were already handled in way().
+            if a.from_way() or a.tags.get('amenity') != 'pharmacy':
+                return
+            points = [(node.lat, node.lon) for ring in a.outer_rings() for node in ring if node.location.valid()]
+            if points:
+                elements.append({
+                    'type': 'relation', 'id': a.orig_id(),
+                    'center': _centroid(points),
+                    'tags': dict(a.tags),
+                })
+
+    PharmacyHandler().apply_file(path, locations=True)
+    yield from elements
+
+
+def import_pharmacies(path: str, replace: bool = False):
+    reader = read_pbf if path.endswith(".pbf") else read_overpass_json
+
+    client = MongoClient(settings.MONGO_URI)
+    collection = client[settings.MONGO_DB_NAME][OSM_COLLECTION]
+    coverage = client[settings.MONGO_DB_NAME][OSM_COVERAGE_COLLECTION]
+
+    if replace:
+        logger.info(f"Dropping existing '{OSM_COLLECTION}' collection...")
+        collection.drop()
+        coverage.drop()
+
+    collection.create_index([("location", GEOSPHERE)])
+
+    imported, skipped, batch, bbox = 0, 0, [], None
+    for element in reader(path):
+        pharmacy = element_to_pharmacy(element)
+        if not pharmacy:
+            skipped += 1
+            continue
+        bbox = extend_bbox(bbox, pharmacy)
+
+        batch.append(ReplaceOne({'_id': pharmacy['place_id']}, pharmacy_to_document(pharmacy), upsert=True))
+        if len(batch) >= BATCH_SIZE:
+            collection.bulk_write(batch, ordered=False)
+            imported += len(batch)
+            batch = []
+
+    if batch:
+        collection.bulk_write(batch, ordered=False)
+        imported += len(batch)
+
+    # Recorded last, so an interrupted import is never served as complete.
+    if bbox is not None:
+        coverage.replace_one({'_id': os.path.basename(path)}, {'bbox': bbox}, upsert=True)
+
+    logger.info(f"✅ Imported {imported} pharmacies into '{OSM_COLLECTION}' ({skipped} skipped without a location).")
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load OSM amenity=pharmacy data into the local 2dsphere index.")
+    parser.add_argument("path", help="Overpass JSON dump (.json) or OSM extract (.pbf)")
+    parser.add_argument("--replace", action="store_true", help="Drop the existing index before importing")
+    args = parser.parse_args()
+
+    import_pharmacies(args.path, replace=args.replace)
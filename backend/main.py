@@ -1,24 +1,37 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware  # <-- IMPORT THIS
 from contextlib import asynccontextmanager
 import logging
+import time
 
-from app.db.mongodb import connect_to_mongo, close_mongo_connection
+from app.db.mongodb import connect_to_mongo, close_mongo_connection, get_database
+from app.crud import crud_reminder, crud_chat, crud_report, crud_report_job
 from app.api.v1.api import api_router
+from app.services.maps_service import maps_service
+from app.core import metrics
+from app.core.serialization import FastJSONResponse
+from app.core.compression import CompressionMiddleware
+from app.core.config import settings
 
 logging.basicConfig(level=logging.INFO)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await connect_to_mongo()
+    await crud_reminder.ensure_indexes(get_database())
+    await crud_chat.ensure_indexes(get_database())
+    await crud_report_job.ensure_indexes(get_database())
+    await crud_report.ensure_indexes(get_database())
     yield
+    await maps_service.close()
     await close_mongo_connection()
 
 app = FastAPI(
     title="Vitalyze.ai",
     description="API for simplifying medical reports and managing health.",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
  
@@ -29,8 +42,36 @@ app.add_middleware(
     allow_credentials=True,           
     allow_methods=["*"],              
     allow_headers=["*"],             
+    expose_headers=["ETag", "Last-Modified"],
 )
 
+# Added last, so it wraps CORS and compresses every buffered response.
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_BYTES)
+
+
+if metrics.ENABLED:
+    @app.middleware("http")
+    async def record_request_latency(request: Request, call_next):
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            # Use the route template ("/reports/status/{task_id}") so labels stay bounded.
+            route = request.scope.get("route")
+            metrics.HTTP_REQUEST_SECONDS.labels(
+                method=request.method,
+                route=route.path if route else "unmatched",
+                status=status,
+            ).observe(time.perf_counter() - start)
+
+    @app.get("/metrics", include_in_schema=False)
+    def prometheus_metrics():
+        body, content_type = metrics.render_latest()
+        return Response(content=body, media_type=content_type)
+
 
 app.include_router(api_router, prefix="/api/v1")
 
@@ -0,0 +1,88 @@
+import sys
+import os
+import copy
+import argparse
+import logging
+from datetime import datetime
+
+# 1. SETUP PATH
+sys.path.append(os.getcwd())
+
+from bson import ObjectId
+from pymongo import MongoClient, UpdateOne
+
+from app.core.config import settings
+from app.services.indicators import canonicalize_entities
+from app.services.units import annotate_values
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# One-off migration: adds the canonical indicator `Code` (and the parsed
+# `Number`/`Unit`) to the results of reports saved before ingest-time
+# canonicalization, so trends, which query by code, include them. Codes
+# resolved by an older alias table are recomputed too. Names only, no Gemini
+# calls; use backfill_reports.py to re-analyse the report text instead.
+# Safe to re-run; reports whose results already match are not written.
+#
+# Usage (from backend/):
+#   python migrate_indicator_codes.py
+#   python migrate_indicator_codes.py --batch-size 200
+
+BATCH_SIZE = 500
+
+
+def recode_entities(entities: list) -> list:
+    """The entities with fresh codes, and Number/Unit parsed where missing."""
+    entities = copy.deepcopy(entities)
+    canonicalize_entities(entities)
+    annotate_values([entity for entity in entities if isinstance(entity, dict) and "Number" not in entity])
+    return entities
+
+
+def migrate(batch_size: int = BATCH_SIZE):
+    client = MongoClient(settings.MONGO_URI)
+    db = client[settings.MONGO_DB_NAME]
+
+    scanned = updated = 0
+    user_ids = set()
+    last_id = None
+    while True:
+        query = {"structured_entities.0": {"$exists": True}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = list(db["reports"].find(query, {"user_id": 1, "structured_entities": 1}).sort("_id", 1).limit(batch_size))
+        if not batch:
+            break
+
+        operations = []
+        for report in batch:
+            entities = recode_entities(report["structured_entities"])
+            if entities != report["structured_entities"]:
+                operations.append(UpdateOne({"_id": report["_id"]}, {"$set": {"structured_entities": entities}}))
+                user_ids.add(str(report.get("user_id")))
+
+        if operations:
+            db["reports"].bulk_write(operations, ordered=False)
+        scanned += len(batch)
+        updated += len(operations)
+        last_id = batch[-1]["_id"]
+        logger.info(f"Scanned {scanned} reports, updated {updated} so far...")
+
+    # Changed results must not be served from a cached history listing.
+    ids = [ObjectId(i) for i in user_ids if ObjectId.is_valid(i)]
+    if ids:
+        db["users"].update_many(
+            {"_id": {"$in": ids}}, {"$inc": {"reports_version": 1}, "$set": {"reports_updated_at": datetime.now()}}
+        )
+
+    logger.info(f"✅ Updated indicator codes on {updated} of {scanned} reports.")
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add canonical indicator codes to stored report results.")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    migrate(args.batch_size)
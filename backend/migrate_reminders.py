@@ -0,0 +1,117 @@
+import sys
+import os
+import logging
+from datetime import datetime
+
+# 1. SETUP PATH
+sys.path.append(os.getcwd())
+
+from bson import ObjectId
+from pymongo import MongoClient, InsertOne, UpdateOne, DeleteOne
+
+from app.core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# One-off migration: moves reminders embedded in user documents
+# (daily_reminders / refill_reminders arrays) into the 'reminders' collection
+# and removes the arrays from the users. Embedded reminders stored their
+# _id as a string; the collection keys them by ObjectId. Re-running it also
+# re-keys reminders an earlier run copied with string _ids.
+#
+# Refills whose refill_date has passed were already sent by their old ETA
+# task, so they are marked sent for the sweeper. Refills are unique per user
+# and medicine in the collection; for duplicates the latest one is kept.
+# Run this before deploying the API, whose startup creates that unique index.
+#
+# Usage (from backend/):
+#   python migrate_reminders.py
+
+
+def _object_id(value) -> ObjectId:
+    return ObjectId(str(value)) if ObjectId.is_valid(str(value)) else ObjectId()
+
+
+def rekey_string_ids(db) -> int:
+    """Re-inserts reminders whose _id is a string under the matching ObjectId."""
+    operations = []
+    for doc in db["reminders"].find({"_id": {"$type": "string"}}):
+        operations.append(InsertOne({**doc, "_id": _object_id(doc["_id"])}))
+        operations.append(DeleteOne({"_id": doc["_id"]}))
+    if operations:
+        db["reminders"].bulk_write(operations, ordered=True)
+    return len(operations) // 2
+
+
+def dedupe_refills(db) -> int:
+    """Keeps the newest refill reminder per (user, medicine), as the refill upsert would have."""
+    duplicates = db["reminders"].aggregate([
+        {"$match": {"type": "refill"}},
+        {"$sort": {"start_date": -1, "_id": -1}},
+        {"$group": {"_id": {"user_id": "$user_id", "medicine_name": "$medicine_name"}, "ids": {"$push": "$_id"}}},
+        {"$match": {"ids.1": {"$exists": True}}},
+    ])
+    stale = [reminder_id for group in duplicates for reminder_id in group["ids"][1:]]
+    if stale:
+        db["reminders"].delete_many({"_id": {"$in": stale}})
+    return len(stale)
+
+
+def migrate():
+    client = MongoClient(settings.MONGO_URI)
+    db = client[settings.MONGO_DB_NAME]
+
+    cursor = db["users"].find(
+        {"$or": [{"daily_reminders": {"$exists": True}}, {"refill_reminders": {"$exists": True}}]},
+        {"name": 1, "phone_number": 1, "daily_reminders": 1, "refill_reminders": 1},
+    )
+
+    now = datetime.now()
+    inserts, unsets, eta_task_ids = [], [], []
+    for user in cursor:
+        base = {
+            "user_id": str(user["_id"]),
+            "user_name": user.get("name", "User"),
+            "phone_number": user.get("phone_number"),
+            "created_at": datetime.now(),
+            "updated_at": datetime.now(),
+        }
+        for reminder in user.get("daily_reminders", []):
+            inserts.append(InsertOne({**reminder, **base, "_id": _object_id(reminder.get("_id")), "type": "daily"}))
+        for reminder in user.get("refill_reminders", []):
+            # Refills are now sent by the due-time sweeper; drop the old ETA task.
+            if reminder.get("celery_task_id"):
+                eta_task_ids.append(reminder.pop("celery_task_id"))
+            doc = {**reminder, **base, "_id": _object_id(reminder.get("_id")), "type": "refill"}
+            refill_date = reminder.get("refill_date")
+            if isinstance(refill_date, datetime) and refill_date <= now:
+                doc["refill_sent_at"] = refill_date
+            inserts.append(InsertOne(doc))
+        unsets.append(UpdateOne({"_id": user["_id"]}, {"$unset": {"daily_reminders": "", "refill_reminders": ""}}))
+
+    if inserts:
+        # Embedded reminders already have their own _id, so a re-run fails on
+        # duplicates instead of copying them twice.
+        db["reminders"].bulk_write(inserts, ordered=False)
+    if unsets:
+        db["users"].bulk_write(unsets, ordered=False)
+
+    if eta_task_ids:
+        from app.tasks.celery_app import celery
+        celery.control.revoke(eta_task_ids)
+        logger.info(f"Revoked {len(eta_task_ids)} pending refill ETA tasks.")
+
+    rekeyed = rekey_string_ids(db)
+    if rekeyed:
+        logger.info(f"Re-keyed {rekeyed} reminders stored with string _ids.")
+    removed = dedupe_refills(db)
+    if removed:
+        logger.info(f"Removed {removed} duplicate refill reminders.")
+
+    logger.info(f"✅ Moved {len(inserts)} reminders out of {len(unsets)} user documents.")
+    client.close()
+
+
+if __name__ == "__main__":
+    migrate()
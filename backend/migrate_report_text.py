@@ -0,0 +1,64 @@
+import sys
+import os
+import argparse
+import logging
+
+# 1. SETUP PATH
+sys.path.append(os.getcwd())
+
+from pymongo import MongoClient, UpdateOne
+
+from app.core.config import settings
+from app.crud.crud_report import TEXT_COLLECTION, compress_text
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# One-off migration: moves inline `raw_text` out of 'reports' into the
+# compressed 'report_texts' collection and leaves a `raw_text_ref` behind.
+# Safe to re-run; already migrated reports have no `raw_text` left.
+#
+# Usage (from backend/):
+#   python migrate_report_text.py
+#   python migrate_report_text.py --batch-size 200
+
+BATCH_SIZE = 500
+
+
+def migrate(batch_size: int = BATCH_SIZE):
+    client = MongoClient(settings.MONGO_URI)
+    db = client[settings.MONGO_DB_NAME]
+
+    moved = raw_chars = 0
+    while True:
+        batch = list(db["reports"].find({"raw_text": {"$exists": True}}, {"raw_text": 1}).limit(batch_size))
+        if not batch:
+            break
+
+        texts, refs = [], []
+        for report in batch:
+            text = report.get("raw_text") or ""
+            texts.append(UpdateOne(
+                {"_id": report["_id"]}, {"$set": {**compress_text(text), "chars": len(text)}}, upsert=True
+            ))
+            refs.append(UpdateOne(
+                {"_id": report["_id"]}, {"$set": {"raw_text_ref": report["_id"]}, "$unset": {"raw_text": ""}}
+            ))
+            raw_chars += len(text)
+
+        # Texts first, so a crash in between never leaves a report without its text.
+        db[TEXT_COLLECTION].bulk_write(texts, ordered=False)
+        db["reports"].bulk_write(refs, ordered=False)
+        moved += len(batch)
+        logger.info(f"Moved {moved} reports so far...")
+
+    logger.info(f"✅ Moved raw_text for {moved} reports ({raw_chars} chars) into '{TEXT_COLLECTION}'.")
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move inline report raw_text into the compressed report_texts collection.")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    migrate(args.batch_size)
@@ -0,0 +1,12 @@
+import os
+import sys
+
+# Tests run from backend/ against in-memory fakes; Settings() only needs the
+# environment variables to exist.
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.fakes import DUMMY_ENV
+
+for key, value in DUMMY_ENV.items():
+    os.environ.setdefault(key, value)
@@ -0,0 +1,30 @@
+import pytest
+
+from app.services.answer_cache import AnswerCache
+
+
+@pytest.fixture
+def cache():
+    return AnswerCache(threshold=0.8, ttl_seconds=3600, max_entries=100)
+
+
+@pytest.mark.parametrize("cached_question, asked", [
+    ("What is the normal range of TSH?", "What is the normal range of T3?"),
+    ("Is it safe to drink alcohol with metformin?", "Is it safe to drink alcohol without metformin?"),
+    ("Symptoms of vitamin B12 deficiency", "Symptoms of vitamin B6 deficiency"),
+    ("Normal range of LDL", "Normal range of HDL"),
+    ("Normal range of LDL", "Normal range of LDL in children"),
+])
+def test_different_questions_are_not_served_each_others_answers(cache, cached_question, asked):
+    cache.put(cached_question, "cached answer")
+    assert cache.get(asked) is None
+
+
+@pytest.mark.parametrize("cached_question, asked", [
+    ("what is hba1c", "What does HbA1c mean?"),
+    ("Side effects of metformin", "metformin side effects?"),
+    ("Why is fasting required for a lipid profile", "why is fasting requred for lipid profile"),
+])
+def test_rephrased_questions_hit(cache, cached_question, asked):
+    cache.put(cached_question, "cached answer")
+    assert cache.get(asked) == "cached answer"
@@ -0,0 +1,93 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+from app.crud import crud_backfill
+from app.models.report import BackfillRunInDB
+from app.tasks import backfill_tasks, report_processing
+from benchmarks.fakes import FakeDatabase, FakeGeminiModel
+
+STORED_ENTITIES = [{"Indicator": "Hemoglobin", "Value": "13.1 g/dL"}]
+STORED_SUMMARY = "Your hemoglobin is normal."
+# No recognised unit, so extraction has to call the model.
+REPORT_TEXT = "Platelet count 2.5 lakhs per microlitre"
+
+
+class FakeStore:
+    """JobStore over an in-memory database."""
+    def __init__(self, db):
+        self.db = db
+        self.loop = asyncio.new_event_loop()
+
+    def run(self, crud_function, *args, **kwargs):
+        return self.loop.run_until_complete(crud_function(self.db, *args, **kwargs))
+
+
+class FailingModel:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def generate_content(self, prompt):
+        raise RuntimeError("429 Resource exhausted")
+
+
+class EmptyVitalsModel(FakeGeminiModel):
+    def generate_content(self, prompt):
+        if self.structured:
+            return SimpleNamespace(text=json.dumps([]), usage_metadata=None)
+        return super().generate_content(prompt)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setattr(backfill_tasks.model_limiter, "redis", None)
+    store = FakeStore(FakeDatabase())
+    store.report_id = ObjectId()
+    store.db["reports"].docs.append({
+        "_id": store.report_id, "user_id": str(ObjectId()), "raw_text": REPORT_TEXT,
+        "structured_entities": STORED_ENTITIES, "simple_summary": STORED_SUMMARY,
+    })
+    yield store
+    store.loop.close()
+
+
+def start_run(store, **options) -> BackfillRunInDB:
+    run = BackfillRunInDB(dry_run=False, **options)
+    store.run(crud_backfill.create_run, run)
+    return run
+
+
+def stored_report(store) -> dict:
+    return store.db["reports"].docs[0]
+
+
+def test_run_writes_reanalysed_vitals(monkeypatch, store):
+    monkeypatch.setattr(report_processing.genai, "GenerativeModel", FakeGeminiModel)
+    run = start_run(store)
+
+    assert backfill_tasks.run_backfill_batch(store, str(run.id)) is True
+    assert backfill_tasks.run_backfill_batch(store, str(run.id)) is False
+
+    report = stored_report(store)
+    assert [e["Indicator"] for e in report["structured_entities"]] == ["Platelet count"]
+    assert report["backfill_run_id"] == str(run.id)
+    saved = store.run(crud_backfill.get_run, str(run.id))
+    assert saved.status == "completed"
+    assert (saved.processed, saved.changed, saved.failed) == (1, 1, 0)
+
+
+@pytest.mark.parametrize("model", [FailingModel, EmptyVitalsModel])
+def test_failed_reanalysis_never_overwrites_the_report(monkeypatch, store, model):
+    monkeypatch.setattr(report_processing.genai, "GenerativeModel", model)
+    run = start_run(store)
+
+    backfill_tasks.run_backfill_batch(store, str(run.id))
+
+    report = stored_report(store)
+    assert report["structured_entities"] == STORED_ENTITIES
+    assert report["simple_summary"] == STORED_SUMMARY
+    saved = store.run(crud_backfill.get_run, str(run.id))
+    assert (saved.failed, saved.failed_ids) == (1, [str(store.report_id)])
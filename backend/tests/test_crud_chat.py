@@ -0,0 +1,39 @@
+import asyncio
+
+from bson import ObjectId
+
+from app.crud import crud_chat
+from app.models.chat import ChatMessage, ChatSessionInDB
+from benchmarks.fakes import FakeDatabase
+
+USER_ID = str(ObjectId())
+
+
+def test_follow_up_turns_reach_the_session():
+    db = FakeDatabase()
+    session = ChatSessionInDB(user_id=USER_ID, title="What is HbA1c?")
+
+    async def scenario():
+        await crud_chat.create_session(db, session)
+        await crud_chat.append_messages(db, str(session.id), [
+            ChatMessage(role="user", text="What is HbA1c?"),
+            ChatMessage(role="model", text="A three-month average of blood sugar."),
+        ])
+        return await crud_chat.get_session(db, USER_ID, str(session.id))
+
+    stored = asyncio.run(scenario())
+    assert stored is not None
+    assert [m.role for m in stored.messages] == ["user", "model"]
+
+
+def test_stale_compaction_is_dropped():
+    db = FakeDatabase()
+    session = ChatSessionInDB(user_id=USER_ID, title="Cholesterol", compacted_messages=6)
+
+    async def scenario():
+        await crud_chat.create_session(db, session)
+        # Summarized from a snapshot taken before the compaction that already moved the count to 6.
+        return await crud_chat.compact_session(db, str(session.id), "Asked about LDL.", 6, compacted_messages=0)
+
+    assert asyncio.run(scenario()) is False
+    assert db[crud_chat.COLLECTION].docs[0]["summary"] == ""
@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo.errors import BulkWriteError
+
+from app.api.v1.endpoints import reminders
+from app.crud import crud_reminder
+from app.models.reminder import ReminderBulkUpdate, ReminderInDB
+from app.models.user import UserInDB
+from benchmarks.fakes import FakeDatabase
+
+USER_ID = str(ObjectId())
+
+
+def reminder(**fields) -> ReminderInDB:
+    return ReminderInDB(user_id=USER_ID, user_name="Asha", phone_number="+919800000000", **fields)
+
+
+def test_bulk_operations_find_created_reminders():
+    db = FakeDatabase()
+    daily = reminder(type="daily", medicine_name="Metformin", timings=["morning"])
+    refill = reminder(
+        type="refill", medicine_name="Atorvastatin", initial_quantity=30, frequency_per_day=1,
+        start_date=datetime.now(), refill_date=datetime.now(),
+    )
+
+    async def scenario():
+        await crud_reminder.create_reminders(db, [daily, refill])
+        found = await crud_reminder.get_reminders_by_ids(db, USER_ID, [daily.id, refill.id])
+        updated = await crud_reminder.update_reminders(db, USER_ID, {str(daily.id): {"is_active": False}})
+        deleted = await crud_reminder.delete_reminders(db, USER_ID, [refill.id])
+        return found, updated, deleted
+
+    found, updated, deleted = asyncio.run(scenario())
+    assert all(isinstance(doc["_id"], ObjectId) for doc in db[crud_reminder.COLLECTION].docs)
+    assert {r.id for r in found} == {daily.id, refill.id}
+    assert updated == 1
+    assert deleted == 1
+
+
+def _refill(medicine_name: str) -> ReminderInDB:
+    return reminder(
+        type="refill", medicine_name=medicine_name, initial_quantity=30, frequency_per_day=1,
+        start_date=datetime.now(), refill_date=datetime.now(),
+    )
+
+
+def _rename(db, reminder_id, medicine_name):
+    user = UserInDB(_id=USER_ID, name="Asha", phone_number="+919800000000", hashed_password="x")
+    bulk_in = ReminderBulkUpdate(updates=[{"id": reminder_id, "medicine_name": medicine_name}])
+    return asyncio.run(reminders.bulk_update_reminders(bulk_in, current_user=user, db=db))
+
+
+def test_renaming_a_refill_onto_another_is_a_conflict():
+    db = FakeDatabase()
+    metformin, statin = _refill("Metformin"), _refill("Atorvastatin")
+    asyncio.run(crud_reminder.create_reminders(db, [metformin, statin]))
+
+    with pytest.raises(HTTPException) as error:
+        _rename(db, statin.id, "Metformin")
+    assert error.value.status_code == 409
+    assert str(metformin.id) in error.value.detail
+    assert _rename(db, statin.id, "Rosuvastatin") == {"modified": 1}
+
+
+def test_a_concurrent_rename_is_a_conflict_too(monkeypatch):
+    db = FakeDatabase()
+    metformin, statin = _refill("Metformin"), _refill("Atorvastatin")
+    asyncio.run(crud_reminder.create_reminders(db, [metformin, statin]))
+
+    async def no_check(*args):
+        pass
+
+    async def duplicate_key(operations, ordered=True):
+        raise BulkWriteError({"writeErrors": [{"index": 0, "code": 11000, "keyValue": {
+            "user_id": USER_ID, "type": "refill", "medicine_name": "Metformin",
+        }}]})
+
+    monkeypatch.setattr(crud_reminder, "check_refill_names", no_check)
+    monkeypatch.setattr(db[crud_reminder.COLLECTION], "bulk_write", duplicate_key)
+    with pytest.raises(HTTPException) as error:
+        _rename(db, statin.id, "Metformin")
+    assert error.value.status_code == 409
+    assert str(metformin.id) in error.value.detail
@@ -0,0 +1,48 @@
+import asyncio
+
+from bson import ObjectId
+
+from app.crud import crud_report_job
+from app.models.report import ReportJobInDB
+from benchmarks.fakes import FakeDatabase
+
+
+def make_job() -> ReportJobInDB:
+    return ReportJobInDB(user_id=str(ObjectId()), filename="cbc.pdf", file_path="/tmp/cbc.pdf")
+
+
+def test_job_is_stored_under_an_objectid():
+    db = FakeDatabase()
+    job = make_job()
+    asyncio.run(crud_report_job.create_job(db, job))
+    assert isinstance(db[crud_report_job.COLLECTION].docs[0]["_id"], ObjectId)
+
+
+def test_created_job_round_trips():
+    db = FakeDatabase()
+    job = make_job()
+
+    async def scenario():
+        await crud_report_job.create_job(db, job)
+        await crud_report_job.set_task_id(db, str(job.id), "task-1")
+        await crud_report_job.save_stage(db, str(job.id), crud_report_job.STAGE_EXTRACT, {"extraction": {"full_text": "Hb 14"}})
+        return await crud_report_job.get_job(db, str(job.id))
+
+    stored = asyncio.run(scenario())
+    assert stored is not None
+    assert stored.id == job.id
+    assert stored.task_id == "task-1"
+    assert stored.completed_stages == [crud_report_job.STAGE_EXTRACT]
+
+
+def test_status_lookup_finds_a_job_created_with_its_task_id():
+    db = FakeDatabase()
+    job = make_job()
+    job.task_id = "0f1e2d3c-task"
+
+    async def scenario():
+        await crud_report_job.create_job(db, job)
+        return await crud_report_job.get_job_by_task_id(db, job.user_id, job.task_id)
+
+    found = asyncio.run(scenario())
+    assert found is not None and found.id == job.id
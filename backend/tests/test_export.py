@@ -0,0 +1,19 @@
+import csv
+import io
+from datetime import datetime
+
+from app.services.export import _CsvRows
+
+
+def _read(data: bytes) -> list:
+    return next(csv.reader(io.StringIO(data.decode("utf-8"))))
+
+
+def test_formula_cells_are_escaped():
+    row = _read(_CsvRows().row(["=HYPERLINK(\"http://x\")", "+1", "-2 mg", "@SUM(A1)", "Metformin"]))
+    assert row == ["'=HYPERLINK(\"http://x\")", "'+1", "'-2 mg", "'@SUM(A1)", "Metformin"]
+
+
+def test_numbers_dates_and_missing_values_are_written_as_is():
+    row = _read(_CsvRows().row([-1.5, datetime(2026, 1, 2, 3, 4), None]))
+    assert row == ["-1.5", "2026-01-02T03:04:00", ""]
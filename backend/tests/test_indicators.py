@@ -0,0 +1,72 @@
+import pytest
+
+from app.services.indicators import canonical_code, compare_entities
+
+# Indicator names as printed on real reports, with the code each must resolve to.
+NAME_CORPUS = [
+    ("Hemoglobin", "HGB"),
+    ("Haemoglobin (Photometry)", "HGB"),
+    ("Haemoglobine", "HGB"),
+    ("Hb", "HGB"),
+    ("Total Leucocyte Count (TLC)", "WBC"),
+    ("Platelets (Impedance)", "PLT"),
+    ("Neutrophil (Segmented)", "NEUT"),
+    ("ESR (Westergren)", "ESR"),
+    ("Glucose (Fasting)", "GLU_F"),
+    ("Glucose (Random)", "GLU_R"),
+    ("HbA1c (Glycated Hemoglobin)", "HBA1C"),
+    ("Cholesterol (Total)", "CHOL"),
+    ("HDL Cholesterol (Direct)", "HDL"),
+    ("HDL Cholestrol", "HDL"),
+    ("LDL Cholesterol (Calculated)", "LDL"),
+    ("Tryglycerides", "TRIG"),
+    ("S. Creatinine", "CREA"),
+    ("Blood Urea Nitrogn", "BUN"),
+    ("Calcium (Total)", "CA"),
+    ("Bilirubin", "BILI_T"),
+    ("Bilirubin (Total)", "BILI_T"),
+    ("Bilirubin (Direct)", "BILI_D"),
+    ("Bilirubin (Indirect)", "BILI_I"),
+    ("Bilirubin Dirct", "BILI_D"),
+    ("SGPT (ALT)", "ALT"),
+    ("Alkaline Phosphatse", "ALP"),
+    ("Protein (Total)", "TP"),
+    ("TSH (Ultrasensitive)", "TSH"),
+    ("Thyroid Stimulating Hormon", "TSH"),
+    ("T3 (Free)", "FT3"),
+    ("Free T4", "FT4"),
+    ("Vitamin D (25-OH)", "VITD"),
+    ("Vitamin B12", "VITB12"),
+    ("Vit. B12", "VITB12"),
+    ("Vitamin B1", None),
+    ("Vitamin B6", None),
+    ("Vitamin B9", None),
+]
+
+
+@pytest.mark.parametrize("name, code", NAME_CORPUS)
+def test_name_corpus(name, code):
+    assert canonical_code(name) == code
+
+
+def test_comparison_keeps_direct_and_indirect_bilirubin_apart():
+    previous = [{"Indicator": "Bilirubin (Direct)", "Value": "0.2 mg/dL"}, {"Indicator": "Bilirubin (Indirect)", "Value": "0.6 mg/dL"}]
+    current = [{"Indicator": "Bilirubin (Direct)", "Value": "0.3 mg/dL"}, {"Indicator": "Bilirubin (Indirect)", "Value": "0.5 mg/dL"}]
+    rows = compare_entities(previous, current)
+    assert sorted(row["code"] for row in rows) == ["BILI_D", "BILI_I"]
+
+
+def test_comparison_reads_grouped_numbers_and_converts_units():
+    previous = [{"Indicator": "Platelet Count", "Value": "1,50,000 /cumm"}, {"Indicator": "Hemoglobin", "Value": "142 g/L"}]
+    current = [{"Indicator": "Platelet Count", "Value": "2,10,000 /cumm"}, {"Indicator": "Hemoglobin", "Value": "13.0 g/dL"}]
+    rows = {row["code"]: row for row in compare_entities(previous, current)}
+    assert rows["PLT"]["delta"] == 60000
+    assert rows["PLT"]["change"] == "up"
+    assert rows["HGB"]["delta"] == -1.2
+    assert rows["HGB"]["change"] == "down"
+
+
+def test_comparison_prefers_the_numbers_parsed_at_ingest():
+    previous = [{"Indicator": "Hemoglobin", "Value": "14.2 gm/dl", "Code": "HGB", "Number": 14.2, "Unit": "g/dL"}]
+    current = [{"Indicator": "Hemoglobin", "Value": "14.2 g/dL", "Code": "HGB", "Number": 14.2, "Unit": "g/dL"}]
+    assert compare_entities(previous, current)[0]["change"] == "same"
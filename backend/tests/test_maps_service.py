@@ -0,0 +1,63 @@
+import asyncio
+import math
+
+from app.services import maps_service as maps_module
+from app.services.geo_cache import haversine_m
+from benchmarks.fakes import FakeGeoCache
+
+USER = (12.9716, 77.5946)
+PLACES_PAGE_SIZE = 20
+
+
+def _place(name, lat, lon, prominence):
+    return {"name": name, "prominence": prominence, "geometry": {"location": {"lat": lat, "lng": lon}}, "place_id": name}
+
+
+def _ring(count, distance_m, prefix, prominence):
+    lat, lon = USER
+    return [
+        _place(
+            f"{prefix}{i}",
+            lat + distance_m / 111_320 * math.cos(2 * math.pi * i / count),
+            lon + distance_m / 111_320 / math.cos(math.radians(lat)) * math.sin(2 * math.pi * i / count),
+            prominence,
+        )
+        for i in range(count)
+    ]
+
+
+# Five small pharmacies next to the user, and well-known chains 3.5-4.5 km out.
+PLACES = _ring(5, 300, "near", 1) + _ring(30, 3500, "chain_a", 100) + _ring(30, 4500, "chain_b", 90)
+
+
+class FakePlacesResponse:
+    def __init__(self, results):
+        self.results = results
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"status": "OK", "results": self.results}
+
+
+class FakePlacesClient:
+    """Nearby Search: only the top page, ranked by prominence unless rankby=distance."""
+    async def get(self, url, params):
+        lat, lon = (float(n) for n in params["location"].split(","))
+        distance = lambda place: haversine_m(lat, lon, place["geometry"]["location"]["lat"], place["geometry"]["location"]["lng"])
+        if params.get("rankby") == "distance":
+            ranked = sorted(PLACES, key=distance)
+        else:
+            ranked = sorted((p for p in PLACES if distance(p) <= params["radius"]), key=lambda p: -p["prominence"])
+        return FakePlacesResponse(ranked[:PLACES_PAGE_SIZE])
+
+
+def test_nearest_pharmacies_survive_a_dense_area(monkeypatch):
+    monkeypatch.setattr(maps_module, "geo_cache", FakeGeoCache())
+    service = maps_module.MapsService()
+    service._client = FakePlacesClient()
+
+    pharmacies = asyncio.run(service.get_nearby_pharmacies(*USER, radius=3000))
+    assert sorted(p["name"] for p in pharmacies) == [f"near{i}" for i in range(5)]
+    assert all(p["distance_meters"] <= 3000 for p in pharmacies)
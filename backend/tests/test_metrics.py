@@ -0,0 +1,50 @@
+import importlib.util
+from types import SimpleNamespace
+
+import prometheus_client
+import pytest
+
+from app.core import metrics
+from app.core.config import settings
+from benchmarks.fakes import FakeRedis
+
+
+def test_disabled_metrics_are_shared_no_ops():
+    assert metrics.ENABLED is False
+    assert metrics.OCR_STAGE_SECONDS is metrics.MAPS_PROVIDER_WINS is metrics._NOOP
+    assert metrics.timer(metrics.OCR_STAGE_SECONDS, stage="preprocessor") is metrics._NULL_CONTEXT
+    assert metrics.mongo_client_kwargs() == {}
+    metrics.GEMINI_TOKENS.labels(purpose="vitals", kind="prompt").inc(10)  # Accepted and dropped
+
+
+@pytest.fixture
+def enabled_metrics(monkeypatch):
+    """A second copy of app.core.metrics loaded with METRICS_ENABLED, unregistered afterwards."""
+    monkeypatch.setattr(settings, "METRICS_ENABLED", True)
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    spec = importlib.util.spec_from_file_location("metrics_enabled_for_test", metrics.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    yield module
+    collectors = [value for value in vars(module).values() if isinstance(value, prometheus_client.metrics.MetricWrapperBase)]
+    for collector in collectors + [module._queue_depth_collector]:
+        prometheus_client.REGISTRY.unregister(collector)
+
+
+def test_enabled_metrics_are_exported(enabled_metrics):
+    broker = FakeRedis()
+    broker.rpush("celery", "task-1", "task-2")
+    enabled_metrics._queue_depth_collector._redis = broker
+
+    with enabled_metrics.timer(enabled_metrics.OCR_STAGE_SECONDS, stage="preprocessor"):
+        pass
+    enabled_metrics.MAPS_PROVIDER_WINS.labels(provider="osm").inc()
+    listener = enabled_metrics.mongo_client_kwargs()["event_listeners"][0]
+    listener.succeeded(SimpleNamespace(command_name="find", duration_micros=1500))
+
+    body, content_type = enabled_metrics.render_latest()
+    assert content_type.startswith("text/plain")
+    assert b'vitalyze_ocr_stage_seconds_count{stage="preprocessor"} 1.0' in body
+    assert b'vitalyze_maps_provider_wins_total{provider="osm"} 1.0' in body
+    assert b'vitalyze_mongo_command_seconds_sum{command="find",status="ok"} 0.0015' in body
+    assert b'vitalyze_celery_queue_depth{queue="celery"} 2.0' in body
@@ -0,0 +1,18 @@
+from migrate_indicator_codes import recode_entities
+
+
+def test_legacy_entities_get_codes_and_numbers():
+    entities = [{"Indicator": "Haemoglobin", "Value": "14.2 g/dL"}, {"Indicator": "Urine Colour", "Value": "Pale yellow"}]
+    recoded = recode_entities(entities)
+    assert recoded[0]["Code"] == "HGB"
+    assert recoded[0]["Number"] == 14.2
+    assert recoded[1]["Code"] is None
+    assert "Code" not in entities[0]
+
+
+def test_stale_codes_are_recomputed_and_current_entities_are_unchanged():
+    stale = [{"Indicator": "Bilirubin (Direct)", "Value": "0.2 mg/dL", "Code": "BILI_T", "Number": 0.2, "Unit": "mg/dL"}]
+    assert recode_entities(stale)[0]["Code"] != "BILI_T"
+
+    current = recode_entities([{"Indicator": "Haemoglobin", "Value": "14.2 g/dL"}])
+    assert recode_entities(current) == current
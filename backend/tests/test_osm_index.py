@@ -0,0 +1,58 @@
+import asyncio
+
+from app.services import maps_service as maps_module
+from app.services.osm_index import (
+    OSM_COLLECTION, OSM_COVERAGE_COLLECTION, element_to_pharmacy, extend_bbox, pharmacy_to_document, query_local_index,
+)
+from benchmarks.fakes import FakeDatabase
+
+# Three pharmacies around central Bengaluru, a few hundred metres apart.
+ELEMENTS = [
+    {"type": "node", "id": 1, "lat": 12.9716, "lon": 77.5946, "tags": {"name": "Centre"}},
+    {"type": "node", "id": 2, "lat": 12.9750, "lon": 77.5946, "tags": {"name": "North"}},
+    {"type": "way", "id": 3, "center": {"lat": 12.9600, "lon": 77.5800}, "tags": {"name": "South West"}},
+    {"type": "node", "id": 4, "lat": 13.0200, "lon": 77.6400, "tags": {"name": "Far"}},
+]
+
+
+def _indexed_db() -> FakeDatabase:
+    db, bbox = FakeDatabase(), None
+    for element in ELEMENTS:
+        pharmacy = element_to_pharmacy(element)
+        db[OSM_COLLECTION].docs.append(pharmacy_to_document(pharmacy))
+        bbox = extend_bbox(bbox, pharmacy)
+    db[OSM_COVERAGE_COLLECTION].docs.append({"_id": "bengaluru.json", "bbox": bbox})
+    return db
+
+
+def test_radius_query_returns_nearest_first_in_overpass_shape():
+    pharmacies = asyncio.run(query_local_index(_indexed_db(), 12.9720, 77.5946, 1000))
+    assert [p["name"] for p in pharmacies] == ["Centre", "North"]
+    assert pharmacies[0]["place_id"] == "osm_node_1"
+    assert pharmacies[0]["geometry"] == {"lat": 12.9716, "lng": 77.5946}
+
+
+def test_outside_the_imported_extract_is_not_an_answer():
+    db = _indexed_db()
+    assert asyncio.run(query_local_index(db, 28.6139, 77.2090, 1000)) is None
+    # Inside the box but the search circle reaches past its edge.
+    assert asyncio.run(query_local_index(db, 12.9620, 77.5820, 1000)) is None
+
+
+def test_maps_service_falls_back_to_overpass_outside_coverage(monkeypatch):
+    db = _indexed_db()
+    overpass_calls = []
+
+    async def fake_overpass(lat, lon, radius):
+        overpass_calls.append((lat, lon))
+        return [{"name": "Overpass"}]
+
+    service = maps_module.MapsService()
+    monkeypatch.setattr(maps_module, "get_database", lambda: db)
+    monkeypatch.setattr(service, "_query_overpass", fake_overpass)
+
+    local = asyncio.run(service._get_osm_pharmacies(12.9720, 77.5946, 1000))
+    remote = asyncio.run(service._get_osm_pharmacies(28.6139, 77.2090, 1000))
+    assert [p["name"] for p in local] == ["Centre", "North"]
+    assert remote == [{"name": "Overpass"}]
+    assert overpass_calls == [(28.6139, 77.2090)]
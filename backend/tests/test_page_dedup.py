@@ -0,0 +1,47 @@
+import cv2
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services import page_dedup
+from benchmarks.fakes import FakeRedis
+
+TEMPLATE_HASH = 0x0123456789ABCDEF  # Pages of one lab template share their perceptual hash
+
+
+def _page(lines) -> np.ndarray:
+    image = np.full((2339, 1654), 255, dtype=np.uint8)
+    for i, line in enumerate(lines):
+        cv2.putText(image, line, (120, 200 + i * 90), cv2.FONT_HERSHEY_SIMPLEX, 1.6, 0, 3)
+    return image
+
+
+def _fingerprint(image: np.ndarray) -> dict:
+    return {**page_dedup.fingerprint(image), "hash": TEMPLATE_HASH}
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(settings, "OCR_PAGE_CACHE_MIN_SIGHTINGS", 3)
+    return page_dedup.PageTextCache(FakeRedis())
+
+
+def test_different_pages_with_one_hash_are_never_stored(cache):
+    for patient, value in (("A", "13.1"), ("B", "9.8"), ("C", "15.4")):
+        page = _page(["CITY LAB - COMPLETE BLOOD COUNT", f"Patient {patient}", f"Hemoglobin  {value}  g/dL"])
+        cache.record(_fingerprint(page), (f"Hemoglobin {value} g/dL", []))
+
+    stored = cache.redis.hashes[cache._key({"hash": TEMPLATE_HASH})]
+    assert "text" not in stored
+    assert stored["sightings"] == b"1"
+
+
+def test_repeated_boilerplate_is_stored_after_a_different_page(cache):
+    terms = _page(["CITY LAB - TERMS AND CONDITIONS", "Results relate to the sample received."])
+    cache.record(_fingerprint(_page(["CITY LAB", "Patient A", "Hemoglobin 13.1 g/dL"])), ("patient page", []))
+    for _ in range(3):
+        assert cache.lookup(_fingerprint(terms)) is None
+        cache.record(_fingerprint(terms), ("terms page", [["terms"]]))
+
+    assert cache.lookup(_fingerprint(terms)) == ("terms page", [["terms"]])
+    assert cache.lookup(_fingerprint(_page(["CITY LAB", "Patient A", "Hemoglobin 13.1 g/dL"]))) is None
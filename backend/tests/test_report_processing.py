@@ -0,0 +1,35 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.tasks import report_processing
+
+
+class FailingModel:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def generate_content(self, prompt):
+        raise RuntimeError("429 Resource exhausted")
+
+
+class EmptyModel(FailingModel):
+    def generate_content(self, prompt):
+        return SimpleNamespace(text="  ", usage_metadata=None)
+
+
+# No line here parses locally, so extraction has to call the model.
+UNRESOLVED_TEXT = "Haemoglobin\n14.2\ng/dL\nPlatelets adequate on smear, about 2.5 lakhs"
+
+
+def test_vitals_stage_raises_when_gemini_fails(monkeypatch):
+    monkeypatch.setattr(report_processing.genai, "GenerativeModel", FailingModel)
+    with pytest.raises(RuntimeError):
+        report_processing.extract_vitals_with_gemini(UNRESOLVED_TEXT)
+
+
+@pytest.mark.parametrize("model", [FailingModel, EmptyModel])
+def test_summary_stage_raises_instead_of_returning_a_placeholder(monkeypatch, model):
+    monkeypatch.setattr(report_processing.genai, "GenerativeModel", model)
+    with pytest.raises(Exception):
+        report_processing.generate_summary_with_gemini([{"Indicator": "Hemoglobin", "Value": "14.2 g/dL"}], "Hemoglobin 14.2 g/dL")
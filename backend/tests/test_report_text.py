@@ -0,0 +1,22 @@
+from app.services.report_text import PAGE_BREAK, prepare_report_text
+
+
+def test_reference_range_is_stripped_after_a_value():
+    assert prepare_report_text("Hemoglobin 14.2 g/dL 13.0 - 17.0") == "Hemoglobin 14.2 g/dL"
+    assert prepare_report_text("HbA1c 6.2 % (4.0-5.6)") == "HbA1c 6.2 %"
+
+
+def test_value_is_kept_when_only_the_name_has_digits():
+    assert prepare_report_text("HbA1c < 5.7") == "HbA1c < 5.7"
+    assert prepare_report_text("Vitamin B12 < 150") == "Vitamin B12 < 150"
+
+
+def test_repeated_banner_is_dropped_but_repeated_cells_are_kept():
+    banner = "CITY DIAGNOSTICS LAB\nPatient: A Kumar Age: 45 Years"
+    page_1 = f"{banner}\nHemoglobin\n14.2\ng/dL\nRDW\n4.8\n%"
+    page_2 = f"{banner}\nMCHC\n33.1\ng/dL\nPlatelet Count\n4.8\nlakhs/cumm"
+    lines = prepare_report_text(page_1 + PAGE_BREAK + page_2).splitlines()
+
+    assert lines.count("CITY DIAGNOSTICS LAB") == 1
+    assert lines.count("Patient: A Kumar Age: 45 Years") == 1
+    assert lines[lines.index("MCHC"):] == ["MCHC", "33.1", "g/dL", "Platelet Count", "4.8", "lakhs/cumm"]
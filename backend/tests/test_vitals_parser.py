@@ -0,0 +1,29 @@
+from app.services.report_text import prepare_report_text, rows_to_text
+from app.services.vitals_parser import extract_vitals_locally
+
+
+def test_unresolved_values_keep_their_neighbouring_names_and_units():
+    # PyMuPDF text of a table extracted one cell per line.
+    text = "Test\nResult\nUnit\nHemoglobin\n14.2\ng/dL\nPlatelet Count\n2.5\nlakhs/cumm"
+    resolved, unresolved = extract_vitals_locally(text)
+    assert resolved == []
+    assert unresolved[unresolved.index("14.2") - 1] == "Hemoglobin"
+    assert unresolved[unresolved.index("14.2") + 1] == "g/dL"
+    assert "Platelet Count" in unresolved and "lakhs/cumm" in unresolved
+
+
+def test_unit_less_rows_need_a_reference_range():
+    for row in ("Visit No | 77", "Bill No | 1234", "Page | 1"):
+        resolved, unresolved = extract_vitals_locally(row)
+        assert resolved == []
+        assert unresolved == [row]
+
+    resolved, _ = extract_vitals_locally("Specific Gravity | 1.015 | 1.005 - 1.030")
+    assert resolved == [{"Indicator": "Specific Gravity", "Value": "1.015"}]
+
+
+def test_reference_cells_survive_preparation_but_not_the_llm_lines():
+    layout_rows = [[["Specific Gravity", "1.015", "1.005 - 1.030"], ["Ketones", "2+", "(0-1)"]]]
+    resolved, unresolved = extract_vitals_locally(prepare_report_text(rows_to_text(layout_rows)))
+    assert resolved == [{"Indicator": "Specific Gravity", "Value": "1.015"}]
+    assert unresolved == ["Specific Gravity | 1.015", "Ketones | 2+"]
@@ -9,6 +9,7 @@ function Chatbot() {
   ]);
   const [input, setInput] = useState("");
   const [loading, setLoading] = useState(false);
+  const [sessionId, setSessionId] = useState(null);
   
   const messagesEndRef = useRef(null);
 
@@ -32,7 +33,8 @@ function Chatbot() {
 
     try {
       // 2. Call Backend API
-      const response = await api.post("/chat/", { message: trimmed });
+      const response = await api.post("/chat/", { message: trimmed, session_id: sessionId });
+      setSessionId(response.data.session_id);
       
       // 3. Add AI Response
       const botReply = response.data.response;
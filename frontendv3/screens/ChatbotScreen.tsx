@@ -32,6 +32,7 @@ export default function ChatbotScreen() {
   ]);
   const [input, setInput] = useState('');
   const [loading, setLoading] = useState(false);
+  const [sessionId, setSessionId] = useState<string | null>(null);
   const flatListRef = useRef<FlatList>(null);
 
   useEffect(() => {
@@ -55,8 +56,9 @@ export default function ChatbotScreen() {
     setLoading(true);
 
     try {
-      const response = await api.post('/chat/', { message: trimmed });
+      const response = await api.post('/chat/', { message: trimmed, session_id: sessionId });
       const botReply = response.data.response;
+      setSessionId(response.data.session_id);
 
       const botMessage: Message = {
         id: (Date.now() + 1).toString(),